@@ -0,0 +1,10 @@
+"""
+Analysis tools for simulated conversations.
+
+Run them as modules, e.g.:
+  python -m analysis.attribution ...
+  python -m analysis.surrogate ...
+  python -m analysis.events ...
+  python -m analysis.patterns ...
+  python -m analysis.optimum ...
+"""
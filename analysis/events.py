@@ -0,0 +1,337 @@
+"""
+Columnar per-turn event store for conversation analytics.
+
+Games are exported one row per turn into NumPy structured arrays saved as ``.npy`` shards,
+partitioned by configuration (``P{P}_L{L}_B{B}_S{S}``). Shards are memory-mapped when
+queried, so filters, group-bys and aggregates run vectorised over one shard at a time and
+never load the whole store. Score columns hold each turn's final contribution to the
+shared score under the engine's rules (coherence looks at the whole finished game).
+
+Usage:
+	python -m analysis.events export --replays games.cvr --store events/
+	python -m analysis.events query --store events/ --where "speaker_class == p1" \\
+		--group-by L --agg score_coherence:mean turn:count
+"""
+
+import argparse
+import json
+import operator
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+from core.scoring import HistoryBatch, turn_components
+from models.item import Item
+from models.player import PlayerSnapshot
+from tournament.replay import Replay, ReplayReader
+
+PAUSE_CLASS = 255
+PARTITION_PARAMS = ('P', 'L', 'B', 'S')
+_PARTITION_RE = re.compile(r'^P(\d+)_L(\d+)_B(\d+)_S(\d+)$')
+
+EVENT_DTYPE = np.dtype(
+	[
+		('game_id', '<u8'),
+		('turn', '<u4'),
+		('speaker_slot', '<i2'),
+		('speaker_class', 'u1'),
+		('n_subjects', 'u1'),
+		('subject0', '<i2'),
+		('subject1', '<i2'),
+		('importance', '<f4'),
+		('is_pause', '?'),
+		('after_pause', '?'),
+		('repeated', '?'),
+		('score_importance', '<f4'),
+		('score_coherence', '<f4'),
+		('score_freshness', '<f4'),
+		('score_nonmonotonousness', '<f4'),
+		('score_individual', '<f4'),
+		('game_shared', '<f4'),
+	]
+)
+
+_OPS = {
+	'==': operator.eq,
+	'!=': operator.ne,
+	'<': operator.lt,
+	'<=': operator.le,
+	'>': operator.gt,
+	'>=': operator.ge,
+}
+_AGGREGATES = ('count', 'sum', 'mean', 'min', 'max')
+
+
+def individual_bonus(item: Item, snapshot: PlayerSnapshot) -> float:
+	preferences = snapshot.preferences
+	bonuses = [
+		1 - preferences.index(s) / len(preferences) for s in item.subjects if s in preferences
+	]
+	return sum(bonuses) / len(bonuses) if bonuses else 0.0
+
+
+class EventStore:
+	def __init__(self, root: str | Path) -> None:
+		self.root = Path(root)
+		self.meta_path = self.root / 'meta.json'
+		if self.meta_path.exists():
+			self.meta = json.loads(self.meta_path.read_text())
+		else:
+			self.meta = {'classes': [], 'next_game_id': 0}
+
+	# --- writing ---
+
+	def _class_index(self, name: str) -> int:
+		if name not in self.meta['classes']:
+			if len(self.meta['classes']) >= PAUSE_CLASS:
+				raise ValueError('Too many distinct speaker classes for the event store.')
+			self.meta['classes'].append(name)
+		return self.meta['classes'].index(name)
+
+	def replay_rows(self, replay: Replay) -> np.ndarray:
+		history = replay.history
+		snapshots = list(replay.snapshots.values())
+		slot_of = {snapshot.id: p for p, snapshot in enumerate(snapshots)}
+		classes = [self._class_index(name) for name in replay.roster]
+		components = turn_components(HistoryBatch.from_histories([history]))[0]
+
+		rows = np.zeros(len(history), dtype=EVENT_DTYPE)
+		rows['game_id'] = self.meta['next_game_id']
+		rows['turn'] = np.arange(1, len(history) + 1)
+		rows['game_shared'] = components.sum()
+		rows['score_importance'] = components[:, 0]
+		rows['score_coherence'] = components[:, 1]
+		rows['score_freshness'] = components[:, 2]
+		rows['score_nonmonotonousness'] = components[:, 3]
+
+		seen = set()
+		for t, item in enumerate(history):
+			row = rows[t]
+			row['after_pause'] = t > 0 and history[t - 1] is None
+			if item is None:
+				row['is_pause'] = True
+				row['speaker_slot'] = -1
+				row['speaker_class'] = PAUSE_CLASS
+				row['subject0'] = row['subject1'] = -1
+				continue
+
+			slot = slot_of[item.player_id]
+			row['speaker_slot'] = slot
+			row['speaker_class'] = classes[slot]
+			row['n_subjects'] = len(item.subjects)
+			row['subject0'] = item.subjects[0]
+			row['subject1'] = item.subjects[1] if len(item.subjects) > 1 else -1
+			row['importance'] = item.importance
+			row['repeated'] = item.id in seen
+			row['score_individual'] = individual_bonus(item, snapshots[slot])
+			seen.add(item.id)
+
+		self.meta['next_game_id'] += 1
+		return rows
+
+	def export(self, replays: Iterable[Replay], shard_rows: int = 1_000_000) -> int:
+		"""Appends the replays' turns to the store. Returns the number of games written."""
+		buffers: dict[str, list[np.ndarray]] = {}
+		sizes: Counter[str] = Counter()
+		games = 0
+
+		for replay in replays:
+			partition = (
+				f'P{replay.players}_L{replay.length}_B{replay.memory_size}_S{replay.subjects}'
+			)
+			rows = self.replay_rows(replay)
+			buffers.setdefault(partition, []).append(rows)
+			sizes[partition] += len(rows)
+			games += 1
+			if sizes[partition] >= shard_rows:
+				self._flush(partition, buffers.pop(partition))
+				sizes[partition] = 0
+
+		for partition, chunks in buffers.items():
+			self._flush(partition, chunks)
+
+		self.root.mkdir(parents=True, exist_ok=True)
+		self.meta_path.write_text(json.dumps(self.meta))
+		return games
+
+	def _flush(self, partition: str, chunks: list[np.ndarray]) -> None:
+		directory = self.root / partition
+		directory.mkdir(parents=True, exist_ok=True)
+		index = len(list(directory.glob('shard_*.npy')))
+		np.save(directory / f'shard_{index:05d}.npy', np.concatenate(chunks))
+
+	# --- reading ---
+
+	def partitions(self) -> dict[str, dict[str, int]]:
+		found = {}
+		for directory in sorted(self.root.iterdir()) if self.root.exists() else []:
+			match = _PARTITION_RE.match(directory.name)
+			if match:
+				found[directory.name] = dict(
+					zip(PARTITION_PARAMS, map(int, match.groups()), strict=True)
+				)
+		return found
+
+	def shards(
+		self, where: list[tuple[str, str, object]] = ()
+	) -> Iterator[tuple[dict, np.ndarray]]:
+		"""Memory-maps every shard whose partition can satisfy the partition-level filters."""
+		for partition, params in self.partitions().items():
+			if not all(
+				_OPS[op](params[field], value) for field, op, value in where if field in params
+			):
+				continue
+			for path in sorted((self.root / partition).glob('shard_*.npy')):
+				yield params, np.load(path, mmap_mode='r')
+
+	def _column(self, shard: np.ndarray, params: dict, field: str) -> np.ndarray:
+		if field in params:
+			return np.full(len(shard), params[field])
+		return shard[field]
+
+	def _encode(self, field: str, value):
+		if field == 'speaker_class' and isinstance(value, str):
+			return PAUSE_CLASS if value == 'pause' else self.meta['classes'].index(value)
+		return value
+
+	def _decode(self, field: str, value):
+		if field == 'speaker_class':
+			return 'pause' if value == PAUSE_CLASS else self.meta['classes'][int(value)]
+		return value.item() if isinstance(value, np.generic) else value
+
+	def query(
+		self,
+		where: list[tuple[str, str, object]] = (),
+		group_by: list[str] = (),
+		aggregates: dict[str, list[str]] | None = None,
+	) -> list[dict]:
+		"""
+		Filters rows (``where`` is a list of ``(field, op, value)``), groups them by
+		``group_by`` fields and aggregates, e.g. ``{'score_coherence': ['mean']}``. Partition
+		parameters P, L, B and S can be used like columns.
+		"""
+		aggregates = aggregates or {'turn': ['count']}
+		where = [(field, op, self._encode(field, value)) for field, op, value in where]
+		acc: dict[tuple, dict[str, list[float]]] = {}
+
+		for params, shard in self.shards(where):
+			mask = np.ones(len(shard), dtype=bool)
+			for field, op, value in where:
+				if field not in params:
+					mask &= _OPS[op](shard[field], value)
+			if not mask.any():
+				continue
+
+			if group_by:
+				keys = np.rec.fromarrays(
+					[self._column(shard, params, f)[mask] for f in group_by], names=list(group_by)
+				)
+				unique, inverse = np.unique(keys, return_inverse=True)
+				groups = [tuple(u) for u in unique.tolist()]
+			else:
+				inverse = np.zeros(int(mask.sum()), dtype=np.intp)
+				groups = [()]
+
+			counts = np.bincount(inverse, minlength=len(groups))
+			for field, ops in aggregates.items():
+				values = self._column(shard, params, field)[mask].astype(np.float64)
+				sums = np.bincount(inverse, weights=values, minlength=len(groups))
+				mins = np.full(len(groups), np.inf)
+				maxs = np.full(len(groups), -np.inf)
+				if 'min' in ops:
+					np.minimum.at(mins, inverse, values)
+				if 'max' in ops:
+					np.maximum.at(maxs, inverse, values)
+				for g, key in enumerate(groups):
+					stats = acc.setdefault(key, {}).setdefault(field, [0.0, 0.0, np.inf, -np.inf])
+					stats[0] += counts[g]
+					stats[1] += sums[g]
+					stats[2] = min(stats[2], mins[g])
+					stats[3] = max(stats[3], maxs[g])
+
+		rows = []
+		for key in sorted(acc):
+			row = {f: self._decode(f, v) for f, v in zip(group_by, key, strict=True)}
+			for field, ops in aggregates.items():
+				count, total, low, high = acc[key][field]
+				results = {
+					'count': int(count),
+					'sum': total,
+					'mean': total / count if count else float('nan'),
+					'min': low,
+					'max': high,
+				}
+				for op in ops:
+					row[f'{field}:{op}'] = results[op]
+			rows.append(row)
+		return rows
+
+
+def _parse_where(expression: str) -> tuple[str, str, object]:
+	match = re.match(r'^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$', expression)
+	if not match:
+		raise argparse.ArgumentTypeError(f'Cannot parse filter: {expression!r}')
+	field, op, raw = match.groups()
+	try:
+		value = json.loads(raw.lower() if raw.lower() in ('true', 'false') else raw)
+	except json.JSONDecodeError:
+		value = raw
+	return field, op, value
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Per-turn columnar event store.')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	export = subparsers.add_parser('export', help='Export replay archives into the store.')
+	export.add_argument('--replays', nargs='+', required=True, help='Replay archives (.cvr).')
+	export.add_argument('--store', required=True)
+	export.add_argument('--shard-rows', type=int, default=1_000_000)
+
+	query = subparsers.add_parser('query', help='Filter, group and aggregate turns.')
+	query.add_argument('--store', required=True)
+	query.add_argument('--where', nargs='*', type=_parse_where, default=[])
+	query.add_argument('--group-by', nargs='*', default=[])
+	query.add_argument(
+		'--agg',
+		nargs='*',
+		default=['turn:count'],
+		help='FIELD:OP with OP in ' + ', '.join(_AGGREGATES),
+	)
+
+	args = parser.parse_args()
+	store = EventStore(args.store)
+
+	if args.command == 'export':
+		replays = (replay for path in args.replays for replay in ReplayReader(path))
+		games = store.export(replays, shard_rows=args.shard_rows)
+		print(f'Exported {games} games to {args.store}')
+		return
+
+	aggregates: dict[str, list[str]] = {}
+	for spec in args.agg:
+		field, _, op = spec.partition(':')
+		if op not in _AGGREGATES:
+			parser.error(f'unknown aggregate {op!r}')
+		aggregates.setdefault(field, []).append(op)
+
+	rows = store.query(args.where, args.group_by, aggregates)
+	if not rows:
+		print('No matching rows.')
+		return
+	columns = list(rows[0])
+	print('  '.join(f'{c:>18}' for c in columns))
+	for row in rows:
+		print(
+			'  '.join(
+				f'{row[c]:>18.4f}' if isinstance(row[c], float) else f'{row[c]!s:>18}'
+				for c in columns
+			)
+		)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,390 @@
+"""
+Upper bound on the shared score achievable in a game instance.
+
+The solver ignores who may speak when: any item from the union of the memory banks can be
+played on any turn, as can a pause, and the best sequence of ``length`` turns is searched
+for under the engine's scoring rules. A beam search finds a good sequence first, then a
+depth-first branch-and-bound tries to prove it optimal within the time budget.
+
+Search states are ``core.scoring.advance`` states (the last six turns, the open coherence
+windows of the last three items with their partial subject counts, and the used-item
+bitset) plus the number of turns left. Subtree results are memoised per state as an upper
+bound, which is exact when nothing below it was pruned; ``_Search.bound`` explains the
+pruning bound.
+
+``OptimumCache`` stores solutions per instance hash so reports can show the gap to the
+optimum without solving an instance twice.
+
+Usage:
+	python -m analysis.optimum --replays games.cvr --budget 2 --cache optimum.json
+"""
+
+import argparse
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from core.scoring import (
+	EMPTY_STATE,
+	PAUSE,
+	HistoryBatch,
+	advance,
+	score_histories,
+	settle,
+	window_coherence,
+)
+from models.item import Item
+from models.player import PlayerSnapshot
+from tournament.replay import Replay, ReplayReader
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class Instance:
+	"""
+	The items of every memory bank as ``(subjects, importance)`` pairs, and the length.
+	Items are kept sorted so that equal instances have equal keys and sequences.
+	"""
+
+	items: tuple[tuple[tuple[int, ...], float], ...]
+	length: int
+
+	def __post_init__(self) -> None:
+		object.__setattr__(self, 'items', tuple(sorted(self.items)))
+
+	@classmethod
+	def from_snapshots(cls, snapshots: list[PlayerSnapshot], length: int) -> 'Instance':
+		items = tuple(
+			(tuple(item.subjects), item.importance)
+			for snapshot in snapshots
+			for item in snapshot.memory_bank
+		)
+		return cls(items, length)
+
+	@classmethod
+	def from_replay(cls, replay: Replay) -> 'Instance':
+		return cls.from_snapshots(list(replay.snapshots.values()), replay.length)
+
+	@property
+	def key(self) -> str:
+		canonical = json.dumps([self.length, self.items])
+		return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+@dataclass
+class Solution:
+	score: float
+	bound: float  # proven upper bound; equals score when exact
+	exact: bool
+	sequence: list[int]  # item indices into Instance.items, PAUSE for pauses
+	nodes: int = 0
+	seconds: float = 0.0
+	budget: float = 0.0
+
+
+class _Timeout(Exception):
+	pass
+
+
+@dataclass
+class _Search:
+	instance: Instance
+	deadline: float
+	best_score: float = float('-inf')
+	best_sequence: list[int] = field(default_factory=list)
+	nodes: int = 0
+	memo: dict = field(default_factory=dict)
+	max_memo: int = 2_000_000
+
+	def __post_init__(self) -> None:
+		self.subjects = [subjects for subjects, _ in self.instance.items]
+		self.importance = [importance for _, importance in self.instance.items]
+		# Every item may be played (repeats included) or the turn passed
+		self.actions = [PAUSE, *range(len(self.subjects))]
+		# Subjects that some other item shares. An item can only reach +1 coherence without
+		# repeating itself if all of its subjects are shared; otherwise it scores -1, and
+		# each of its own repeats (-1) can raise that by at most 1
+		self.shared = [
+			tuple(
+				any(s in other for y, other in enumerate(self.subjects) if y != x) for s in subjects
+			)
+			for x, subjects in enumerate(self.subjects)
+		]
+		self.max_coherence = [1.0 if all(shared) else -1.0 for shared in self.shared]
+		# Items that can reach +1, by importance + 1; the others by what they score alone
+		# right after a pause (importance - 1 + freshness)
+		self.coherent = sorted(
+			(x for x, c in enumerate(self.max_coherence) if c > 0),
+			key=lambda x: -self.importance[x],
+		)
+		self.isolated = sorted(
+			(x for x, c in enumerate(self.max_coherence) if c < 0),
+			key=lambda x: -self._isolated_value(x),
+		)
+
+	def _isolated_value(self, x: int) -> float:
+		return self.importance[x] - 1.0 + len(self.subjects[x])
+
+	# --- rules ---
+
+	def step(self, state: tuple, action: int) -> tuple[float, tuple, bool]:
+		"""Applies ``action`` and returns (settled score gain, next state, game over)."""
+		gain, state = advance(state, action, self.subjects, self.importance)
+		return gain, state, state[3] >= 3
+
+	def close(self, state: tuple) -> float:
+		return settle(state)
+
+	def bound(self, state: tuple, turns: int) -> float:
+		"""
+		Admissible bound on the score still to come from ``state``.
+
+		Open items count at their best coherence given their counts so far, unused coherent items at importance + 1.
+		Freshness is only worth up to +2 net for a run of at least three turns after a pause
+		(an item alone after a pause loses 2 coherence, and the first of two loses 1 and
+		takes 1 from the other), so f such runs take f pauses and 3f turns, padded with
+		items worth at most 0. Isolated items are counted alone after a pause (2 turns).
+		"""
+		recent, pending, used, _ = state
+		coherent = []
+		for x in self.coherent:
+			if len(coherent) == turns:
+				break
+			if not used >> x & 1:
+				coherent.append(self.importance[x] + 1.0)
+		isolated = []
+		for x in self.isolated:
+			if len(isolated) == turns // 2 + 1 or self._isolated_value(x) <= 0:
+				break
+			if not used >> x & 1:
+				isolated.append(self._isolated_value(x))
+
+		# The first pause is already there if the last turn was one
+		free = 1 if recent and recent[-1] == PAUSE else 0
+		best = 0.0
+		isolated_total = 0.0
+		for k in range(len(isolated) + 1):
+			if k:
+				isolated_total += isolated[k - 1]
+			for runs in range(turns // 3 + 1):
+				paused = max(0, runs + k - free)
+				spoken = turns - paused - k
+				if spoken < 3 * runs:
+					break
+				best = max(best, isolated_total + sum(coherent[:spoken]) + 2.0 * runs)
+		opened = sum(
+			window_coherence(
+				tuple(2 if shared else c for shared, c in zip(self.shared[y], counts, strict=True))
+			)
+			for _, y, counts in pending
+		)
+		return opened + best
+
+	# --- beam search ---
+
+	def beam(self, width: int, deadline: float) -> None:
+		"""Beam search; past ``deadline`` it narrows to the single best (greedy) sequence."""
+		beam = [(0.0, (), EMPTY_STATE, False)]
+		for _ in range(self.instance.length):
+			if time.perf_counter() > deadline:
+				width = 1
+			expanded = {}
+			for score, sequence, state, over in beam:
+				if over:
+					expanded[(state, True, sequence)] = (score, sequence, state, True)
+					continue
+				for action in self.actions:
+					gain, child, ended = self.step(state, action)
+					key = (child, ended)
+					candidate = (score + gain, (*sequence, action), child, ended)
+					if key not in expanded or expanded[key][0] < candidate[0]:
+						expanded[key] = candidate
+			# Rank by settled score plus what open items would score if closed now
+			ranked = sorted(expanded.values(), key=lambda c: c[0] + self.close(c[2]), reverse=True)
+			beam = ranked[:width]
+
+		for score, sequence, state, _ in beam:
+			self._offer(score + self.close(state), list(sequence))
+
+	# --- branch and bound ---
+
+	def _offer(self, score: float, sequence: list[int]) -> None:
+		if score > self.best_score + _EPS:
+			self.best_score = score
+			self.best_sequence = sequence
+
+	def dfs(
+		self, state: tuple, turns: int, score: float, path: list[int]
+	) -> tuple[float, bool, list[int]]:
+		"""
+		Returns an upper bound on the score still to come, whether it is exact and, if so,
+		the actions that achieve it.
+		"""
+		self.nodes += 1
+		if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+			raise _Timeout
+
+		if turns == 0:
+			closing = self.close(state)
+			self._offer(score + closing, list(path))
+			return closing, True, []
+
+		key = (state, turns)
+		cached = self.memo.get(key)
+		if cached is not None:
+			upper, exact, tail = cached
+			if exact:
+				self._offer(score + upper, path + tail)
+				return upper, True, tail
+			if score + upper <= self.best_score + _EPS:
+				return upper, False, []
+
+		bound = self.bound(state, turns)
+		if score + bound <= self.best_score + _EPS:
+			return bound, False, []
+
+		children = []
+		for action in self.actions:
+			gain, child, ended = self.step(state, action)
+			children.append((gain + self.close(child), gain, action, child, ended))
+		children.sort(key=lambda c: -c[0])
+
+		upper = float('-inf')
+		exact = True
+		tail: list[int] = []
+		for _, gain, action, child, ended in children:
+			path.append(action)
+			if ended:
+				closing = self.close(child)
+				self._offer(score + gain + closing, list(path))
+				future, child_exact, child_tail = closing, True, []
+			else:
+				future, child_exact, child_tail = self.dfs(child, turns - 1, score + gain, path)
+			path.pop()
+
+			exact &= child_exact
+			if gain + future > upper:
+				upper = gain + future
+				tail = [action, *child_tail]
+
+		if not exact:
+			tail = []
+		if len(self.memo) >= self.max_memo:
+			self.memo.clear()
+		self.memo[key] = (upper, exact, tail)
+		return upper, exact, tail
+
+
+def solve(instance: Instance, budget: float = 2.0, beam_width: int = 64) -> Solution:
+	"""
+	Best sequence for ``instance`` found within ``budget`` seconds. ``exact`` is set when
+	the branch-and-bound finished, otherwise ``bound`` is the bound at the root and the
+	score is the best sequence found (from the beam search at least). The beam search gets
+	half the budget and finishes greedily if it runs out, so very long games may overrun.
+	"""
+	start = time.perf_counter()
+	search = _Search(instance, deadline=start + budget)
+	search.beam(beam_width, deadline=start + budget / 2)
+
+	root = EMPTY_STATE
+	try:
+		upper, _, _ = search.dfs(root, instance.length, 0.0, [])
+		# Pruned subtrees are inexact, but their bounds are below the incumbent
+		bound = max(upper, search.best_score)
+		exact = bound <= search.best_score + _EPS
+	except _Timeout:
+		exact = False
+		bound = max(search.bound(root, instance.length), search.best_score)
+
+	return Solution(
+		score=search.best_score,
+		bound=search.best_score if exact else bound,
+		exact=exact,
+		sequence=search.best_sequence,
+		nodes=search.nodes,
+		seconds=time.perf_counter() - start,
+		budget=budget,
+	)
+
+
+def score_sequence(instance: Instance, sequence: list[int]) -> float:
+	"""Shared score of ``sequence`` under the engine's rules (via ``core.scoring``)."""
+	owner = uuid.uuid4()
+	items = [
+		Item(id=uuid.uuid4(), player_id=owner, importance=importance, subjects=subjects)
+		for subjects, importance in instance.items
+	]
+	history = [None if x == PAUSE else items[x] for x in sequence]
+	return float(score_histories(HistoryBatch.from_histories([history]))['shared'][0])
+
+
+class OptimumCache:
+	"""Solutions keyed by ``Instance.key``, optionally persisted as JSON."""
+
+	def __init__(self, path: str | Path | None = None) -> None:
+		self.path = Path(path) if path else None
+		self.solutions: dict[str, Solution] = {}
+		if self.path and self.path.exists():
+			for key, data in json.loads(self.path.read_text()).items():
+				self.solutions[key] = Solution(**data)
+
+	def solve(self, instance: Instance, budget: float = 2.0, beam_width: int = 64) -> Solution:
+		"""Cached solution, re-solved only if it was inexact and ``budget`` is larger."""
+		key = instance.key
+		cached = self.solutions.get(key)
+		if cached is not None and (cached.exact or cached.budget >= budget):
+			return cached
+
+		solution = solve(instance, budget, beam_width)
+		if cached is not None and cached.score > solution.score:
+			solution.score, solution.sequence = cached.score, cached.sequence
+		self.solutions[key] = solution
+		return solution
+
+	def save(self) -> None:
+		if self.path:
+			data = {key: asdict(solution) for key, solution in self.solutions.items()}
+			self.path.write_text(json.dumps(data))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Gap between played games and the optimum.')
+	parser.add_argument('--replays', nargs='+', required=True, help='Replay archives (.cvr).')
+	parser.add_argument('--budget', type=float, default=2.0, help='Seconds per instance.')
+	parser.add_argument('--beam-width', type=int, default=64)
+	parser.add_argument('--cache', help='JSON file of solutions keyed by instance hash.')
+	parser.add_argument('--limit', type=int, help='Only the first N games of each archive.')
+	args = parser.parse_args()
+
+	cache = OptimumCache(args.cache)
+	print(
+		f'{"archive":<20} {"game":>5} {"roster":<24} {"shared":>8} {"optimum":>8} '
+		f'{"bound":>8} {"gap":>8} {"exact":>6}'
+	)
+	gaps = []
+	for path in args.replays:
+		reader = ReplayReader(path)
+		for index in range(min(len(reader), args.limit or len(reader))):
+			replay = reader[index]
+			shared = replay.scores_at()['shared_score_breakdown']['total']
+			solution = cache.solve(Instance.from_replay(replay), args.budget, args.beam_width)
+			gap = solution.score - shared
+			gaps.append(gap)
+			roster = ','.join(replay.roster)
+			print(
+				f'{Path(path).name:<20} {index:>5} {roster[:24]:<24} {shared:>8.2f} '
+				f'{solution.score:>8.2f} {solution.bound:>8.2f} {gap:>8.2f} '
+				f'{"yes" if solution.exact else "no":>6}'
+			)
+
+	cache.save()
+	if gaps:
+		print(f'\nMean gap to optimum: {sum(gaps) / len(gaps):.3f} over {len(gaps)} games')
+
+
+if __name__ == '__main__':
+	main()
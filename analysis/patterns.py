@@ -0,0 +1,343 @@
+"""
+Streaming miner for recurring conversation structure.
+
+Games are streamed from replay archives in chunks and never held in memory all at once.
+Three families of patterns are extracted from every game:
+
+- subject: n-grams of consecutive items' subject sets (pauses break an n-gram)
+- speaker: n-grams of speaker classes, with ``pause`` as a class of its own
+- fresh: a run of pauses followed by an item, keyed by the run length and how many of the
+  item's subjects scored freshness (or whether it was a repeat)
+
+Occurrences are counted in a single count-min sketch of fixed size, and each family keeps
+a bounded table of heavy hitters (the patterns with the largest sketch estimates). For
+the patterns in that table the miner also tracks the conversation quality (shared score
+per turn) of the games containing them, so it can report which patterns go with better or
+worse than average games. Statistics of a heavy hitter start when it enters the table;
+the count-min estimate covers the whole stream and never undercounts.
+
+Usage:
+	python -m analysis.patterns --replays games.cvr --ngram 2 3 --top 500 --report 10
+"""
+
+import argparse
+import heapq
+import math
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.scoring import NO_SUBJECT, turn_components
+from tournament.replay import PAUSE, Replay, ReplayReader, to_batch
+
+SUBJECT, SPEAKER, FRESH = 0, 1, 2
+FAMILIES = {SUBJECT: 'subject', SPEAKER: 'speaker', FRESH: 'fresh'}
+PAUSE_TOKEN = -1
+REPEAT_TOKEN = -1
+
+_PRIME = (1 << 31) - 1
+
+
+class CountMinSketch:
+	"""Count-min sketch over hashable keys with a ``depth`` × ``width`` counter table."""
+
+	def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 0) -> None:
+		rng = np.random.default_rng(seed)
+		self.width = width
+		self.depth = depth
+		self.table = np.zeros((depth, width), dtype=np.int64)
+		self._a = rng.integers(1, _PRIME, size=(depth, 1), dtype=np.int64)
+		self._b = rng.integers(0, _PRIME, size=(depth, 1), dtype=np.int64)
+		self._rows = np.arange(depth)[:, None]
+
+	def _columns(self, keys: list[tuple]) -> np.ndarray:
+		# Tuples of ints hash the same in every process, unlike strings
+		hashes = np.array([hash(key) % _PRIME for key in keys], dtype=np.int64)
+		return (self._a * hashes + self._b) % _PRIME % self.width
+
+	def add(self, keys: list[tuple], counts: list[int]) -> np.ndarray:
+		"""Adds ``counts`` to ``keys`` and returns their updated estimates."""
+		columns = self._columns(keys)
+		np.add.at(self.table, (self._rows, columns), np.asarray(counts, dtype=np.int64))
+		return self.table[self._rows, columns].min(axis=0)
+
+	def estimate(self, keys: list[tuple]) -> np.ndarray:
+		columns = self._columns(keys)
+		return self.table[self._rows, columns].min(axis=0)
+
+	@property
+	def total(self) -> int:
+		return int(self.table[0].sum())
+
+
+@dataclass(slots=True)
+class PatternStats:
+	estimate: int = 0
+	games: int = 0
+	quality_sum: float = 0.0
+	quality_sq: float = 0.0
+
+	@property
+	def mean_quality(self) -> float:
+		return self.quality_sum / self.games if self.games else float('nan')
+
+
+class HeavyHitters:
+	"""
+	The ``capacity`` keys with the largest count-min estimates seen so far. A lazy min-heap
+	finds the entry to evict; stale heap entries are skipped and the heap is rebuilt once
+	it outgrows the table.
+	"""
+
+	def __init__(self, capacity: int) -> None:
+		self.capacity = capacity
+		self.entries: dict[tuple, PatternStats] = {}
+		self._heap: list[tuple[int, tuple]] = []
+
+	def _minimum(self) -> tuple[int, tuple]:
+		while True:
+			estimate, key = self._heap[0]
+			entry = self.entries.get(key)
+			if entry is not None and entry.estimate == estimate:
+				return estimate, key
+			heapq.heappop(self._heap)
+
+	def offer(self, key: tuple, estimate: int) -> PatternStats | None:
+		"""Records ``key``'s new estimate; returns its stats if it is (now) tracked."""
+		entry = self.entries.get(key)
+		if entry is None:
+			if len(self.entries) >= self.capacity:
+				lowest, evicted = self._minimum()
+				if estimate <= lowest:
+					return None
+				heapq.heappop(self._heap)
+				del self.entries[evicted]
+			entry = self.entries[key] = PatternStats()
+
+		entry.estimate = estimate
+		heapq.heappush(self._heap, (estimate, key))
+		if len(self._heap) > 4 * self.capacity:
+			self._heap = [(e.estimate, k) for k, e in self.entries.items()]
+			heapq.heapify(self._heap)
+		return entry
+
+
+@dataclass
+class Pattern:
+	family: str
+	text: str
+	estimate: int
+	games: int
+	mean_quality: float
+	lift: float  # mean quality minus the corpus mean
+	z: float
+
+
+class PatternMiner:
+	def __init__(
+		self,
+		ngrams: Iterable[int] = (2, 3),
+		capacity: int = 500,
+		width: int = 1 << 16,
+		depth: int = 4,
+		seed: int = 0,
+	) -> None:
+		self.ngrams = tuple(sorted(set(ngrams)))
+		self.sketch = CountMinSketch(width, depth, seed)
+		self.hitters = {family: HeavyHitters(capacity) for family in FAMILIES}
+		self.classes: list[str] = []
+		self.games = 0
+		self.quality_sum = 0.0
+		self.quality_sq = 0.0
+
+	def _class_index(self, name: str) -> int:
+		if name not in self.classes:
+			self.classes.append(name)
+		return self.classes.index(name)
+
+	# --- extraction ---
+
+	def game_patterns(self, replay: Replay, subjects: np.ndarray, freshness: np.ndarray) -> Counter:
+		"""
+		Pattern occurrences in one game, from its (T, 2) subjects and per-turn freshness
+		(as scored by ``core.scoring.turn_components``).
+		"""
+		speakers = replay.turns['speaker'].tolist()
+		items = replay.turns['item'].tolist()
+		classes = [self._class_index(name) for name in replay.roster]
+		patterns: Counter = Counter()
+
+		subject_tokens = []
+		speaker_tokens = []
+		seen = set()
+		pauses = 0
+		for t, speaker in enumerate(speakers):
+			if speaker == PAUSE:
+				subject_tokens.append(None)
+				speaker_tokens.append(PAUSE_TOKEN)
+				pauses += 1
+				continue
+
+			first, second = subjects[t].tolist()
+			if second == NO_SUBJECT:
+				subject_tokens.append(first + 1)
+			else:
+				# Subject pairs as one int: (low + 1) | (high + 1) << 16
+				low, high = sorted((first, second))
+				subject_tokens.append((low + 1) | (high + 1) << 16)
+			speaker_tokens.append(classes[speaker])
+
+			item = (speaker, items[t])
+			if pauses:
+				fresh = REPEAT_TOKEN if item in seen else int(freshness[t])
+				patterns[(FRESH, min(pauses, 3), fresh)] += 1
+			seen.add(item)
+			pauses = 0
+
+		for n in self.ngrams:
+			for t in range(len(speakers) - n + 1):
+				window = subject_tokens[t : t + n]
+				if None not in window:
+					patterns[(SUBJECT, *window)] += 1
+				patterns[(SPEAKER, *speaker_tokens[t : t + n])] += 1
+
+		return patterns
+
+	# --- streaming ---
+
+	def update(self, patterns: Counter, quality: float) -> None:
+		self.games += 1
+		self.quality_sum += quality
+		self.quality_sq += quality * quality
+		if not patterns:
+			return
+
+		keys = list(patterns)
+		estimates = self.sketch.add(keys, [patterns[key] for key in keys])
+		for key, estimate in zip(keys, estimates.tolist(), strict=True):
+			entry = self.hitters[key[0]].offer(key, estimate)
+			if entry is not None:
+				entry.games += 1
+				entry.quality_sum += quality
+				entry.quality_sq += quality * quality
+
+	def consume(self, replays: Iterable[Replay], chunk: int = 512) -> int:
+		"""Streams ``replays`` through the miner, scoring ``chunk`` games at a time."""
+		consumed = 0
+		for batch in _chunks(replays, chunk):
+			scored = to_batch(batch)
+			components = turn_components(scored)
+			shared = components.sum(axis=(1, 2))
+			for k, replay in enumerate(batch):
+				quality = shared[k] / replay.length if replay.length else 0.0
+				self.update(
+					self.game_patterns(replay, scored.subjects[k], components[k, :, 2]), quality
+				)
+			consumed += len(batch)
+		return consumed
+
+	# --- reporting ---
+
+	@property
+	def mean_quality(self) -> float:
+		return self.quality_sum / self.games if self.games else float('nan')
+
+	@property
+	def std_quality(self) -> float:
+		if self.games < 2:
+			return float('nan')
+		variance = (self.quality_sq - self.quality_sum**2 / self.games) / (self.games - 1)
+		return math.sqrt(max(variance, 0.0))
+
+	def describe(self, key: tuple) -> str:
+		family, *tokens = key
+		if family == FRESH:
+			runs, fresh = tokens
+			pauses = f'{runs}+ pauses' if runs >= 3 else f'{runs} pause{"s" if runs > 1 else ""}'
+			after = 'repeat' if fresh == REPEAT_TOKEN else f'{fresh} fresh'
+			return f'{pauses} -> {after}'
+		if family == SPEAKER:
+			return ' > '.join('pause' if t == PAUSE_TOKEN else self.classes[t] for t in tokens)
+		return ' > '.join(
+			f'{(t & 0xFFFF) - 1}+{(t >> 16) - 1}' if t >> 16 else str(t - 1) for t in tokens
+		)
+
+	def patterns(self, family: int, min_support: int = 30) -> list[Pattern]:
+		"""Tracked patterns of ``family`` seen in at least ``min_support`` games."""
+		mean, std = self.mean_quality, self.std_quality
+		found = []
+		for key, entry in self.hitters[family].entries.items():
+			if entry.games < min_support:
+				continue
+			lift = entry.mean_quality - mean
+			z = lift / (std / math.sqrt(entry.games)) if std > 0 else 0.0
+			found.append(
+				Pattern(
+					FAMILIES[family],
+					self.describe(key),
+					entry.estimate,
+					entry.games,
+					entry.mean_quality,
+					lift,
+					z,
+				)
+			)
+		return found
+
+	def report(self, top: int = 10, min_support: int = 30) -> None:
+		print(
+			f'{self.games} games, mean quality {self.mean_quality:.4f} '
+			f'(sd {self.std_quality:.4f}), sketch {self.sketch.depth}x{self.sketch.width}'
+		)
+		for family, name in FAMILIES.items():
+			found = self.patterns(family, min_support)
+			sections = (
+				('most frequent', sorted(found, key=lambda p: -p.estimate)),
+				('higher quality', sorted((p for p in found if p.z > 0), key=lambda p: -p.z)),
+				('lower quality', sorted((p for p in found if p.z < 0), key=lambda p: p.z)),
+			)
+			for title, patterns in sections:
+				print(f'\n=== {name.upper()}: {title} ===')
+				print(
+					f'{"pattern":<32} {"count~":>10} {"games":>8} {"quality":>9} {"lift":>8} {"z":>7}'
+				)
+				for p in patterns[:top]:
+					print(
+						f'{p.text:<32} {p.estimate:>10} {p.games:>8} {p.mean_quality:>9.4f} '
+						f'{p.lift:>+8.4f} {p.z:>+7.2f}'
+					)
+
+
+def _chunks(replays: Iterable[Replay], size: int) -> Iterator[list[Replay]]:
+	batch = []
+	for replay in replays:
+		batch.append(replay)
+		if len(batch) == size:
+			yield batch
+			batch = []
+	if batch:
+		yield batch
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Mine recurring patterns from replay archives.')
+	parser.add_argument('--replays', nargs='+', required=True, help='Replay archives (.cvr).')
+	parser.add_argument('--ngram', nargs='+', type=int, default=[2, 3], help='n-gram sizes.')
+	parser.add_argument('--top', type=int, default=500, help='Heavy hitters kept per family.')
+	parser.add_argument('--width', type=int, default=1 << 16, help='Count-min sketch width.')
+	parser.add_argument('--depth', type=int, default=4, help='Count-min sketch depth.')
+	parser.add_argument('--report', type=int, default=10, help='Patterns shown per section.')
+	parser.add_argument('--min-support', type=int, default=30, help='Minimum games per pattern.')
+	parser.add_argument('--chunk', type=int, default=512, help='Games scored per batch.')
+	args = parser.parse_args()
+
+	miner = PatternMiner(args.ngram, args.top, args.width, args.depth)
+	replays = (replay for path in args.replays for replay in ReplayReader(path))
+	miner.consume(replays, args.chunk)
+	miner.report(args.report, args.min_support)
+
+
+if __name__ == '__main__':
+	main()
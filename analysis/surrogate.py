@@ -0,0 +1,245 @@
+"""
+Surrogate model of conversation quality over the game parameters (P, L, B, S).
+
+Tournament results are accumulated in a JSON-lines file. A bootstrap ensemble of ridge
+regressions on degree-2 polynomial features of the log-parameters is fitted to them, which
+answers what-if queries in well under a millisecond and gives an uncertainty estimate.
+``sweep`` turns a parameter grid into an active-learning loop: each round it simulates only
+the grid points the ensemble disagrees on most.
+
+Usage:
+	python -m analysis.surrogate sweep --lineup p1 pr --P 2 5 10 --L 10 50 100 --rounds 4
+	python -m analysis.surrogate query --lineup p1 pr --P 6 --L 75 --B 10 --S 20
+"""
+
+import argparse
+import itertools
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from tournament.registry import PLAYER_TYPES
+from tournament.runner import GameResult, GameSpec, run_games
+
+PARAMS = ('P', 'L', 'B', 'S')
+DEFAULT_RESULTS = 'surrogate_results.jsonl'
+
+
+@dataclass(frozen=True)
+class GridPoint:
+	P: int
+	L: int
+	B: int
+	S: int
+
+	def as_row(self) -> tuple[int, int, int, int]:
+		return (self.P, self.L, self.B, self.S)
+
+
+def lineup_roster(lineup: tuple[str, ...], players: int) -> tuple[str, ...]:
+	"""Fills ``players`` slots by cycling through the lineup's player codes."""
+	return tuple(lineup[i % len(lineup)] for i in range(players))
+
+
+def lineup_key(lineup: tuple[str, ...]) -> str:
+	return ','.join(lineup)
+
+
+class PolynomialSurrogate:
+	"""Bootstrap ensemble of ridge regressions on quadratic features of log(P, L, B, S)."""
+
+	def __init__(self, ensemble: int = 32, ridge: float = 1e-2, seed: int = 0) -> None:
+		self.ensemble = ensemble
+		self.ridge = ridge
+		self.rng = np.random.default_rng(seed)
+		self._pairs = list(itertools.combinations_with_replacement(range(len(PARAMS)), 2))
+		self._center: np.ndarray | None = None
+		self._scale: np.ndarray | None = None
+		self._coefs: np.ndarray | None = None
+
+	def _features(self, X: np.ndarray) -> np.ndarray:
+		Z = (np.log(np.asarray(X, dtype=float)) - self._center) / self._scale
+		quadratic = np.stack([Z[:, i] * Z[:, j] for i, j in self._pairs], axis=1)
+		return np.hstack([np.ones((len(Z), 1)), Z, quadratic])
+
+	def fit(self, X: np.ndarray, y: np.ndarray) -> 'PolynomialSurrogate':
+		logs = np.log(np.asarray(X, dtype=float))
+		self._center = logs.mean(axis=0)
+		# Constant columns (a parameter that never varied) must not blow up the scaling
+		self._scale = np.where(logs.std(axis=0) > 0, logs.std(axis=0), 1.0)
+
+		F = self._features(X)
+		y = np.asarray(y, dtype=float)
+		penalty = self.ridge * np.eye(F.shape[1])
+		penalty[0, 0] = 0.0
+
+		coefs = []
+		for _ in range(self.ensemble):
+			idx = self.rng.integers(0, len(y), size=len(y))
+			Fb, yb = F[idx], y[idx]
+			coefs.append(np.linalg.solve(Fb.T @ Fb + penalty, Fb.T @ yb))
+
+		self._coefs = np.stack(coefs, axis=1)
+		return self
+
+	def predict(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		"""Returns the ensemble mean and standard deviation for each row of ``X``."""
+		if self._coefs is None:
+			raise RuntimeError('Surrogate has not been fitted.')
+
+		predictions = self._features(np.atleast_2d(X)) @ self._coefs
+		return predictions.mean(axis=1), predictions.std(axis=1)
+
+	def suggest(self, candidates: list[GridPoint], k: int) -> list[GridPoint]:
+		"""The ``k`` candidates with the highest predictive uncertainty."""
+		if not candidates:
+			return []
+
+		_, std = self.predict(np.array([c.as_row() for c in candidates]))
+		order = np.argsort(-std, kind='stable')[:k]
+		return [candidates[i] for i in order]
+
+
+def load_records(path: str | Path, lineup: tuple[str, ...] | None = None) -> list[dict]:
+	path = Path(path)
+	if not path.exists():
+		return []
+
+	with path.open() as f:
+		records = [json.loads(line) for line in f if line.strip()]
+
+	if lineup is not None:
+		records = [r for r in records if r['lineup'] == lineup_key(lineup)]
+
+	return records
+
+
+def append_records(path: str | Path, lineup: tuple[str, ...], results: list[GameResult]) -> None:
+	with Path(path).open('a') as f:
+		for result in results:
+			spec = result.spec
+			record = {
+				'lineup': lineup_key(lineup),
+				'P': len(spec.roster),
+				'L': spec.length,
+				'B': spec.memory_size,
+				'S': spec.subjects,
+				'seed': spec.seed,
+				'quality': result.quality,
+				'mean_total': sum(result.totals) / len(result.totals) if result.totals else 0.0,
+			}
+			f.write(json.dumps(record) + '\n')
+
+
+def fit_records(records: list[dict], target: str = 'quality') -> PolynomialSurrogate:
+	X = np.array([[r[p] for p in PARAMS] for r in records])
+	y = np.array([r[target] for r in records])
+	return PolynomialSurrogate().fit(X, y)
+
+
+def simulate_points(
+	lineup: tuple[str, ...],
+	points: list[GridPoint],
+	seeds: int,
+	seed_offset: int,
+	workers: int | None,
+) -> list[GameResult]:
+	specs = [
+		GameSpec(
+			roster=lineup_roster(lineup, point.P),
+			subjects=point.S,
+			memory_size=point.B,
+			length=point.L,
+			seed=seed_offset + s,
+		)
+		for point in points
+		for s in range(seeds)
+	]
+	return run_games(specs, workers=workers)
+
+
+def sweep(args) -> None:
+	lineup = tuple(args.lineup)
+	grid = [GridPoint(*row) for row in itertools.product(args.P, args.L, args.B, args.S)]
+
+	for round_number in range(args.rounds):
+		records = load_records(args.results, lineup)
+		seen = {(r['P'], r['L'], r['B'], r['S']) for r in records}
+		unseen = [point for point in grid if point.as_row() not in seen]
+		if not unseen:
+			print('Every grid point has been simulated.')
+			break
+
+		# Until there is enough data for the quadratic model, spread points over the grid
+		n_features = 1 + len(PARAMS) + len(PARAMS) * (len(PARAMS) + 1) // 2
+		if len({(r['P'], r['L'], r['B'], r['S']) for r in records}) < n_features:
+			step = max(1, len(unseen) // args.batch)
+			batch = unseen[::step][: args.batch]
+		else:
+			batch = fit_records(records, args.target).suggest(unseen, args.batch)
+
+		results = simulate_points(
+			lineup, batch, args.seeds, seed_offset=len(records), workers=args.workers
+		)
+		append_records(args.results, lineup, results)
+		print(
+			f'Round {round_number + 1}: simulated {len(batch)} points '
+			f'({len(results)} games), {len(unseen) - len(batch)} grid points left unsimulated'
+		)
+
+	records = load_records(args.results, lineup)
+	if records:
+		model = fit_records(records, args.target)
+		X = np.array([point.as_row() for point in grid])
+		mean, std = model.predict(X)
+		best = int(np.argmax(mean))
+		print(f'Predicted best grid point: {grid[best]} -> {mean[best]:.4f} ± {std[best]:.4f}')
+
+
+def query(args) -> None:
+	lineup = tuple(args.lineup)
+	records = load_records(args.results, lineup)
+	if not records:
+		raise SystemExit(f'No results for lineup {lineup_key(lineup)} in {args.results}')
+
+	model = fit_records(records, args.target)
+	points = [GridPoint(*row) for row in itertools.product(args.P, args.L, args.B, args.S)]
+	mean, std = model.predict(np.array([p.as_row() for p in points]))
+
+	print(f'{"P":>4} {"L":>6} {"B":>4} {"S":>4} {args.target:>12} {"± std":>8}')
+	for point, m, s in zip(points, mean, std, strict=True):
+		print(f'{point.P:>4} {point.L:>6} {point.B:>4} {point.S:>4} {m:>12.4f} {s:>8.4f}')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Surrogate model of score vs. game parameters.')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	for name, defaults in (
+		('sweep', {'P': [2, 5, 10], 'L': [10, 50, 100], 'B': [5, 10, 20], 'S': [10, 20, 40]}),
+		('query', {'P': [10], 'L': [50], 'B': [10], 'S': [20]}),
+	):
+		sub = subparsers.add_parser(name)
+		sub.add_argument('--lineup', nargs='+', required=True, choices=sorted(PLAYER_TYPES))
+		sub.add_argument('--results', default=DEFAULT_RESULTS, help='JSON-lines results file.')
+		sub.add_argument('--target', default='quality', choices=['quality', 'mean_total'])
+		for param in PARAMS:
+			sub.add_argument(f'--{param}', nargs='+', type=int, default=defaults[param])
+
+	sweep_parser = subparsers.choices['sweep']
+	sweep_parser.add_argument('--rounds', type=int, default=4, help='Active-learning rounds.')
+	sweep_parser.add_argument('--batch', type=int, default=8, help='Grid points per round.')
+	sweep_parser.add_argument('--seeds', type=int, default=4, help='Games per grid point.')
+	sweep_parser.add_argument('--workers', type=int, help='Worker processes.')
+
+	args = parser.parse_args()
+	if args.command == 'sweep':
+		sweep(args)
+	else:
+		query(args)
+
+
+if __name__ == '__main__':
+	main()
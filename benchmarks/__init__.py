@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the engine and the registered players.
+
+Run them with:
+  python -m benchmarks.run ...
+"""
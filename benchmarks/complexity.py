@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+
+
+def fit_power_law(
+	rows: list[dict[str, float]], target: str, params: tuple[str, ...]
+) -> tuple[float, dict[str, float]]:
+	"""
+	Least-squares fit of ``target ≈ c · Π param^exponent`` in log space. Parameters that
+	never vary across ``rows`` carry no information and are left out of the result.
+	Returns ``(log c, {param: exponent})``.
+	"""
+	varying = [p for p in params if len({row[p] for row in rows}) > 1]
+	y = np.log([max(row[target], 1e-12) for row in rows])
+	X = np.column_stack(
+		[np.ones(len(rows))] + [np.log([max(row[p], 1e-12) for row in rows]) for p in varying]
+	)
+	coefs, *_ = np.linalg.lstsq(X, y, rcond=None)
+	return float(coefs[0]), {p: float(c) for p, c in zip(varying, coefs[1:], strict=True)}
+
+
+def predict(log_c: float, exponents: dict[str, float], point: dict[str, float]) -> float:
+	return math.exp(log_c + sum(e * math.log(point[p]) for p, e in exponents.items()))
+
+
+def big_o(exponent: float, symbol: str) -> str:
+	"""Human-readable complexity class, rounding the exponent to the nearest half."""
+	rounded = round(exponent * 2) / 2
+	if rounded <= 0.25:
+		return 'O(1)'
+	if rounded == 1:
+		return f'O({symbol})'
+	return f'O({symbol}^{rounded:g})'
@@ -0,0 +1,267 @@
+"""
+Benchmark CLI: engine throughput, ``final_scores`` cost and per-player ``propose_item``
+latency over a grid of L, P, B and S.
+
+Per-call player latency is fitted to a power law in each varying parameter. A per-call
+exponent of about 1 in L means a whole game costs O(L²), which is what rules a player
+out of very long tournaments, so the report also projects the cost of one game at
+``--project-length`` turns.
+
+Every run is compared against the stored baseline (if any), and slowdowns beyond
+``--tolerance`` are reported as regressions. ``--save-baseline`` overwrites it.
+
+``--reference`` also plays each player in a homogeneous lineup against the oracle player
+(``po``, which sees every memory bank) on the same seeds, and reports each player's
+shared score as a share of the oracle's.
+
+Usage:
+	python -m benchmarks.run --players p1 p9 --lengths 25 100 400
+	python -m benchmarks.run --save-baseline
+	python -m benchmarks.run --skip-engine --skip-latency --players p1 p9 --reference
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmarks.complexity import big_o, fit_power_law, predict
+from benchmarks.timing import PlayerTiming, time_engine, time_player
+from tournament.registry import PLAYER_TYPES
+from tournament.runner import GameSpec, run_games
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+GRID_PARAMS = ('turns', 'players', 'memory_size', 'subjects')
+PARAM_SYMBOLS = {'turns': 'L', 'players': 'P', 'memory_size': 'B', 'subjects': 'S'}
+REFERENCE = 'po'
+# The oracle searches for a fixed time per call, so its latency says nothing
+TIMED_PLAYERS = [code for code in PLAYER_TYPES if code != REFERENCE]
+
+
+def run_engine_benchmarks(lengths: list[int], repeats: int) -> tuple[list, dict[str, float]]:
+	timings = []
+	metrics = {}
+	for length in lengths:
+		runs = [time_engine(length, seed=seed) for seed in range(repeats)]
+		best = max(runs, key=lambda t: t.turns_per_sec)
+		timings.append(best)
+		metrics[f'engine.L={length}.us_per_turn'] = 1e6 / best.turns_per_sec
+		metrics[f'final_scores.L={length}.ms'] = min(t.final_scores_ms for t in runs)
+	return timings, metrics
+
+
+def run_player_benchmarks(
+	codes: list[str],
+	lengths: list[int],
+	player_counts: list[int],
+	memory_sizes: list[int],
+	subjects: list[int],
+) -> tuple[dict[str, list[PlayerTiming]], dict[str, float]]:
+	timings: dict[str, list[PlayerTiming]] = {}
+	metrics = {}
+	grid = list(itertools.product(player_counts, lengths, memory_sizes, subjects))
+
+	for code in codes:
+		timings[code] = []
+		for P, L, B, S in grid:
+			timing = time_player(code, players=P, length=L, memory_size=B, subjects=S)
+			timings[code].append(timing)
+			metrics[f'player.{code}.P={P}.L={L}.B={B}.S={S}.mean_us'] = timing.mean_us
+	return timings, metrics
+
+
+def print_engine_report(timings) -> None:
+	print('\n=== ENGINE ===')
+	print(f'{"L":>7} {"turns":>7} {"turns/sec":>12} {"final_scores ms":>16}')
+	for t in timings:
+		print(f'{t.length:>7} {t.turns:>7} {t.turns_per_sec:>12.0f} {t.final_scores_ms:>16.3f}')
+
+	if len(timings) > 1:
+		rows = [
+			{'L': t.turns, 'us_per_turn': 1e6 / t.turns_per_sec, 'fs': t.final_scores_ms}
+			for t in timings
+		]
+		_, turn_exp = fit_power_law(rows, 'us_per_turn', ('L',))
+		_, fs_exp = fit_power_law(rows, 'fs', ('L',))
+		if turn_exp and fs_exp:
+			print(
+				f'Per-turn cost ~ {big_o(turn_exp["L"], "L")} (exponent {turn_exp["L"]:.2f}), '
+				f'final_scores ~ {big_o(fs_exp["L"], "L")} (exponent {fs_exp["L"]:.2f})'
+			)
+
+
+def print_player_report(
+	timings: dict[str, list[PlayerTiming]],
+	project: dict[str, float],
+	budget: float,
+) -> None:
+	print('\n=== PLAYER propose_item LATENCY ===')
+	header = (
+		f'{"Player":<7} {"mean µs":>10} {"max µs":>10} '
+		+ ' '.join(f'{"exp " + PARAM_SYMBOLS[p]:>6}' for p in GRID_PARAMS)
+		+ f' {"game cost":>12} {"10k-turn s":>11}  verdict'
+	)
+	print(header)
+	print('-' * len(header))
+
+	for code, runs in timings.items():
+		rows = [asdict(t) for t in runs if t.calls]
+		if not rows:
+			continue
+
+		log_c, exponents = fit_power_law(rows, 'mean_us', GRID_PARAMS)
+		# Per-call latency times the number of calls (P per turn, L turns)
+		per_call_us = predict(log_c, exponents, project)
+		projected_s = per_call_us * project['players'] * project['turns'] / 1e6
+		game_exponent = exponents.get('turns', 0.0) + 1
+
+		flags = []
+		if game_exponent >= 1.75:
+			flags.append(f'superlinear in L ({big_o(game_exponent, "L")})')
+		if projected_s > budget:
+			flags.append(f'over {budget:g}s budget')
+		verdict = '; '.join(flags) if flags else 'ok'
+
+		mean = sum(r['mean_us'] for r in rows) / len(rows)
+		worst = max(r['max_us'] for r in rows)
+		exps = ' '.join(
+			f'{exponents[p]:>6.2f}' if p in exponents else f'{"-":>6}' for p in GRID_PARAMS
+		)
+		print(
+			f'{code:<7} {mean:>10.1f} {worst:>10.1f} {exps} '
+			f'{big_o(game_exponent, "L"):>12} {projected_s:>11.2f}  {verdict}'
+		)
+
+
+def run_reference_benchmarks(
+	codes: list[str], games: int, players: int, length: int, memory_size: int, subjects: int
+) -> dict[str, float]:
+	"""Mean shared score of ``[code] * players`` for each code and the oracle, same seeds."""
+	lineups = [REFERENCE, *(code for code in codes if code != REFERENCE)]
+	specs = [
+		GameSpec((code,) * players, subjects, memory_size, length, seed)
+		for code in lineups
+		for seed in range(games)
+	]
+	results = run_games(specs)
+	return {
+		code: sum(r.shared for r in results[i * games : (i + 1) * games]) / games
+		for i, code in enumerate(lineups)
+	}
+
+
+def print_reference_report(shared: dict[str, float], players: int, length: int) -> None:
+	print(f'\n=== SHARED SCORE vs ORACLE (P={players}, L={length}) ===')
+	oracle = shared[REFERENCE]
+	print(f'{"Player":<7} {"shared":>9} {"% oracle":>9}')
+	for code, score in shared.items():
+		share = f'{score / oracle:>9.0%}' if oracle > 0 else f'{"-":>9}'
+		print(f'{code:<7} {score:>9.2f} {share}')
+
+
+def compare_to_baseline(metrics: dict[str, float], baseline_path: Path, tolerance: float) -> int:
+	if not baseline_path.exists():
+		print(f'\nNo baseline at {baseline_path}; run with --save-baseline to create one.')
+		return 0
+
+	baseline = json.loads(baseline_path.read_text())['metrics']
+	regressions = []
+	improvements = []
+	for name, value in metrics.items():
+		if name not in baseline or baseline[name] <= 0:
+			continue
+		ratio = value / baseline[name]
+		if ratio > 1 + tolerance:
+			regressions.append((name, baseline[name], value, ratio))
+		elif ratio < 1 - tolerance:
+			improvements.append((name, baseline[name], value, ratio))
+
+	print(f'\n=== BASELINE COMPARISON (tolerance ±{tolerance:.0%}) ===')
+	for label, entries in (('REGRESSION', regressions), ('improved', improvements)):
+		for name, old, new, ratio in sorted(entries, key=lambda e: -abs(e[3] - 1)):
+			print(f'{label:<10} {name:<55} {old:>12.2f} -> {new:>12.2f} ({ratio:.2f}x)')
+	if not regressions and not improvements:
+		print('All metrics within tolerance.')
+
+	return len(regressions)
+
+
+def save_baseline(metrics: dict[str, float], path: Path) -> None:
+	data = {
+		'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+		'python': platform.python_version(),
+		'machine': platform.machine(),
+		'metrics': metrics,
+	}
+	path.write_text(json.dumps(data, indent=2, sort_keys=True))
+	print(f'\nBaseline saved to {path}')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Engine and player performance benchmarks.')
+	parser.add_argument('--players', nargs='+', default=TIMED_PLAYERS, choices=list(PLAYER_TYPES))
+	parser.add_argument('--lengths', nargs='+', type=int, default=[25, 100, 400])
+	parser.add_argument('--player-counts', nargs='+', type=int, default=[2, 8])
+	parser.add_argument('--memory-sizes', nargs='+', type=int, default=[10, 30])
+	parser.add_argument('--subjects', nargs='+', type=int, default=[20])
+	parser.add_argument('--engine-lengths', nargs='+', type=int, default=[100, 1000, 5000])
+	parser.add_argument('--repeats', type=int, default=3, help='Engine runs per length.')
+	parser.add_argument('--project-length', type=int, default=10_000)
+	parser.add_argument('--project-players', type=int, default=10)
+	parser.add_argument('--project-memory', type=int, default=10)
+	parser.add_argument('--budget', type=float, default=60.0, help='Seconds per projected game.')
+	parser.add_argument('--skip-engine', action='store_true')
+	parser.add_argument('--skip-latency', action='store_true')
+	parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+	parser.add_argument('--save-baseline', action='store_true')
+	parser.add_argument('--tolerance', type=float, default=0.25)
+	parser.add_argument('--reference', action='store_true', help='Compare with the oracle.')
+	parser.add_argument('--reference-games', type=int, default=20)
+	parser.add_argument('--reference-players', type=int, default=5)
+	parser.add_argument('--reference-length', type=int, default=10)
+	args = parser.parse_args()
+
+	metrics: dict[str, float] = {}
+
+	if not args.skip_engine:
+		engine_timings, engine_metrics = run_engine_benchmarks(args.engine_lengths, args.repeats)
+		metrics.update(engine_metrics)
+		print_engine_report(engine_timings)
+
+	if args.players and not args.skip_latency:
+		player_timings, player_metrics = run_player_benchmarks(
+			args.players, args.lengths, args.player_counts, args.memory_sizes, args.subjects
+		)
+		metrics.update(player_metrics)
+		project = {
+			'turns': args.project_length,
+			'players': args.project_players,
+			'memory_size': args.project_memory,
+			'subjects': args.subjects[0],
+		}
+		print_player_report(player_timings, project, args.budget)
+
+	if args.reference:
+		shared = run_reference_benchmarks(
+			args.players,
+			args.reference_games,
+			args.reference_players,
+			args.reference_length,
+			args.project_memory,
+			args.subjects[0],
+		)
+		print_reference_report(shared, args.reference_players, args.reference_length)
+
+	if args.save_baseline:
+		save_baseline(metrics, args.baseline)
+	else:
+		regressions = compare_to_baseline(metrics, args.baseline, args.tolerance)
+		if regressions:
+			raise SystemExit(1)
+
+
+if __name__ == '__main__':
+	main()
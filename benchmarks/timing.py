@@ -0,0 +1,119 @@
+import contextlib
+import io
+import random
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.engine import Engine
+from players.oracle_player import bind_oracles
+from players.random_player import RandomPlayer
+from tournament.registry import PLAYER_TYPES
+
+
+@dataclass(frozen=True)
+class EngineTiming:
+	length: int
+	players: int
+	turns: int
+	turns_per_sec: float
+	final_scores_ms: float
+
+
+@dataclass(frozen=True)
+class PlayerTiming:
+	code: str
+	players: int
+	length: int
+	memory_size: int
+	subjects: int
+	turns: int
+	calls: int
+	mean_us: float
+	p95_us: float
+	max_us: float
+
+
+def _seed(seed: int) -> None:
+	random.seed(seed)
+	np.random.seed(seed)
+
+
+def time_engine(
+	length: int, players: int = 10, memory_size: int = 10, seed: int = 0
+) -> EngineTiming:
+	"""
+	Headless turns/sec of the engine itself (``Engine.play``, no observers), driven by
+	``RandomPlayer`` (which never pauses and costs one ``random.choice`` per proposal), plus
+	the cost of ``final_scores`` on the result.
+	"""
+	_seed(seed)
+	engine = Engine(
+		players=[RandomPlayer] * players,
+		player_count=players,
+		subjects=20,
+		memory_size=max(memory_size, 1),
+		conversation_length=length,
+	)
+
+	start = time.perf_counter()
+	engine.play()
+	elapsed = time.perf_counter() - start
+
+	start = time.perf_counter()
+	engine.final_scores()
+	final_scores_ms = (time.perf_counter() - start) * 1e3
+
+	return EngineTiming(
+		length=length,
+		players=players,
+		turns=engine.turn,
+		turns_per_sec=engine.turn / elapsed if elapsed > 0 else float('inf'),
+		final_scores_ms=final_scores_ms,
+	)
+
+
+def time_player(
+	code: str, players: int, length: int, memory_size: int, subjects: int, seed: int = 0
+) -> PlayerTiming:
+	"""Latency of every ``propose_item`` call in a game where all ``players`` slots run ``code``."""
+	_seed(seed)
+	engine = Engine(
+		players=[PLAYER_TYPES[code]] * players,
+		player_count=players,
+		subjects=subjects,
+		memory_size=memory_size,
+		conversation_length=length,
+	)
+	bind_oracles(engine)
+
+	latencies: list[float] = []
+	for player in engine.players:
+		propose = player.propose_item
+
+		def timed(history, _propose=propose):
+			start = time.perf_counter()
+			item = _propose(history)
+			latencies.append(time.perf_counter() - start)
+			return item
+
+		player.propose_item = timed
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		while engine.step() is not None:
+			pass
+
+	samples = np.array(latencies) * 1e6 if latencies else np.zeros(1)
+	return PlayerTiming(
+		code=code,
+		players=players,
+		length=length,
+		memory_size=memory_size,
+		subjects=subjects,
+		turns=engine.turn,
+		calls=len(latencies),
+		mean_us=float(samples.mean()),
+		p95_us=float(np.percentile(samples, 95)),
+		max_us=float(samples.max()),
+	)
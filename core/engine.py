@@ -1,13 +1,48 @@
 import random
 import uuid
-from collections import Counter
-from dataclasses import asdict
 
-from models.item import Item
-from models.player import GameContext, Player, PlayerSnapshot
+from models.item import Item, common_mask, union_mask
+from models.player import GameContext, Player, PlayerSnapshot, prepare
+
+EVENTS = ('on_proposals', 'on_turn', 'on_game_end')
+
+
+def _snapshot_dict(snapshot: PlayerSnapshot) -> dict:
+	"""
+	A snapshot in ``final_scores``' output format. Items only show their public fields, not
+	the engine-internal ``handle`` and ``subject_mask``.
+	"""
+	return {
+		'id': snapshot.id,
+		'preferences': snapshot.preferences,
+		'memory_bank': tuple(
+			{
+				'id': item.id,
+				'player_id': item.player_id,
+				'importance': item.importance,
+				'subjects': item.subjects,
+			}
+			for item in snapshot.memory_bank
+		),
+	}
 
 
 class Engine:
+	"""
+	Runs a conversation game. Observers can follow it through ``subscribe``: any object
+	defining some of these methods receives the matching events, and the engine only builds
+	the payloads somebody listens to.
+
+	- ``on_proposals(engine, turn, proposals, speaker_id, item)``: after the speaker of a
+	turn is selected, with the accepted proposals by player id.
+	- ``on_turn(engine, turn_info)``: the dict that ``step`` returns, with ``score_impact``.
+	- ``on_game_end(engine)``: once, when the conversation is over.
+
+	``seats`` (ascending) plays only some of the ``player_count`` players dealt: everyone is
+	dealt from the random stream as usual, and the others sit out. A seat therefore gets
+	the same preferences and memory bank whichever other seats play.
+	"""
+
 	def __init__(
 		self,
 		players: list[type[Player]],
@@ -15,37 +50,110 @@ class Engine:
 		subjects: int,
 		memory_size: int,
 		conversation_length: int,
+		seats: tuple[int, ...] | None = None,
 	) -> None:
+		seats = tuple(range(player_count)) if seats is None else tuple(seats)
 		self.subjects = [i for i in range(subjects)]
 		self.memory_size = memory_size
 		self.conversation_length = conversation_length
-		self.players_count = player_count
+		self.players_count = len(seats)
 
 		self.history: list[Item | None] = []
 		self.last_player_id: uuid.UUID | None = None
 		self.turn = 0
 		self.consecutive_pauses = 0
 		self.player_contributions: dict[uuid.UUID, list[Item]] = {}
-		self.snapshots = self.__initialize_snapshots(player_count)
+		self.observers: dict[str, list] = {event: [] for event in EVENTS}
+		self.ended = False
+		self.snapshots = self.__initialize_snapshots(player_count, seats)
+		# Every item of the game, indexed by Item.handle
+		self.items: tuple[Item, ...] = tuple(
+			item for snapshot in self.snapshots.values() for item in snapshot.memory_bank
+		)
+		ctx = GameContext(conversation_length=conversation_length, number_of_players=len(seats))
+		for player in players:
+			if isinstance(player, type):
+				prepare(player, ctx)
 		self.players = [
-			player(
-				snapshot=self.snapshots[id],
-				ctx=GameContext(
-					conversation_length=conversation_length, number_of_players=player_count
-				),
-			)
+			player(snapshot=self.snapshots[id], ctx=ctx)
 			for id, player in zip(list(self.snapshots.keys()), players, strict=True)
 		]
 
 		self.player_names = {player.id: player.name for player in self.players}
 
-	def __initialize_snapshots(self, player_count) -> dict[uuid.UUID, PlayerSnapshot]:
+	@classmethod
+	def from_history(
+		cls,
+		snapshots: dict[uuid.UUID, PlayerSnapshot],
+		player_names: dict[uuid.UUID, str],
+		subjects: int,
+		memory_size: int,
+		conversation_length: int,
+		history: list[Item | None],
+	) -> 'Engine':
+		"""
+		Rebuilds the engine state reached after ``history`` without instantiating players,
+		e.g. to score a stored game. The returned engine can be scored but not stepped.
+		"""
+		engine = cls.__new__(cls)
+		engine.subjects = [i for i in range(subjects)]
+		engine.memory_size = memory_size
+		engine.conversation_length = conversation_length
+		engine.players_count = len(snapshots)
+		engine.snapshots = dict(snapshots)
+		engine.items = tuple(
+			item for snapshot in snapshots.values() for item in snapshot.memory_bank
+		)
+		engine.players = []
+		engine.player_names = dict(player_names)
+		engine.player_contributions = {uid: [] for uid in snapshots}
+		engine.observers = {event: [] for event in EVENTS}
+		engine.ended = False
+
+		engine.history = []
+		engine.last_player_id = None
+		engine.turn = 0
+		engine.consecutive_pauses = 0
+		for item in history:
+			engine.history.append(item)
+			engine.turn += 1
+			if item is None:
+				engine.last_player_id = None
+				engine.consecutive_pauses += 1
+			else:
+				engine.last_player_id = item.player_id
+				engine.consecutive_pauses = 0
+				engine.player_contributions[item.player_id].append(item)
+
+		return engine
+
+	def subscribe(self, observer) -> None:
+		"""Registers ``observer`` for every event it has a method for."""
+		for event in EVENTS:
+			handler = getattr(observer, event, None)
+			if callable(handler):
+				self.observers[event].append(handler)
+
+	def unsubscribe(self, observer) -> None:
+		for event in EVENTS:
+			handler = getattr(observer, event, None)
+			if handler in self.observers[event]:
+				self.observers[event].remove(handler)
+
+	def __initialize_snapshots(
+		self, player_count, seats: tuple[int, ...]
+	) -> dict[uuid.UUID, PlayerSnapshot]:
 		snapshots = {}
+		seated = set(seats)
 
-		for _ in range(player_count):
+		for p in range(player_count):
 			id = uuid.uuid4()
 			preferences = self.__generate_preference()
-			memory_bank = self.__generate_items(player_id=id)
+			# Handles index the seated players' items only
+			first_handle = len(snapshots) * self.memory_size
+			memory_bank = self.__generate_items(player_id=id, first_handle=first_handle)
+			if p not in seated:
+				continue
 
 			snapshot = PlayerSnapshot(id=id, preferences=preferences, memory_bank=memory_bank)
 
@@ -57,17 +165,21 @@ class Engine:
 	def __generate_preference(self) -> tuple[int]:
 		return tuple(random.sample(self.subjects, len(self.subjects)))
 
-	def __generate_items(self, player_id: uuid.UUID) -> tuple[Item, ...]:
+	def __generate_items(self, player_id: uuid.UUID, first_handle: int) -> tuple[Item, ...]:
 		items: list[Item] = []
 
-		for _ in range(self.memory_size):
+		for handle in range(first_handle, first_handle + self.memory_size):
 			samples = 1 if random.random() < 0.5 else 2
 
 			importance = round(random.random(), 2)
 			subjects = tuple(random.sample(self.subjects, samples))
 
 			item = Item(
-				id=uuid.uuid4(), player_id=player_id, importance=importance, subjects=subjects
+				id=uuid.uuid4(),
+				player_id=player_id,
+				importance=importance,
+				subjects=subjects,
+				handle=handle,
 			)
 			items.append(item)
 
@@ -115,33 +227,34 @@ class Engine:
 		if i == 0 or self.history[i - 1] is not None:
 			return 0.0
 
-		prior_items = (item for item in self.history[max(0, i - 6) : i - 1] if item is not None)
-		prior_subjects = {s for item in prior_items for s in item.subjects}
-
-		novel_subjects = [s for s in current_item.subjects if s not in prior_subjects]
+		prior_subjects = union_mask(self.history[max(0, i - 6) : i - 1])
+		novel_subjects = current_item.subject_mask & ~prior_subjects
 
-		return float(len(novel_subjects))
+		return float(novel_subjects.bit_count())
 
 	def __calculate_coherence_score(self, i: int, current_item: Item) -> float:
-		context_items = []
+		# Subjects seen at least once and at least twice in the window around i
+		once = twice = 0
 
 		for j in range(i - 1, max(-1, i - 4), -1):
 			if self.history[j] is None:
 				break
-			context_items.append(self.history[j])
+			twice |= once & self.history[j].subject_mask
+			once |= self.history[j].subject_mask
 
 		for j in range(i + 1, min(len(self.history), i + 4)):
 			if self.history[j] is None:
 				break
-			context_items.append(self.history[j])
+			twice |= once & self.history[j].subject_mask
+			once |= self.history[j].subject_mask
 
-		context_subject_counts = Counter(s for item in context_items for s in item.subjects)
+		subjects = current_item.subject_mask
 		score = 0.0
 
-		if not all(subject in context_subject_counts for subject in current_item.subjects):
+		if subjects & ~once:
 			score -= 1.0
 
-		if all(context_subject_counts.get(s, 0) >= 2 for s in current_item.subjects):
+		if not subjects & ~twice:
 			score += 1.0
 
 		return score
@@ -155,14 +268,9 @@ class Engine:
 		if i < 3:
 			return 0.0
 
-		last_three_items = [self.history[j] for j in range(i - 3, i)]
-
-		if any(item is None for item in last_three_items):
-			return 0.0
-
-		for subject in current_item.subjects:
-			if all(subject in item.subjects for item in last_three_items):
-				return -1.0
+		# 0 when one of the last three turns is a pause
+		if current_item.subject_mask & common_mask(self.history[i - 3 : i]):
+			return -1.0
 
 		return 0.0
 
@@ -243,7 +351,7 @@ class Engine:
 				total_raw_score / self.conversation_length if self.conversation_length > 0 else 0
 			)
 
-			final_player_data = asdict(snapshot)
+			final_player_data = _snapshot_dict(snapshot)
 			final_player_data['name'] = self.player_names[snapshot.id]
 			final_player_data['scores'] = {
 				'total': conversation_quality,
@@ -315,7 +423,8 @@ class Engine:
 
 		return impact
 
-	def __turn(self):
+	def __turn(self, record: bool = True) -> dict | None:
+		"""Plays one turn. The turn dict is only built if ``record`` or for observers."""
 		proposals = self.__get_proposals()
 		speaker, item = self.__select_speaker(proposals)
 
@@ -330,32 +439,59 @@ class Engine:
 			self.consecutive_pauses += 1
 
 		self.turn += 1
-		score_impact = self._calculate_turn_score_impact(item)
-		return {
-			'turn': self.turn,
-			'speaker_id': speaker,
-			'speaker_name': self.player_names.get(speaker, ''),
-			'item': item,
-			'proposals': proposals,
-			'is_over': self.turn >= self.conversation_length or self.consecutive_pauses >= 3,
-			'score_impact': score_impact,
-		}
+		for handler in self.observers['on_proposals']:
+			handler(self, self.turn, proposals, speaker, item)
+
+		turn_info = None
+		if record or self.observers['on_turn']:
+			turn_info = {
+				'turn': self.turn,
+				'speaker_id': speaker,
+				'speaker_name': self.player_names.get(speaker, ''),
+				'item': item,
+				'proposals': proposals,
+				'is_over': self.is_over,
+				'score_impact': self._calculate_turn_score_impact(item),
+			}
+			for handler in self.observers['on_turn']:
+				handler(self, turn_info)
+
+		if self.is_over:
+			self.__end()
+		return turn_info
+
+	def __end(self) -> None:
+		if not self.ended:
+			self.ended = True
+			for handler in self.observers['on_game_end']:
+				handler(self)
+
+	@property
+	def is_over(self) -> bool:
+		return self.turn >= self.conversation_length or self.consecutive_pauses >= 3
 
 	def step(self) -> dict | None:
-		if self.turn >= self.conversation_length or self.consecutive_pauses >= 3:
+		if self.is_over:
 			return None
 
 		return self.__turn()
 
-	def run(self, players: list[type[Player]]):
-		turn_impact = []
+	def play(self) -> None:
+		"""Plays to the end, building per-turn payloads only for observers."""
+		while not self.is_over:
+			self.__turn(record=False)
 
-		while self.turn < self.conversation_length:
-			impact = self.__turn()
-			turn_impact.append(impact)
+	def run(self, players: list[type[Player]], record: bool = True):
+		"""
+		Plays to the end and returns the history, final scores and, if ``record``, the
+		per-turn dicts as ``turn_impact``.
+		"""
+		turn_impact = []
 
-			if self.consecutive_pauses >= 3:
-				break
+		while not self.is_over:
+			impact = self.__turn(record)
+			if record:
+				turn_impact.append(impact)
 
 		score_data = self.final_scores()
 
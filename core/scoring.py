@@ -0,0 +1,423 @@
+"""
+Vectorised scoring of stored conversation histories.
+
+``score_histories`` applies the engine's scoring rules to a padded batch of K histories at
+once. Window rules (coherence, freshness, nonmonotonousness) are evaluated with shifted
+array comparisons over the whole batch, and floating-point totals are accumulated in turn
+order so the results match ``Engine.final_scores`` exactly rather than approximately.
+
+``advance`` scores a game one turn at a time instead, for search code that explores many
+continuations of the same game. Its state is a small hashable tuple, see ``EMPTY_STATE``.
+
+``delta_scores`` is the players' entry point: the exact change in the shared score from
+appending each of a set of candidate items to the current history, in one pass.
+"""
+
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.item import Item
+from models.player import PlayerSnapshot
+
+NO_SUBJECT = -1
+PAUSE = -1
+
+# (last six turns, open items, used-item bitset, consecutive pauses); see ``advance``
+EMPTY_STATE: tuple = ((), (), 0, 0)
+
+
+@dataclass
+class HistoryBatch:
+	"""
+	K histories padded to a common length T. Pauses and padding are both marked in
+	``pause``; padding only ever follows the end of a history, where it behaves like a
+	pause for every rule.
+	"""
+
+	subjects: np.ndarray  # (K, T, 2) int, NO_SUBJECT where an item has one subject
+	importance: np.ndarray  # (K, T) float
+	pause: np.ndarray  # (K, T) bool, True for pauses and padding
+	item_id: np.ndarray  # (K, T) int, a per-game dense item id; -1 for pauses
+	ranks: np.ndarray | None = None  # (K, P, S) int, rank of subject s for player p
+	subject_count: np.ndarray | None = None  # (K,) int, |S| of each game; needed with ranks
+
+	@classmethod
+	def from_histories(
+		cls,
+		histories: list[list[Item | None]],
+		snapshots: list[list[PlayerSnapshot]] | None = None,
+	) -> 'HistoryBatch':
+		"""Pads ``histories``; ``snapshots`` (one list per game) enables individual scores."""
+		K = len(histories)
+		T = max((len(h) for h in histories), default=0)
+
+		subjects = np.full((K, T, 2), NO_SUBJECT, dtype=np.int32)
+		importance = np.zeros((K, T))
+		pause = np.ones((K, T), dtype=bool)
+		item_id = np.full((K, T), -1, dtype=np.int64)
+
+		for k, history in enumerate(histories):
+			ids: dict[uuid.UUID, int] = {}
+			for t, item in enumerate(history):
+				if item is None:
+					continue
+				pause[k, t] = False
+				importance[k, t] = item.importance
+				subjects[k, t, : len(item.subjects)] = item.subjects
+				item_id[k, t] = ids.setdefault(item.id, len(ids))
+
+		ranks = subject_count = None
+		if snapshots is not None:
+			subject_count = np.array(
+				[len(game[0].preferences) if game else 0 for game in snapshots], dtype=np.int64
+			)
+			S = int(subject_count.max(initial=0))
+			P = max((len(game) for game in snapshots), default=0)
+			# Padding players and subjects are never looked up for real items
+			ranks = np.zeros((K, P, S), dtype=np.int64)
+			for k, game in enumerate(snapshots):
+				for p, snapshot in enumerate(game):
+					ranks[k, p, list(snapshot.preferences)] = np.arange(len(snapshot.preferences))
+
+		return cls(subjects, importance, pause, item_id, ranks, subject_count)
+
+	@classmethod
+	def from_arrays(
+		cls,
+		speaker: np.ndarray,
+		item: np.ndarray,
+		bank_subjects: np.ndarray,
+		bank_importance: np.ndarray,
+		ranks: np.ndarray | None = None,
+		subject_count: np.ndarray | None = None,
+	) -> 'HistoryBatch':
+		"""
+		Builds a batch without touching ``Item`` objects, from per-turn speaker and item
+		indices (K, T), negative for pauses and padding, and per-game memory banks:
+		``bank_subjects`` (K, P, B, 2) and ``bank_importance`` (K, P, B).
+		"""
+		pause = speaker < 0
+		K, T = speaker.shape
+		B = bank_importance.shape[2]
+		games = np.arange(K)[:, None]
+		s, i = np.maximum(speaker, 0), np.maximum(item, 0)
+
+		subjects = np.where(pause[:, :, None], NO_SUBJECT, bank_subjects[games, s, i])
+		importance = np.where(pause, 0.0, bank_importance[games, s, i])
+		item_id = np.where(pause, -1, s * B + i)
+		return cls(subjects, importance, pause, item_id, ranks, subject_count)
+
+
+def _shift(a: np.ndarray, d: int, fill) -> np.ndarray:
+	"""``out[:, t] = a[:, t + d]`` along axis 1, with ``fill`` outside the array."""
+	out = np.full_like(a, fill)
+	T = a.shape[1]
+	if abs(d) >= T:
+		return out
+	if d > 0:
+		out[:, : T - d] = a[:, d:]
+	elif d < 0:
+		out[:, -d:] = a[:, : T + d]
+	else:
+		out[:] = a
+	return out
+
+
+def _contains(subjects: np.ndarray, other: np.ndarray) -> np.ndarray:
+	"""(K, T, 2) bool: whether each subject slot of ``subjects`` appears in ``other``'s item."""
+	present = subjects != NO_SUBJECT
+	return present & ((subjects == other[:, :, 0, None]) | (subjects == other[:, :, 1, None]))
+
+
+def turn_components(batch: HistoryBatch) -> np.ndarray:
+	"""
+	Each turn's final contribution to the shared score, as a (K, T, 4) array of importance,
+	coherence, freshness and nonmonotonousness.
+	"""
+	subjects, pause = batch.subjects, batch.pause
+	valid = ~pause
+	K, T = pause.shape
+	present = subjects != NO_SUBJECT
+
+	first = np.zeros((K, T), dtype=bool)
+	if valid.any():
+		flat = np.where(
+			valid, batch.item_id + np.arange(K)[:, None] * (batch.item_id.max() + 1), -1
+		)
+		_, index = np.unique(flat.ravel(), return_index=True)
+		first.ravel()[index] = True
+		first &= valid
+	repeated = valid & ~first
+
+	# Coherence: subject counts over up to 3 items each side, stopping at pauses
+	counts = np.zeros((K, T, 2), dtype=np.int32)
+	for direction in (-1, 1):
+		reach = np.ones((K, T), dtype=bool)
+		for step in range(1, 4):
+			d = direction * step
+			reach &= _shift(valid, d, False)
+			neighbour = _shift(subjects, d, NO_SUBJECT)
+			counts += reach[:, :, None] & _contains(subjects, neighbour)
+
+	missing = np.any(present & (counts == 0), axis=2)
+	covered = np.all(~present | (counts >= 2), axis=2)
+	coherence = np.where(first, covered.astype(float) - missing.astype(float), 0.0)
+
+	# Freshness: right after a pause, subjects absent from the 5 turns before the pause
+	seen = np.zeros((K, T, 2), dtype=bool)
+	for d in range(2, 7):
+		seen |= _contains(subjects, _shift(subjects, -d, NO_SUBJECT))
+	after_pause = np.zeros((K, T), dtype=bool)
+	after_pause[:, 1:] = pause[:, :-1] & valid[:, 1:]
+	novel = np.sum(present & ~seen, axis=2)
+	freshness = np.where(first & after_pause, novel, 0).astype(float)
+
+	# Nonmonotonousness: a subject present in each of the previous three items
+	repeated_subject = np.ones((K, T, 2), dtype=bool)
+	for d in (1, 2, 3):
+		repeated_subject &= _contains(subjects, _shift(subjects, -d, NO_SUBJECT))
+	monotonous = first & np.any(repeated_subject, axis=2)
+	nonmonotonousness = -(monotonous | repeated).astype(float)
+
+	importance = np.where(first, batch.importance, 0.0)
+	return np.stack([importance, coherence, freshness, nonmonotonousness], axis=2)
+
+
+def score_histories(batch: HistoryBatch) -> dict[str, np.ndarray]:
+	"""
+	Shared-score breakdown of every history in ``batch`` (arrays of shape (K,)), plus
+	``individual`` of shape (K, P) when the batch carries preference ranks.
+	"""
+	components = turn_components(batch)
+	# Cumulative sums add in turn order, exactly like the engine's running totals
+	totals = (
+		np.cumsum(components, axis=1)[:, -1, :]
+		if components.shape[1]
+		else np.zeros((components.shape[0], 4))
+	)
+	importance, coherence, freshness, nonmonotonousness = totals.T
+
+	scores = {
+		'shared': coherence + freshness + importance + nonmonotonousness,
+		'importance': importance,
+		'coherence': coherence,
+		'freshness': freshness,
+		'nonmonotonousness': nonmonotonousness,
+	}
+
+	if batch.ranks is not None:
+		scores['individual'] = individual_scores(batch)
+
+	return scores
+
+
+def individual_scores(batch: HistoryBatch) -> np.ndarray:
+	"""(K, P) individual scores: every player scores every item against their own ranking."""
+	K, T = batch.pause.shape
+	P = batch.ranks.shape[1]
+	S = np.maximum(batch.subject_count, 1)[:, None]
+	games = np.arange(K)[:, None]
+	players = np.arange(P)[None, :]
+
+	individual = np.zeros((K, P))
+	for t in range(T):
+		s0, s1 = batch.subjects[:, t, 0], batch.subjects[:, t, 1]
+		first = 1 - batch.ranks[games, players, np.maximum(s0, 0)[:, None]] / S
+		second = 1 - batch.ranks[games, players, np.maximum(s1, 0)[:, None]] / S
+		two = (s1 != NO_SUBJECT)[:, None]
+		bonus = np.where(two, (first + second) / 2, first)
+		individual += np.where(batch.pause[:, t, None], 0.0, bonus)
+
+	return individual
+
+
+class HistoryView:
+	"""
+	A player's view of the conversation for ``delta_scores``, synced with only the turns
+	added since the last call: the history plus the ids said so far and the turns that
+	repeated an earlier item.
+	"""
+
+	def __init__(self) -> None:
+		self.history: list[Item | None] = []
+		self.cursor = 0
+		self.used: set[uuid.UUID] = set()
+		self.repeats: set[int] = set()
+
+	def sync(self, history: list[Item | None]) -> 'HistoryView':
+		for t in range(self.cursor, len(history)):
+			item = history[t]
+			if item is None:
+				continue
+			if item.id in self.used:
+				self.repeats.add(t)
+			self.used.add(item.id)
+		self.history = history
+		self.cursor = len(history)
+		return self
+
+
+def _hits(subjects: np.ndarray, item: Item) -> np.ndarray:
+	"""(N, 2) bool: whether each candidate subject slot is one of ``item``'s subjects."""
+	hits = np.zeros(subjects.shape, dtype=bool)
+	for s in item.subjects:
+		hits |= subjects == s
+	return hits
+
+
+def delta_components(
+	history: HistoryView | list[Item | None], candidates: list[Item]
+) -> np.ndarray:
+	"""
+	(N, 4) change in importance, coherence, freshness and nonmonotonousness of the shared
+	score if each candidate were said next. Besides the candidate's own terms this includes
+	the coherence it adds to the open windows of up to three preceding items.
+	"""
+	view = history if isinstance(history, HistoryView) else HistoryView().sync(history)
+	H, n = view.history, view.cursor
+	N = len(candidates)
+
+	subjects = np.full((N, 2), NO_SUBJECT, dtype=np.int32)
+	importance = np.zeros(N)
+	first = np.zeros(N, dtype=bool)
+	for c, item in enumerate(candidates):
+		subjects[c, : len(item.subjects)] = item.subjects
+		importance[c] = item.importance
+		first[c] = item.id not in view.used
+	present = subjects != NO_SUBJECT
+	deltas = np.zeros((N, 4))
+
+	# The candidate's own terms; only first occurrences score them
+	left = []
+	for j in range(n - 1, max(-1, n - 4), -1):
+		if H[j] is None:
+			break
+		left.append(H[j])
+	counts = sum((_hits(subjects, y).astype(np.int32) for y in left), np.zeros((N, 2), np.int32))
+	missing = np.any(present & (counts == 0), axis=1)
+	covered = np.all(~present | (counts >= 2), axis=1)
+	coherence = covered.astype(float) - missing.astype(float)
+
+	freshness = np.zeros(N)
+	if n > 0 and H[n - 1] is None:
+		seen = np.zeros((N, 2), dtype=bool)
+		for y in H[max(0, n - 6) : n - 1]:
+			if y is not None:
+				seen |= _hits(subjects, y)
+		freshness = np.sum(present & ~seen, axis=1).astype(float)
+
+	monotonous = np.zeros(N, dtype=bool)
+	if n >= 3 and all(y is not None for y in H[n - 3 : n]):
+		every = np.ones((N, 2), dtype=bool)
+		for y in H[n - 3 : n]:
+			every &= _hits(subjects, y)
+		monotonous = np.any(every, axis=1)
+
+	deltas[:, 0] = np.where(first, importance, 0.0)
+	deltas[:, 1] = np.where(first, coherence, 0.0)
+	deltas[:, 2] = np.where(first, freshness, 0.0)
+	deltas[:, 3] = np.where(first, -monotonous.astype(float), -1.0)
+
+	# Preceding first occurrences whose right-hand window reaches the new turn
+	for j in range(max(0, n - 3), n):
+		y = H[j]
+		if y is None or j in view.repeats or any(H[k] is None for k in range(j + 1, n)):
+			continue
+		context = H[j + 1 : n]
+		for k in range(j - 1, max(-1, j - 4), -1):
+			if H[k] is None:
+				break
+			context.append(H[k])
+		before = [sum(s in z.subjects for z in context) for s in y.subjects]
+		after = np.array(
+			[b + np.any(subjects == s, axis=1) for s, b in zip(y.subjects, before, strict=True)]
+		)
+		gained = np.all(after >= 2, axis=0).astype(float) - np.any(after == 0, axis=0)
+		deltas[:, 1] += gained - window_coherence(tuple(before))
+
+	return deltas
+
+
+def delta_scores(history: HistoryView | list[Item | None], candidates: list[Item]) -> np.ndarray:
+	"""
+	(N,) change in the shared score, under the engine's rules, if each of ``candidates``
+	were said next. Pass a ``HistoryView`` kept across turns to avoid rescanning the
+	history for repeats.
+	"""
+	return delta_components(history, candidates).sum(axis=1)
+
+
+def window_coherence(counts: tuple[int, ...]) -> float:
+	"""Coherence of an item from the context counts of each of its subjects."""
+	score = 0.0
+	if any(c == 0 for c in counts):
+		score -= 1.0
+	if all(c >= 2 for c in counts):
+		score += 1.0
+	return score
+
+
+def advance(
+	state: tuple,
+	action: int,
+	subjects: list[tuple[int, ...]],
+	importance: list[float],
+) -> tuple[float, tuple]:
+	"""
+	Plays ``action`` (an index into ``subjects``/``importance``, or ``PAUSE``) and returns
+	the shared score it settles together with the next state.
+
+	The state keeps the last six turns (enough for freshness), the first occurrences among
+	the last three items whose coherence window is still open, with their subject counts
+	capped at 2, the bitset of items played and the number of consecutive pauses. An open
+	item's coherence is settled once three items follow it or a pause does; ``settle``
+	gives what the open items would score if the game ended now. Summing the gains and the
+	final ``settle`` reproduces the engine's shared score.
+	"""
+	recent, pending, used, pauses = state
+
+	if action == PAUSE:
+		gain = sum(window_coherence(counts) for _, _, counts in pending)
+		return gain, ((*recent, PAUSE)[-6:], (), used, pauses + 1)
+
+	item_subjects = subjects[action]
+	left = []
+	for token in reversed(recent[-3:]):
+		if token == PAUSE:
+			break
+		left.append(token)
+
+	gain = 0.0
+	first = not used >> action & 1
+	if not first:
+		gain -= 1.0
+	else:
+		gain += importance[action]
+		if len(left) == 3 and any(all(s in subjects[y] for y in left) for s in item_subjects):
+			gain -= 1.0
+		if recent and recent[-1] == PAUSE:
+			prior = {s for y in recent[-6:-1] if y != PAUSE for s in subjects[y]}
+			gain += sum(1 for s in item_subjects if s not in prior)
+
+	# Open items get this one as a right neighbour; the oldest closes after three
+	next_pending = []
+	for age, y, counts in pending:
+		counts = tuple(
+			min(2, c + (s in item_subjects)) for s, c in zip(subjects[y], counts, strict=True)
+		)
+		if age + 1 == 3:
+			gain += window_coherence(counts)
+		else:
+			next_pending.append((age + 1, y, counts))
+	if first:
+		own = tuple(min(2, sum(s in subjects[y] for y in left)) for s in item_subjects)
+		next_pending.append((0, action, own))
+
+	return gain, ((*recent, action)[-6:], tuple(next_pending), used | 1 << action, 0)
+
+
+def settle(state: tuple) -> float:
+	"""Coherence the open items of ``state`` score if no further item follows them."""
+	return sum(window_coherence(counts) for _, _, counts in state[1])
@@ -1,5 +1,6 @@
 import uuid
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 
 
 @dataclass(frozen=True)
@@ -8,3 +9,56 @@ class Item:
 	player_id: uuid.UUID
 	importance: float
 	subjects: tuple[int, ...]
+	# Dense index into the game's item table (Engine.items), assigned when the engine
+	# generates the item; -1 for items built elsewhere. Not part of equality or hashing.
+	handle: int = field(default=-1, compare=False)
+	# Bit s is set for every subject s of the item
+	subject_mask: int = field(init=False, repr=False, compare=False)
+
+	def __post_init__(self) -> None:
+		object.__setattr__(self, 'subject_mask', subjects_mask(self.subjects))
+
+
+def subjects_mask(subjects: Iterable[int]) -> int:
+	mask = 0
+	for subject in subjects:
+		mask |= 1 << subject
+	return mask
+
+
+def handle_mask(items: Iterable[Item | None]) -> int:
+	"""
+	Bitset of the handles of ``items``, e.g. of the items used so far in a history. Raises
+	ValueError for an item without a handle, i.e. one not generated by an Engine.
+	"""
+	mask = 0
+	for item in items:
+		if item is not None:
+			if item.handle < 0:
+				raise ValueError(
+					f'item {item.id} has no handle (it was not generated by an Engine)'
+				)
+			mask |= 1 << item.handle
+	return mask
+
+
+def union_mask(items: Iterable[Item | None]) -> int:
+	"""Subjects mentioned by any of ``items``; pauses are skipped."""
+	mask = 0
+	for item in items:
+		if item is not None:
+			mask |= item.subject_mask
+	return mask
+
+
+def common_mask(items: Iterable[Item | None]) -> int:
+	"""
+	Subjects shared by every one of ``items``: 0 if any of them is a pause, every subject
+	(-1) if there are none.
+	"""
+	mask = -1
+	for item in items:
+		if item is None:
+			return 0
+		mask &= item.subject_mask
+	return mask
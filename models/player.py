@@ -1,6 +1,7 @@
 import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from weakref import WeakKeyDictionary
 
 from models.item import Item
 
@@ -21,6 +22,11 @@ class GameContext:
 	conversation_length: int
 
 
+# Contexts each player class's prepare_class has run for in this process. Weakly keyed, so
+# the classes built per candidate by sweeps and optimisers can still be released
+_PREPARED: WeakKeyDictionary[type, set[GameContext]] = WeakKeyDictionary()
+
+
 class Player(ABC):
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
 		self.id = snapshot.id
@@ -37,6 +43,29 @@ class Player(ABC):
 	def __repr__(self) -> str:
 		return f'ID: {self.id}\nName: {self.name}\nPreferences: {self.preferences}\nMemory Bank: {self.memory_bank}'
 
+	@classmethod  # noqa: B027
+	def prepare_class(cls, ctx: GameContext) -> None:
+		"""
+		Optional setup shared by every instance of the class, such as loading lookup tables
+		or models. Called through ``prepare``, so it runs once per process and context; data
+		that does not depend on ``ctx`` should be kept on the class and loaded only once.
+		"""
+
+	def reset(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
+		"""
+		Readies this instance for a new game, leaving it as if it had just been constructed
+		from ``snapshot`` and ``ctx``. The default re-runs ``__init__``.
+		"""
+		self.__init__(snapshot, ctx)
+
 	@abstractmethod
 	def propose_item(self, history: list[Item]) -> Item | None:
 		pass
+
+
+def prepare(player_class: type[Player], ctx: GameContext) -> None:
+	"""Runs ``player_class.prepare_class(ctx)`` unless it already ran in this process."""
+	prepared = _PREPARED.setdefault(player_class, set())
+	if ctx not in prepared:
+		player_class.prepare_class(ctx)
+		prepared.add(ctx)
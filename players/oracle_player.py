@@ -0,0 +1,255 @@
+"""
+Reference player that searches with knowledge of every memory bank.
+
+``OraclePlayer`` is not a team strategy: it is a yardstick. Once bound to the engine
+(``bind_oracles``), it runs Monte Carlo tree search over how the conversation can unfold:
+at each of its decision nodes it picks an item to propose (or none), the other players
+propose the unused item that best continues the current subjects, and the speaker is drawn with the engine's
+selection rule (the last speaker keeps the floor half the time if they proposed,
+otherwise a uniform pick among the proposers with the fewest contributions). Leaves are
+valued by the shared score settled along the way with ``core.scoring.advance`` plus what
+the still-open coherence windows would score.
+
+Each node keeps, per own proposal, its visits and the value from that node on, and picks
+the proposal with UCB1; past the tree the player proposes with the default policy too.
+Nodes are keyed by what was said, so after each turn the child matching the real outcome
+becomes the new root and its statistics are kept. Those were gathered by simulations that
+ended a turn earlier (the horizon moves with the root), so they are a head start that
+fresh simulations refine, not exact values. A per-turn time budget bounds the search. Unbound (e.g. when started from ``main.py``) it proposes the own item
+with the best immediate score gain.
+"""
+
+import math
+import random
+import time
+import uuid
+
+from core.scoring import EMPTY_STATE, PAUSE, advance, settle
+from models.player import GameContext, Item, Player, PlayerSnapshot
+
+NO_SPEAKER = -1
+WITHHOLD = -2  # arm: no own proposal
+
+
+class _Node:
+	__slots__ = ('visits', 'children', 'arms')
+
+	def __init__(self) -> None:
+		self.visits = 0
+		# Outcome token (item index or PAUSE) -> the node after it
+		self.children: dict[int, _Node] = {}
+		# Own proposal (item index or WITHHOLD) -> [visits, total value from this node on]
+		self.arms: dict[int, list[float]] = {}
+
+
+class OraclePlayer(Player):
+	time_budget = 0.05  # seconds of search per turn
+	horizon = 4  # turns per simulation, the current one included
+	exploration = 3.0
+
+	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
+		super().__init__(snapshot, ctx)
+		# Own RNG, so that searching does not shift the engine's random stream
+		self.rng = random.Random(hash(snapshot.preferences))
+
+		# Every item seen so far, by index; bind() registers all banks up front
+		self.items: list[Item] = []
+		self.subjects: list[tuple[int, ...]] = []
+		self.importance: list[float] = []
+		self.index: dict[uuid.UUID, int] = {}
+		for item in self.memory_bank:
+			self._register(item)
+		self.own = [self.index[item.id] for item in self.memory_bank]
+
+		self.bound = False
+		self.players: list[uuid.UUID] = [self.id]
+		self.banks: list[list[int]] = [self.own]
+		self.me = 0
+
+		self.cursor = 0
+		self.state = EMPTY_STATE
+		self.contributions: list[int] = [0]
+		self.last_speaker = NO_SPEAKER
+		self.root = _Node()
+
+	def _register(self, item: Item) -> int:
+		if item.id not in self.index:
+			self.index[item.id] = len(self.items)
+			self.items.append(item)
+			self.subjects.append(tuple(item.subjects))
+			self.importance.append(item.importance)
+		return self.index[item.id]
+
+	def bind(self, snapshots: dict[uuid.UUID, PlayerSnapshot]) -> None:
+		"""Gives the player every memory bank, in the engine's player order."""
+		self.players = list(snapshots)
+		self.me = self.players.index(self.id)
+		self.banks = [
+			[self._register(item) for item in snapshot.memory_bank]
+			for snapshot in snapshots.values()
+		]
+		self.contributions = [0] * len(self.players)
+		self.bound = True
+
+	# --- game state ---
+
+	def _sync(self, history: list[Item | None]) -> None:
+		"""Folds new turns into the state and moves the search root along with them."""
+		for item in history[self.cursor :]:
+			if item is None:
+				token = PAUSE
+				self.last_speaker = NO_SPEAKER
+			else:
+				token = self._register(item)
+				if item.player_id in self.players:
+					self.last_speaker = self.players.index(item.player_id)
+					self.contributions[self.last_speaker] += 1
+			_, self.state = advance(self.state, token, self.subjects, self.importance)
+			self.root = self.root.children.get(token) or _Node()
+		self.cursor = len(history)
+
+	def _unused(self, bank: list[int], used: int) -> list[int]:
+		return [x for x in bank if not used >> x & 1]
+
+	def _select_speaker(self, proposals: list[int | None], last: int, contributions) -> int:
+		"""The engine's rule: index of the speaker among ``proposals``, or NO_SPEAKER."""
+		proposers = [p for p, item in enumerate(proposals) if item is not None]
+		if not proposers:
+			return NO_SPEAKER
+		if last != NO_SPEAKER and proposals[last] is not None and self.rng.random() < 0.5:
+			return last
+		fewest = min(contributions[p] for p in proposers)
+		return self.rng.choice([p for p in proposers if contributions[p] == fewest])
+
+	# --- search ---
+
+	def _simulate(self, turns: int) -> None:
+		"""
+		One simulation of up to ``turns`` turns. At every node on its path the own proposal
+		(one of the own items, or none) is the node's UCB1 arm; the tree grows by one node
+		per simulation, and past it the own proposal follows the default policy. The speaker
+		is drawn with the engine's rule among the proposals, on every turn.
+		"""
+		state = self.state
+		contributions = list(self.contributions)
+		last = self.last_speaker
+		node: _Node | None = self.root
+		path: list[tuple[_Node, int, float]] = []
+		value = 0.0
+
+		for _ in range(turns):
+			used = state[2]
+			context = self._context(state)
+			proposals = [self._rollout_proposal(bank, used, context) for bank in self.banks]
+			if node is not None:
+				arm = self._choose_arm(node, self._unused(self.own, used))
+				proposals[self.me] = None if arm == WITHHOLD else arm
+				path.append((node, arm, value))
+			speaker = self._select_speaker(proposals, last, contributions)
+			token = PAUSE if speaker == NO_SPEAKER else proposals[speaker]
+
+			gain, state = advance(state, token, self.subjects, self.importance)
+			value += gain
+			if speaker != NO_SPEAKER:
+				contributions[speaker] += 1
+			last = speaker
+			if state[3] >= 3:
+				break
+
+			# A node visited for the first time is the leaf: roll out from there
+			if node is not None:
+				node = node.children.setdefault(token, _Node()) if node.visits else None
+
+		value += settle(state)
+		for visited, arm, before in path:
+			visited.visits += 1
+			stats = visited.arms.setdefault(arm, [0, 0.0])
+			stats[0] += 1
+			stats[1] += value - before
+
+	def _arm_values(self, unused: list[int]) -> dict[int, tuple[int, float]]:
+		"""(visits, mean value) at the root of proposing each own item, and of WITHHOLD."""
+		return {
+			arm: (visits, total / visits)
+			for arm, (visits, total) in self.root.arms.items()
+			if arm == WITHHOLD or arm in unused
+		}
+
+	def _choose_arm(self, node: _Node, unused: list[int]) -> int:
+		"""UCB1 over the own proposals at ``node``, each tried once first."""
+		for arm in (*unused, WITHHOLD):
+			if arm not in node.arms:
+				return arm
+
+		log_visits = math.log(node.visits)
+		return max(
+			(*unused, WITHHOLD),
+			key=lambda a: (
+				node.arms[a][1] / node.arms[a][0]
+				+ self.exploration * math.sqrt(log_visits / node.arms[a][0])
+			),
+		)
+
+	def _context(self, state: tuple) -> set[int]:
+		"""Subjects of the items in the coherence window before the next turn."""
+		context = set()
+		for token in reversed(state[0][-3:]):
+			if token == PAUSE:
+				break
+			context.update(self.subjects[token])
+		return context
+
+	def _rollout_proposal(self, bank: list[int], used: int, context: set[int]) -> int | None:
+		"""
+		Default policy for every player: the unused item that best continues the current
+		subjects (all of them, then any), by importance, with a little noise.
+		"""
+		best, best_value = None, float('-inf')
+		for x in bank:
+			if used >> x & 1:
+				continue
+			shared = sum(s in context for s in self.subjects[x])
+			value = self.importance[x] + self.rng.random() * 0.5
+			if shared:
+				value += 1.0 + (shared == len(self.subjects[x]))
+			if value > best_value:
+				best, best_value = x, value
+		return best
+
+	def _greedy(self) -> int:
+		best, best_gain = PAUSE, 0.0
+		base = settle(self.state)
+		for x in self._unused(self.own, self.state[2]):
+			gain, state = advance(self.state, x, self.subjects, self.importance)
+			gain += settle(state) - base
+			if gain > best_gain:
+				best, best_gain = x, gain
+		return best
+
+	def propose_item(self, history: list[Item]) -> Item | None:
+		self._sync(history)
+		if not self._unused(self.own, self.state[2]):
+			return None
+
+		if not self.bound:
+			action = self._greedy()
+		else:
+			turns = min(self.horizon, self.conversation_length - len(history))
+			deadline = time.perf_counter() + self.time_budget
+			while time.perf_counter() < deadline:
+				self._simulate(turns)
+
+			# Propose the best own item unless the others are expected to do better without it
+			arms = self._arm_values(self._unused(self.own, self.state[2]))
+			action = max(arms, key=lambda a: arms[a][1]) if arms else self._greedy()
+			if action == WITHHOLD:
+				action = PAUSE
+
+		return None if action == PAUSE else self.items[action]
+
+
+def bind_oracles(engine) -> None:
+	"""Binds every ``OraclePlayer`` of ``engine`` to the engine's memory banks."""
+	for player in engine.players:
+		if isinstance(player, OraclePlayer):
+			player.bind(engine.snapshots)
@@ -1,10 +1,15 @@
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from functools import cache
 from uuid import UUID
 
 from models.player import GameContext, Item, Player, PlayerSnapshot
 
 
 class Player1(Player):
+	# (w_coh, w_imp, w_pref, w_nonmon, w_fresh) used for the whole game instead of the
+	# weights dynamic_adjustment picks every turn; set on subclasses, e.g. by weight sweeps
+	pinned_weights: tuple[float, float, float, float, float] | None = None
+
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
 		super().__init__(snapshot, ctx)
 
@@ -19,7 +24,7 @@ class Player1(Player):
 		# Adding dynamic playing style where we set the weights for coherence, importance and preference
 		# based on the game context
 		self.w_coh, self.w_imp, self.w_pref, self.w_nonmon, self.w_fresh = (
-			self._init_dynamic_weights(ctx, snapshot)
+			self.pinned_weights or self._init_dynamic_weights(ctx, snapshot)
 		)
 		self.ctx = ctx
 
@@ -28,9 +33,16 @@ class Player1(Player):
 		self.player_subjects = defaultdict(Counter)
 		self.player_actions = defaultdict(list)
 		self.player_turns = Counter()
+		self.turn_groups = defaultdict(set)  # players by their count in player_turns
 		self.player_coherence_contributions = defaultdict(float)
 		self.player_coherence_fraction = defaultdict(float)
 
+		#  history is processed once: turns before the cursor are already in the state above
+		self.cursor = 0
+		#  importance + coherence of each of the last 7 turns against the turns before it, None
+		#  for pauses
+		self.recent_scores = deque(maxlen=7)
+
 		# Print Player 1 ID and wait for input
 		# print(f"Player 1 ID: {self.id}")
 		# input("Press Enter to continue...")
@@ -38,11 +50,10 @@ class Player1(Player):
 	def propose_item(self, history: list[Item]) -> Item | None:
 		# print('\nConversation History: ', history)
 
-		#  update metadata
-		new_item_tups = self.get_items_since_my_last_turn(history)
-
-		for item_tup in new_item_tups:
-			self.update_player_data(item_tup, history)  # must happen before updating used items
+		#  update metadata with the turns since the last call (before updating used items)
+		new_turns = range(self.cursor, len(history))
+		for j in new_turns:
+			self.update_player_data((j, history[j]), history)
 
 		# If history length is 0, return the first item from preferred sort ( Has the highest Importance)
 		# if len(history) == 0:
@@ -59,9 +70,19 @@ class Player1(Player):
 			self.contributed_items.append(history[-1])
 
 		# This Checks Repitition so we dont repeat any item that has already been said in the history, returns a filtered memory bank
-		self._update_used_items(history)
+		self.used_items.update(history[j].id for j in new_turns if history[j] is not None)
 
 		filtered_memory_bank = check_repetition(self.memory_bank, self.used_items)
+
+		for j in new_turns:
+			item = history[j]
+			if item is None:
+				self.recent_scores.append(None)
+				continue
+			# Against the turns before it, as the engine scores it and as candidates are scored
+			_, coherence = score_coherence(self, item, history, filtered_memory_bank, end=j)
+			self.recent_scores.append(item.importance + coherence)
+		self.cursor = len(history)
 		# print('\nCurrent Memory Bank: ', len(self.memory_bank))
 		# print('\nFiltered Memory Bank: ', len(filtered_memory_bank))
 
@@ -79,6 +100,8 @@ class Player1(Player):
 			is_fresh_turn,
 			is_monotonous_turn,
 		) = self.dynamic_adjustment(history, self.ctx, self.snapshot)
+		if self.pinned_weights is not None:
+			self.w_coh, self.w_imp, self.w_pref, self.w_nonmon, self.w_fresh = self.pinned_weights
 
 		# print("fresh turn: ", is_fresh_turn, "monotonous turn: ", is_monotonous_turn)
 
@@ -96,7 +119,8 @@ class Player1(Player):
 			for item in filtered_memory_bank
 		}
 		nonmonotonousness_scores = {
-			item.id: score_nonmonotonousness(item, history) for item in filtered_memory_bank
+			item.id: score_nonmonotonousness(item, history, self.used_items)
+			for item in filtered_memory_bank
 		}
 		freshness_scores = {
 			item.id: score_freshness(item, history) for item in filtered_memory_bank
@@ -110,9 +134,9 @@ class Player1(Player):
 			'freshness': freshness_scores,
 		}
 
-		average_past_7 = average_score_last_n(filtered_memory_bank, history, 7, self)
+		average_past_7 = self.average_score_last_n(history, 7)
 		# print("Average Last 7 Final Scores: ", average_past_7)
-		average_past_3 = average_score_last_n(filtered_memory_bank, history, 3, self)
+		average_past_3 = self.average_score_last_n(history, 3)
 		# print("Average Last 3 Final Scores: ", average_past_3)
 		# print("Current Threshold: ", self.threshold)
 		if average_past_7 != 0.0:
@@ -147,13 +171,6 @@ class Player1(Player):
 
 		return best_item
 
-	def _update_used_items(self, history: list[Item]) -> None:
-		# Update the used_items set with items from history
-		# Create a set of IDs of items in the player's memory bank
-		# if the item is None, it should not be added to the used_items set
-		# memory_ids = {item.id for item in self.memory_bank}
-		self.used_items.update(item.id for item in history if item is not None)
-
 	def _init_dynamic_weights(
 		self, ctx: GameContext, snapshot: PlayerSnapshot
 	) -> tuple[float, float, float, float, float]:
@@ -248,25 +265,6 @@ class Player1(Player):
 		# print(f'Weights: Coherence: {w_coh}, Importance: {w_imp}, Preference: {w_pref}, Nonmonotonousness: {w_nonmon}, Freshness: {w_fresh}')
 		return (w_coh, w_imp, w_pref, w_nonmon, w_fresh, is_fresh_turn, is_monotonous_turn)
 
-	def get_items_since_my_last_turn(self, history: list[Item]):
-		for i in range(len(history) - 1, -1, -1):
-			if (
-				history[i] is not None and history[i].player_id == self.id
-			):  # look at every item since the last time I spoke
-				#  pauses are ignored
-				item_idx_tups = []
-				j = i + 1
-				while j < len(history):
-					past_item = history[j]
-					if past_item not in self.used_items:
-						item_idx_tups.append((j, past_item))
-					j += 1
-				return item_idx_tups  # returns list of tuples of (idx, item) for most recent items
-		#  this way, we can easily get the idx that the item happened at without searching for it again
-		return [
-			(j, item) for j, item in enumerate(history)
-		]  # if we haven't spoken, return whole history
-
 	def update_player_data(self, item_tup: tuple[int, Item] | None, history):
 		_, item = item_tup
 
@@ -274,7 +272,13 @@ class Player1(Player):
 			return
 
 		player_id = item.player_id
+		count = self.player_turns[player_id]
+		if count:
+			self.turn_groups[count].discard(player_id)
+			if not self.turn_groups[count]:
+				del self.turn_groups[count]
 		self.player_turns[player_id] += 1
+		self.turn_groups[count + 1].add(player_id)
 		self.player_actions[player_id].append(item)  # keep track of each thing the player has said
 
 		for subject in item.subjects:
@@ -298,6 +302,20 @@ class Player1(Player):
 		)  # out of their contributed items, how many were continuing a coherence chain?
 		self.player_coherence_fraction[player_id] = coherence_fraction
 
+	def average_score_last_n(self, history: list[Item], n: int) -> float:
+		# Average score of the last n turns (ignoring pauses), each scored when it was said
+
+		if len(history) >= n:
+			scores = [score for score in list(self.recent_scores)[-n:] if score is not None]
+			if not scores:
+				return 0.0
+			return sum(scores) / len(scores)
+		# If the history is less than n but greater than 0, return a lower threshold (encorage speaking to start the game)
+		elif len(history) == 0:
+			return -0.5
+		else:
+			return 0.0
+
 	#########################################################
 	#### Category: Helper Methods for Coherence Score #####
 	#########################################################
@@ -305,51 +323,53 @@ class Player1(Player):
 	def expected_planning_bonus_lookahead(
 		self,
 		current_speaker_id,
-		player_turns,
 		subjects,
 		current_item,
 		filtered_memory_bank,
 		missing_subjects,
 	):
-		dist = {current_speaker_id: 1.0}
+		#  who speaks in each of the next three turns depends only on the contribution counts,
+		#  so the forecast is shared by all players with the same count (see speaker_forecast)
+		speaker_count = self.player_turns.get(current_speaker_id)
+		profile = tuple(
+			sorted(
+				(count, len(group) - (count == speaker_count))
+				for count, group in self.turn_groups.items()
+				if len(group) > (count == speaker_count)
+			)
+		)
+		forecast = speaker_forecast(profile, speaker_count)
+
+		num_subjects = max(1, len(subjects))
+		num_missing = len(missing_subjects)
+		missing_frac = num_missing / num_subjects
+
+		def weighted_bonus(speaker):
+			bonus = self.compute_planning_bonus_for_speaker(speaker, subjects, current_item)
+			mention_prob = self.expected_subject_mention_coverage(
+				missing_subjects, speaker
+			)  # how likely are they to mention a missing subject?
+			#  adjusting for the number of missing subjects. so this depends on both # missing subjects and
+			#  mention probability
+			#  lowest possible is still 0.5. don't want bonus to not count at all, just bc of low mention probability
+			return bonus * (1.0 - 0.5 * missing_frac + 0.5 * missing_frac * mention_prob)
+
+		#  sum of the weighted bonuses of the players with each contribution count that can speak
+		reachable = {count for _, probs in forecast for count, prob in probs if prob}
+		class_bonus = defaultdict(float)
+		for count in reachable:
+			for pid in self.turn_groups[count]:
+				if pid != current_speaker_id:
+					class_bonus[count] += weighted_bonus(pid)
+		speaker_bonus = weighted_bonus(current_speaker_id)
+
+		# chance that each player speaks in each round * how good of a move they're likely to make
 		total_expected_bonus = 0.0
-
-		for _ in range(3):
-			next_dist = defaultdict(float)  # prob dist for the next speaker
-			for speaker, prob in dist.items():  # go through all possible next speakers
-				updated_counts = player_turns.copy()  #  turns for each player
-				updated_counts[speaker] += 1  # add to that speaker bc they just spoke
-				next_probs = self.get_next_player_probs(
-					speaker, updated_counts
-				)  # get next speakers and their probabilities
-
-				for (
-					next_speaker,
-					next_prob,
-				) in next_probs.items():  # for each possible next speaker,
-					bonus = self.compute_planning_bonus_for_speaker(
-						next_speaker, subjects, current_item
-					)
-					mention_prob = self.expected_subject_mention_coverage(
-						missing_subjects, next_speaker
-					)  # how likely are they to mention a missing subject?
-
-					num_subjects = max(1, len(subjects))
-					num_missing = len(missing_subjects)
-					missing_frac = num_missing / num_subjects
-					weighted_bonus = bonus * (
-						1.0 - 0.5 * missing_frac + 0.5 * missing_frac * mention_prob
-					)
-					#  adjusting for the number of missing subjects. so this depends on both # missing subjects and
-					#  mention probability
-					#  lowest possible is still 0.5. don't want bonus to not count at all, just bc of low mention probability
-					total_expected_bonus += prob * next_prob * weighted_bonus
-					# add to the bonus, the chance that we get to this speaker * the chance that we get to the next speaker * how good of a move they're likely to make
-					#  * the chance they mention the missing subject
-					next_dist[next_speaker] += (
-						prob * next_prob
-					)  # prob that next speaker will speak in next round
-			dist = next_dist
+		for speaker_prob, member_probs in forecast:
+			total_expected_bonus += speaker_prob * speaker_bonus
+			for count, prob in member_probs:
+				if prob:
+					total_expected_bonus += prob * class_bonus[count]
 
 		max_possible_bonus = 3 * 2.0
 		return min(total_expected_bonus / max_possible_bonus, 1.0)  # scale it down from 0 to 1
@@ -465,6 +485,64 @@ class Player1(Player):
 # Helper Functions #
 
 
+@cache
+def speaker_forecast(
+	profile: tuple[tuple[int, int], ...], speaker_count: int | None, steps: int = 3
+) -> tuple[tuple[float, tuple[tuple[int, float], ...]], ...]:
+	"""
+	Distribution of the speaker over the next ``steps`` turns, starting from the current
+	speaker and applying ``Player1.get_next_player_probs`` to the contribution counts plus
+	one turn for whoever just spoke.
+
+	``profile`` holds ``(count, number of players)`` for the other players that have
+	spoken, and ``speaker_count`` is the current speaker's count (None if they have not
+	spoken). Players with the same count are interchangeable, so each step is returned as
+	the current speaker's probability and the probability of each single player per count.
+	"""
+	sizes = dict(profile)
+	speaker_prob, member_prob = 1.0, dict.fromkeys(sizes, 0.0)
+	forecast = []
+
+	for _ in range(steps):
+		next_speaker, next_member = 0.0, dict.fromkeys(sizes, 0.0)
+
+		# the current speaker just spoke: counts with speaker_count + 1
+		if speaker_prob:
+			own = 1 if speaker_count is None else speaker_count + 1
+			lowest = min([own, *sizes])
+			share = 0.5 / (sizes.get(lowest, 0) + (own == lowest))
+			next_speaker += speaker_prob * (0.5 + share * (own == lowest))
+			if lowest in sizes:
+				next_member[lowest] += speaker_prob * share
+
+		# a player with count c just spoke: that player at c + 1, the rest unchanged
+		for count, size in sizes.items():
+			mass = member_prob[count] * size
+			if not mass:
+				continue
+			values = [v for v in sizes if v != count or size > 1] + [count + 1]
+			if speaker_count is not None:
+				values.append(speaker_count)
+			lowest = min(values)
+			tied = sum(n for v, n in sizes.items() if v == lowest) - (count == lowest)
+			tied += (count + 1 == lowest) + (speaker_count == lowest)
+			share = 0.5 / tied
+
+			# 0.5 stays with the player who spoke, shared evenly within their count
+			next_member[count] += mass * (0.5 + share * (count + 1 == lowest)) / size
+			if count == lowest:
+				next_member[count] += mass * (size - 1) * share / size
+			elif lowest in sizes:
+				next_member[lowest] += mass * share
+			if speaker_count == lowest:
+				next_speaker += mass * share
+
+		speaker_prob, member_prob = next_speaker, next_member
+		forecast.append((speaker_prob, tuple(member_prob.items())))
+
+	return tuple(forecast)
+
+
 def recent_subject_stats(history: list[Item], window: int = 6):
 	# Look back `window` turns (skipping None), return:
 	# - subj_counts: Counter of subjects in the window
@@ -496,14 +574,20 @@ def check_repetition(memory_bank: list[Item], used_items: set[UUID]) -> list[Ite
 
 
 def score_coherence(
-	player: Player1, current_item: Item, history: list[Item], filtered_memory_bank
+	player: Player1,
+	current_item: Item,
+	history: list[Item],
+	filtered_memory_bank,
+	end: int | None = None,
 ) -> float:
+	#  scores against history[:end] (the whole history by default) without copying it
 	if current_item is None:
 		return 0.0, 0.0
 
+	end = len(history) if end is None else end
 	recent_history = []
-	start_idx = max(0, len(history) - 3)
-	for i in range(len(history) - 1, start_idx - 1, -1):
+	start_idx = max(0, end - 3)
+	for i in range(end - 1, start_idx - 1, -1):
 		item = history[i]
 		if item is None:
 			break
@@ -528,7 +612,7 @@ def score_coherence(
 	# and maybe again take into account expected value based on the global leaning towards coherence in the overall conversation, for the last two spots in the future context
 
 	min_turns_before_bonus = 10
-	enough_history = len(history) >= min_turns_before_bonus
+	enough_history = end >= min_turns_before_bonus
 
 	apply_bonus = False
 	coherence_uncertain = (
@@ -571,7 +655,6 @@ def score_coherence(
 	if apply_bonus:
 		bonus = player.expected_planning_bonus_lookahead(
 			current_speaker_id=current_item.player_id,
-			player_turns=player.player_turns.copy(),
 			subjects=subjects,
 			current_item=current_item,
 			filtered_memory_bank=filtered_memory_bank,
@@ -622,7 +705,10 @@ def score_freshness(current_item: Item, history: list[Item]) -> float:
 	return raw_score, scaled_score
 
 
-def score_nonmonotonousness(current_item: Item, history: list[Item]) -> float:
+def score_nonmonotonousness(
+	current_item: Item, history: list[Item], used_items: set[UUID] | None = None
+) -> float:
+	#  used_items: ids of the items in history, if the caller keeps them
 	if current_item is None:
 		return 0.0
 
@@ -636,7 +722,9 @@ def score_nonmonotonousness(current_item: Item, history: list[Item]) -> float:
 		):
 			penalty -= 1
 
-	if current_item.id in {item.id for item in history if item is not None}:
+	if used_items is None:
+		used_items = {item.id for item in history if item is not None}
+	if current_item.id in used_items:
 		penalty -= 1
 
 	raw_score = penalty
@@ -764,30 +852,6 @@ def choose_item(
 ##################################################
 
 
-def average_score_last_n(memory_bank, history: list[Item], n: int, player) -> float:
-	# Calculate the average score of the last n items in history (ignoring None)
-
-	if len(history) >= n:
-		importance_scores = [item.importance for item in history[-n:] if item is not None]
-		coherence_scores = [
-			score_coherence(player, item, history, memory_bank)[1]
-			for item in history[-n:]
-			if item is not None
-		]
-		scores = [
-			(importance + coherence)
-			for importance, coherence in zip(importance_scores, coherence_scores, strict=False)
-		]
-		if not scores:
-			return 0.0
-		return sum(scores) / len(scores)
-	# If the history is less than n but greater than 0, return a lower threshold (encorage speaking to start the game)
-	elif len(history) == 0:
-		return -0.5
-	else:
-		return 0.0
-
-
 def count_consecutive_pauses(history: list[Item]) -> int:
 	# Check only the two most recent moves for consecutive pauses
 	cnt = 0
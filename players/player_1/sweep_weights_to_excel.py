@@ -1,27 +1,46 @@
+"""
+Sweeps Player1's five scoring weights over the simplex w_coh + w_imp + w_pref + w_nonmon +
+w_fresh = 1.
+
+Grid points are evaluated in a process pool, every point playing the same seeds (common
+random numbers). Successive halving keeps the best 1/eta of the points after each rung and
+plays the survivors on eta times as many seeds, until ``--keep`` points remain. Each
+``--refine`` level then halves the step and evaluates the unseen neighbours of the
+survivors on the same seeds. Rows are appended to the CSV as evaluations finish, so a long
+sweep can be followed (or interrupted) while it runs.
+
+Player1 re-derives its weights with ``dynamic_adjustment`` every turn, so by default the
+swept weights are only the initial values; ``--pin`` keeps them for the whole game.
+
+Usage:
+	python -m players.player_1.sweep_weights_to_excel --player p1 2 --player pr 4 \\
+		--length 30 --pin --workers 8 --output sweep.csv
+"""
+
 from __future__ import annotations
 
+import argparse
+import csv
+import math
 import os
-import random
-from collections.abc import Iterator
-from typing import Any
-
-import pandas as pd
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 
-from core.engine import Engine
-from models.cli import settings
-from models.player import Player
 from players.player_1.player import Player1
-from players.random_pause_player import RandomPausePlayer
-from players.random_player import RandomPlayer
+from tournament.registry import counts_from_flags, resolve_roster, roster_from_counts
+from tournament.runner import GameSpec, play_game
 
-# -------- Config --------
-STEP: float = 0.1  # grid step (must evenly divide 1.0)
-OUTPUT_XLSX: str = 'weights_sweep_results.xlsx'
+WEIGHT_NAMES = ('w_coh', 'w_imp', 'w_pref', 'w_nonmon', 'w_fresh')
+METRICS = ('shared', 'individual', 'total')
+COLUMNS = ('stage', 'step', *WEIGHT_NAMES, 'seeds', *METRICS)
 BASE_SEED: int = 1337
 
+Weights = tuple[float, ...]
+
 
 # -------- Simplex grid (sum=1) --------
-def generate_simplex_grid(step: float, dims: int = 5) -> Iterator[tuple[float, ...]]:
+def generate_simplex_grid(step: float, dims: int = 5) -> Iterator[Weights]:
 	if step <= 0 or step > 1:
 		raise ValueError('STEP must be in (0,1].')
 	N = round(1.0 / step)
@@ -36,113 +55,251 @@ def generate_simplex_grid(step: float, dims: int = 5) -> Iterator[tuple[float, .
 			yield from rec(prefix + [k], remain - k, slots - 1)
 
 	for ks in rec([], N, dims):
-		yield tuple(k * step for k in ks)
+		yield tuple(round(k * step, 9) for k in ks)
 
 
-# -------- Only Player1 and RandomPlayers --------
-def build_players_list(args) -> list[type[Player]]:
-	"""Only include Player1 and RandomPlayers; ignore everything else."""
-	return (
-		[RandomPlayer] * args.players['pr']
-		+ [Player1] * args.players['p1']
-		+ [RandomPausePlayer] * args.players['prp']
-	)
+def simplex_neighbours(weights: Weights, step: float) -> Iterator[Weights]:
+	"""Points ``step`` away on the simplex: ``step`` of weight moved from one slot to another."""
+	for i in range(len(weights)):
+		for j in range(len(weights)):
+			if i != j and weights[j] >= step - 1e-9:
+				moved = list(weights)
+				moved[i] += step
+				moved[j] = max(0.0, moved[j] - step)
+				yield tuple(round(w, 9) for w in moved)
 
 
-# -------- Run one game for one weight vector --------
-def run_once_with_weights(
-	args, weights: tuple[float, float, float, float, float], seed_offset: int
-) -> dict[str, Any]:
-	players_types = build_players_list(args)
+# -------- Evaluation (runs in worker processes) --------
+def weighted_player1(weights: Weights, pin: bool) -> type[Player1]:
+	if pin:
+		return type('PinnedPlayer1', (Player1,), {'pinned_weights': tuple(weights)})
 
-	# Stable seed per run
-	run_seed = (args.seed if getattr(args, 'seed', None) is not None else BASE_SEED) + seed_offset
-	random.seed(run_seed)
+	class WeightedPlayer1(Player1):
+		def __init__(self, snapshot, ctx) -> None:
+			super().__init__(snapshot, ctx)
+			self.w_coh, self.w_imp, self.w_pref, self.w_nonmon, self.w_fresh = weights
 
-	engine = Engine(
-		players=players_types,
-		player_count=args.total_players,
-		subjects=args.subjects,
-		memory_size=args.memory_size,
-		conversation_length=args.length,
-		seed=run_seed,
-	)
+	return WeightedPlayer1
+
+
+@dataclass(frozen=True)
+class PointTask:
+	weights: Weights
+	pin: bool
+	roster: tuple[str, ...]
+	subjects: int
+	memory_size: int
+	length: int
+	seeds: tuple[int, ...]
+
+
+def evaluate_point(task: PointTask) -> dict[str, float]:
+	"""Sums of each metric over ``task.seeds``, Player1 metrics averaged over its slots."""
+	player = weighted_player1(task.weights, task.pin)
+	players = [
+		player if code == 'p1' else cls
+		for code, cls in zip(task.roster, resolve_roster(task.roster), strict=True)
+	]
+	slots = [p for p, code in enumerate(task.roster) if code == 'p1']
+
+	sums = dict.fromkeys(METRICS, 0.0)
+	for seed in task.seeds:
+		spec = GameSpec(
+			roster=task.roster,
+			subjects=task.subjects,
+			memory_size=task.memory_size,
+			length=task.length,
+			seed=BASE_SEED + seed,
+		)
+		result = play_game(spec, players=players)
+		sums['shared'] += result.shared
+		sums['individual'] += sum(result.individual[p] for p in slots) / len(slots)
+		sums['total'] += sum(result.totals[p] for p in slots) / len(slots)
+	return sums
+
+
+# -------- Sweep --------
+class Sweep:
+	def __init__(
+		self,
+		roster: tuple[str, ...],
+		subjects: int = 20,
+		memory_size: int = 10,
+		length: int = 10,
+		pin: bool = False,
+		objective: str = 'shared',
+		workers: int | None = None,
+	) -> None:
+		if 'p1' not in roster:
+			raise ValueError('The roster has no Player1 (--player p1 N).')
+		self.roster = roster
+		self.subjects = subjects
+		self.memory_size = memory_size
+		self.length = length
+		self.pin = pin
+		self.objective = objective
+		self.workers = workers or os.cpu_count() or 1
+
+		# weights -> [games played, *metric sums]; every point plays seeds 0, 1, 2, ...
+		self.stats: dict[Weights, list[float]] = {}
+		self._executor: ProcessPoolExecutor | None = None
 
-	# Inject weights into all Player1 instances
-	w_coh, w_imp, w_pref, w_nonmon, w_fresh = weights
-	for p in engine.players:
-		if isinstance(p, Player1):
-			p.w_coh, p.w_imp, p.w_pref, p.w_nonmon, p.w_fresh = (
-				w_coh,
-				w_imp,
-				w_pref,
-				w_nonmon,
-				w_fresh,
+	def __enter__(self) -> Sweep:
+		if self.workers > 1:
+			self._executor = ProcessPoolExecutor(max_workers=self.workers)
+		return self
+
+	def __exit__(self, *exc) -> None:
+		if self._executor:
+			self._executor.shutdown(cancel_futures=True)
+			self._executor = None
+
+	def mean(self, weights: Weights, metric: str | None = None) -> float:
+		games, *sums = self.stats[weights]
+		return sums[METRICS.index(metric or self.objective)] / games
+
+	def best(self, points: Iterable[Weights], count: int) -> list[Weights]:
+		return sorted(points, key=self.mean, reverse=True)[:count]
+
+	def evaluate(self, points: list[Weights], seeds: range, stage: str, step: float, writer):
+		"""Plays ``seeds`` with every point and writes one row per point as it finishes."""
+		tasks = [
+			PointTask(
+				weights=weights,
+				pin=self.pin,
+				roster=self.roster,
+				subjects=self.subjects,
+				memory_size=self.memory_size,
+				length=self.length,
+				seeds=tuple(seeds),
 			)
+			for weights in points
+		]
+		if self._executor:
+			futures = {self._executor.submit(evaluate_point, task): task for task in tasks}
+			finished = ((futures[future], future.result()) for future in as_completed(futures))
+		else:
+			finished = ((task, evaluate_point(task)) for task in tasks)
 
-	# Run a single simulation
-	output = engine.run(players_types)
-
-	# Shared score: same value GUI shows in the "Shared Score" column (per player row)
-	shared_total = float(output['scores']['shared_score_breakdown']['total'])
-
-	# Find Player1's individual score (GUI's "Individual Score" for Player1)
-	p1_ids = [uid for uid, name in engine.player_names.items() if name == 'Player1']
-	p1_individual = float('nan')
-	for snap in output['scores']['player_scores']:
-		if snap['id'] in p1_ids:
-			p1_individual = float(snap['scores']['individual'])
-			break  # if multiple Player1s, this takes the first; adjust if you need mean/max
-
-	return {
-		'weights': weights,
-		'shared_total': shared_total,
-		'player1_individual': p1_individual,
-	}
-
-
-# -------- Sweep & write Excel --------
-def sweep_and_export(args):
-	rows: list[dict[str, float]] = []
-	for idx, weights in enumerate(generate_simplex_grid(STEP, dims=5), start=1):
-		metrics = run_once_with_weights(args, weights, seed_offset=idx * 1000)
-		rows.append(
-			{
-				'w_coh': metrics['weights'][0],
-				'w_imp': metrics['weights'][1],
-				'w_pref': metrics['weights'][2],
-				'w_nonmon': metrics['weights'][3],
-				'w_fresh': metrics['weights'][4],
-				'shared_total': metrics['shared_total'],
-				'player1_individual': metrics['player1_individual'],
+		for task, sums in finished:
+			stats = self.stats.setdefault(task.weights, [0, *(0.0 for _ in METRICS)])
+			stats[0] += len(task.seeds)
+			for m, metric in enumerate(METRICS, start=1):
+				stats[m] += sums[metric]
+			writer.writerow(
+				[stage, step, *task.weights, stats[0]]
+				+ [round(self.mean(task.weights, metric), 6) for metric in METRICS]
+			)
+
+	def run(
+		self,
+		step: float,
+		writer,
+		seeds: int = 2,
+		max_seeds: int = 32,
+		eta: int = 3,
+		keep: int = 5,
+		refine: int = 1,
+	) -> list[Weights]:
+		"""Successive halving over the grid, then ``refine`` finer levels. Returns the best."""
+		survivors = list(generate_simplex_grid(step))
+		played, rung_seeds, rung = 0, seeds, 0
+		while True:
+			if rung_seeds:
+				rung_range = range(played, played + rung_seeds)
+				self.evaluate(survivors, rung_range, f'rung {rung}', step, writer)
+				played += rung_seeds
+			if len(survivors) <= keep:
+				break
+			survivors = self.best(survivors, max(keep, math.ceil(len(survivors) / eta)))
+			# Survivors play eta times as many seeds in total after the next rung
+			rung_seeds = max(0, min(played * (eta - 1), max_seeds - played))
+			rung += 1
+
+		for level in range(1, refine + 1):
+			step /= 2
+			candidates = {
+				weights
+				for point in survivors
+				for weights in simplex_neighbours(point, step)
+				if weights not in self.stats
 			}
-		)
+			self.evaluate(sorted(candidates), range(played), f'refine {level}', step, writer)
+			survivors = self.best([*survivors, *candidates], keep)
+
+		return survivors
 
-	df = pd.DataFrame(rows)
 
-	# Sort by shared_total then Player1 individual (desc)
-	df = df.sort_values(['shared_total', 'player1_individual'], ascending=False).reset_index(
-		drop=True
+def export_excel(csv_path: str, xlsx_path: str) -> None:
+	"""Writes the CSV rows to Excel, best objective first (needs pandas and openpyxl)."""
+	import pandas as pd
+
+	df = pd.read_csv(csv_path)
+	df = df.sort_values(['shared', 'individual'], ascending=False).reset_index(drop=True)
+	df.to_excel(xlsx_path, index=False, sheet_name='results')
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Sweep Player1's weights over the simplex.")
+	parser.add_argument(
+		'--player',
+		action='append',
+		nargs=2,
+		metavar=('TYPE', 'COUNT'),
+		help='Set the count for a specific player type (e.g., --player p1 2)',
 	)
+	parser.add_argument('--subjects', type=int, default=20)
+	parser.add_argument('--memory_size', type=int, default=10)
+	parser.add_argument('--length', type=int, default=10)
+	parser.add_argument('--step', type=float, default=0.1, help='Initial grid step.')
+	parser.add_argument('--seeds', type=int, default=2, help='Common seeds in the first rung.')
+	parser.add_argument('--max-seeds', type=int, default=32, help='Seeds per point at most.')
+	parser.add_argument('--eta', type=int, default=3, help='Halving rate between rungs.')
+	parser.add_argument('--keep', type=int, default=5, help='Points kept and refined.')
+	parser.add_argument('--refine', type=int, default=1, help='Finer levels after halving.')
+	parser.add_argument('--pin', action='store_true', help='Keep the weights all game.')
+	parser.add_argument('--objective', choices=METRICS, default='shared')
+	parser.add_argument('--workers', type=int, help='Worker processes (defaults to CPUs).')
+	parser.add_argument('--output', default='weights_sweep_results.csv')
+	parser.add_argument('--excel', help='Also write the results to this .xlsx file.')
+	args = parser.parse_args()
 
-	# Write Excel (xlsxwriter preferred; fallback to openpyxl if needed)
 	try:
-		with pd.ExcelWriter(OUTPUT_XLSX, engine='xlsxwriter') as xlw:
-			df.to_excel(xlw, index=False, sheet_name='results')
-	except Exception:
-		with pd.ExcelWriter(OUTPUT_XLSX, engine='openpyxl') as xlw:
-			df.to_excel(xlw, index=False, sheet_name='results')
+		counts = counts_from_flags(args.player)
+	except ValueError as e:
+		parser.error(str(e))
+	if args.eta < 2:
+		parser.error('--eta must be at least 2')
 
-	print(f'✅ Wrote {len(df)} rows to {os.path.abspath(OUTPUT_XLSX)}')
+	sweep = Sweep(
+		roster=roster_from_counts(counts),
+		subjects=args.subjects,
+		memory_size=args.memory_size,
+		length=args.length,
+		pin=args.pin,
+		objective=args.objective,
+		workers=args.workers,
+	)
+	with open(args.output, 'w', newline='', buffering=1) as f, sweep:
+		writer = csv.writer(f)
+		writer.writerow(COLUMNS)
+		best = sweep.run(
+			args.step,
+			writer,
+			seeds=args.seeds,
+			max_seeds=args.max_seeds,
+			eta=args.eta,
+			keep=args.keep,
+			refine=args.refine,
+		)
 
+	print(f'Wrote {len(sweep.stats)} points to {os.path.abspath(args.output)}')
+	for weights in best:
+		means = ', '.join(f'{m} {sweep.mean(weights, m):.4f}' for m in METRICS)
+		print(f'{dict(zip(WEIGHT_NAMES, weights, strict=True))}: {means}')
 
-def main():
-	# Use your existing CLI (same as main.py)
-	args = settings()
-	# sanity: ensure we actually have Player1 present
-	if args.players['p1'] == 0:
-		print("⚠️  No Player1 included (--player p1 N). 'player1_individual' will be NaN.")
-	sweep_and_export(args)
+	if args.excel:
+		export_excel(args.output, args.excel)
 
 
 if __name__ == '__main__':
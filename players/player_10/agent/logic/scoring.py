@@ -11,17 +11,7 @@ from collections.abc import Sequence
 
 from models.item import Item
 
-from ..config import (
-	COHERENCE_WEIGHT,
-	COHERENCE_WINDOW,
-	EWMA_ALPHA,
-	FRESHNESS_WEIGHT,
-	FRESHNESS_WINDOW,
-	IMPORTANCE_WEIGHT,
-	MIN_SAMPLES_PID,
-	MONOTONY_WEIGHT,
-	MONOTONY_WINDOW,
-)
+from .. import config as config_module
 
 
 class PlayerPerformanceTracker:
@@ -50,7 +40,7 @@ class PlayerPerformanceTracker:
 		if self.count_global == 0:
 			self.mu_global = delta
 		else:
-			self.mu_global = self.mu_global + EWMA_ALPHA * (delta - self.mu_global)
+			self.mu_global = self.mu_global + config_module.EWMA_ALPHA * (delta - self.mu_global)
 		self.count_global += 1
 
 		# Update per-player EWMA
@@ -58,7 +48,7 @@ class PlayerPerformanceTracker:
 			self.mu_by_pid[player_id] = delta
 			self.count_by_pid[player_id] = 1
 		else:
-			self.mu_by_pid[player_id] = self.mu_by_pid[player_id] + EWMA_ALPHA * (
+			self.mu_by_pid[player_id] = self.mu_by_pid[player_id] + config_module.EWMA_ALPHA * (
 				delta - self.mu_by_pid[player_id]
 			)
 			self.count_by_pid[player_id] += 1
@@ -73,7 +63,7 @@ class PlayerPerformanceTracker:
 		Returns:
 			The trusted mean delta for this player
 		"""
-		if self.count_by_pid.get(player_id, 0) >= MIN_SAMPLES_PID:
+		if self.count_by_pid.get(player_id, 0) >= config_module.MIN_SAMPLES_PID:
 			return self.mu_by_pid.get(player_id, self.mu_global)
 		return self.mu_global
 
@@ -99,18 +89,22 @@ def calculate_canonical_delta(
 		return 0.0
 
 	# Importance component
-	importance = float(getattr(item, 'importance', 0.0)) * IMPORTANCE_WEIGHT
+	importance = float(getattr(item, 'importance', 0.0)) * config_module.IMPORTANCE_WEIGHT
 
 	if is_repeated:
 		# Repeated items only contribute to monotony (negative)
 		coherence = 0.0
 		freshness = 0.0
-		monotony = -1.0 * MONOTONY_WEIGHT
+		monotony = -1.0 * config_module.MONOTONY_WEIGHT
 	else:
 		# Calculate all components for non-repeated items
-		coherence = calculate_coherence_score(turn_idx, item, history) * COHERENCE_WEIGHT
-		freshness = calculate_freshness_score(turn_idx, item, history) * FRESHNESS_WEIGHT
-		monotony = calculate_monotony_score(turn_idx, item, history) * MONOTONY_WEIGHT
+		coherence = (
+			calculate_coherence_score(turn_idx, item, history) * config_module.COHERENCE_WEIGHT
+		)
+		freshness = (
+			calculate_freshness_score(turn_idx, item, history) * config_module.FRESHNESS_WEIGHT
+		)
+		monotony = calculate_monotony_score(turn_idx, item, history) * config_module.MONOTONY_WEIGHT
 
 	return importance + coherence + freshness - monotony
 
@@ -131,7 +125,7 @@ def calculate_freshness_score(turn_idx: int, item: Item, history: Sequence[Item
 	# Look back FRESHNESS_WINDOW turns before the pause
 	prior_items = [
 		item
-		for item in history[max(0, turn_idx - FRESHNESS_WINDOW - 1) : turn_idx - 1]
+		for item in history[max(0, turn_idx - config_module.FRESHNESS_WINDOW - 1) : turn_idx - 1]
 		if item is not None
 	]
 	prior_subjects = {s for item in prior_items for s in item.subjects}
@@ -161,7 +155,7 @@ def calculate_coherence_score(turn_idx: int, item: Item, history: Sequence[Item
 
 	# Past context (up to COHERENCE_WINDOW, but don't extend across pause boundaries)
 	# Look back up to 3 items, but stop if we hit a pause or start of conversation
-	for j in range(turn_idx - 1, max(-1, turn_idx - COHERENCE_WINDOW - 1), -1):
+	for j in range(turn_idx - 1, max(-1, turn_idx - config_module.COHERENCE_WINDOW - 1), -1):
 		if j < 0:
 			break
 		if history[j] is None:
@@ -171,7 +165,7 @@ def calculate_coherence_score(turn_idx: int, item: Item, history: Sequence[Item
 		context_items.append(history[j])
 
 	# Future context (usually empty at proposal time, but follow same rules)
-	for j in range(turn_idx + 1, min(len(history), turn_idx + COHERENCE_WINDOW + 1)):
+	for j in range(turn_idx + 1, min(len(history), turn_idx + config_module.COHERENCE_WINDOW + 1)):
 		if history[j] is None:
 			# Hit a pause - stop here but don't include the pause
 			break
@@ -225,21 +219,21 @@ def calculate_monotony_score(turn_idx: int, item: Item, history: Sequence[Item |
 		- Apply the spec: if ANY subject of the candidate appears in EACH of the
 			last three non-pause items, return 1.0 (penalty). Otherwise 0.0.
 	"""
-	if turn_idx < MONOTONY_WINDOW:
+	if turn_idx < config_module.MONOTONY_WINDOW:
 		return 0.0
 
 	# Consider only the last MONOTONY_WINDOW non-pause items
 	last_items: list[Item] = []
-	for j in range(turn_idx - 1, max(-1, turn_idx - MONOTONY_WINDOW - 1), -1):
+	for j in range(turn_idx - 1, max(-1, turn_idx - config_module.MONOTONY_WINDOW - 1), -1):
 		prev = history[j]
 		if prev is None:
 			continue
 		last_items.append(prev)
-		if len(last_items) >= MONOTONY_WINDOW:
+		if len(last_items) >= config_module.MONOTONY_WINDOW:
 			break
 
 	# Not enough prior non-pause items to incur a penalty
-	if len(last_items) < MONOTONY_WINDOW:
+	if len(last_items) < config_module.MONOTONY_WINDOW:
 		return 0.0
 
 	# Penalty if ANY subject of the candidate appears in EACH of the last
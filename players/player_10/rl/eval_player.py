@@ -14,7 +14,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..
 sys.path.append(project_root)
 
 # Import after path setup
-from models.player import GameContext, Item, PlayerSnapshot  # noqa: E402
+from models.player import GameContext, Item, Player, PlayerSnapshot, prepare  # noqa: E402
 
 from .player import RLPlayer  # noqa: E402
 
@@ -22,6 +22,10 @@ from .player import RLPlayer  # noqa: E402
 class EvalPlayer(RLPlayer):
 	"""Evaluation player that loads a trained model and uses it for inference."""
 
+	# Set by prepare_class; checkpoints are loaded once per (path, device) and process
+	latest_model: str | None = None
+	checkpoints: dict[tuple[str, str], object] = {}
+
 	def __init__(
 		self,
 		snapshot: PlayerSnapshot,
@@ -43,7 +47,8 @@ class EvalPlayer(RLPlayer):
 
 		# Auto-load latest model if no path provided
 		if model_path is None:
-			model_path = self._find_latest_model()
+			prepare(type(self), ctx)
+			model_path = self.latest_model
 
 		self.model_path = model_path
 
@@ -59,7 +64,31 @@ class EvalPlayer(RLPlayer):
 		# Set to inference mode (not training)
 		self.set_training_mode(False)
 
-	def _find_latest_model(self) -> str:
+	@classmethod
+	def prepare_class(cls, ctx: GameContext) -> None:
+		"""Finds the latest trained model and loads it, once per process."""
+		if cls.latest_model is None:
+			cls.latest_model = cls._find_latest_model()
+			cls._load_checkpoint(cls.latest_model, torch.device('cpu'))
+
+	@classmethod
+	def _load_checkpoint(cls, model_path: str, device: torch.device):
+		key = (model_path, str(device))
+		if key not in cls.checkpoints:
+			cls.checkpoints[key] = torch.load(model_path, map_location=device)
+		return cls.checkpoints[key]
+
+	def reset(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
+		"""Keeps the loaded network when the memory size allows it; reloads otherwise."""
+		if len(snapshot.memory_bank) + 1 != self.policy_network.network[-1].out_features:
+			self.__init__(snapshot, ctx, self.model_path, str(self.device))
+			return
+		Player.__init__(self, snapshot, ctx)
+		self.name = 'RLAgent'
+		self._current_action = None
+
+	@staticmethod
+	def _find_latest_model() -> str:
 		"""Find the latest trained model file."""
 		# Get the directory where this file is located
 		current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -106,7 +135,7 @@ class EvalPlayer(RLPlayer):
 		"""Load model information to determine dimensions."""
 		try:
 			# Load the model state dict
-			checkpoint = torch.load(self.model_path, map_location=self.device)
+			checkpoint = self._load_checkpoint(self.model_path, self.device)
 
 			# Handle different checkpoint formats
 			if isinstance(checkpoint, dict):
@@ -5,6 +5,43 @@ from models.item import Item
 from models.player import Player
 
 
+def get_context(history: list[Item]) -> list[Item]:
+	"""The last three turns of ``history``, cut after a pause: context doesn't extend over it."""
+	context = history[-3:]
+	if None in context:
+		context = context[context.index(None) + 1 :]
+	return context
+
+
+def count_items_with_subject(subjects: tuple[int, ...], player: Player) -> int:
+	if len(subjects) == 1:
+		return player.subject_index.count_with_subject(subjects[0])
+	return player.subject_index.count(subjects)
+
+
+def subjects_counts_sorted(items: list[Item], player: Player) -> list:
+	"""Count occurrences of subjects in items and return them, first sorted by count, second sorted by occurence in player's memory bank."""
+
+	subs_count = Counter()
+	for item in items:
+		if item is not None:
+			subs_count.update(item.subjects)
+			if len(item.subjects) == 2:
+				subs_count[item.subjects] += 1
+	subs_sorted_by_count = sorted(
+		(
+			(tuple(sorted(list(subs))) if isinstance(subs, tuple) else (subs,), count)
+			for subs, count in subs_count.items()
+		),
+		key=lambda x: (
+			-x[1],
+			-count_items_with_subject(x[0], player),
+		),
+	)
+
+	return subs_sorted_by_count
+
+
 class BaseStrategy(ABC):
 	def __init__(self, player: Player) -> None:
 		super().__init__()
@@ -20,35 +57,19 @@ class BaseStrategy(ABC):
 			obs_num = c_len // 3
 		return obs_num
 
-	def _get_subjects_counts_sorted(self, items: list[Item], player: Player) -> list:
-		"""Count occurrences of subjects in items and return them, first sorted by count, second sorted by occurence in player's memory bank."""
-
-		subs_count = Counter()
-		for item in items:
-			if item is not None:
-				subs_count.update(item.subjects)
-				if len(item.subjects) == 2:
-					subs_count[item.subjects] += 1
-		subs_sorted_by_count = sorted(
-			(
-				(tuple(sorted(list(subs))) if isinstance(subs, tuple) else (subs,), count)
-				for subs, count in subs_count.items()
-			),
-			key=lambda x: (
-				-x[1],
-				-self._count_items_with_subject(x[0], player),
-			),
-		)
-
-		return subs_sorted_by_count
-
-	def _count_items_with_subject(self, subjects: tuple[int, ...], player: Player) -> int:
-		count = len(player.sub_to_item[subjects]) if subjects in player.sub_to_item else 0
-		if len(subjects) == 1:
-			for subs, items in player.sub_to_item.items():
-				if len(subs) == 2 and subjects[0] in subs:
-					count += len(items)
-		return count
+	def _items_with_subjects(
+		self, subs: tuple[int, ...], player: Player, with_pairs: bool = True
+	) -> tuple[int, Item | None]:
+		"""
+		Number of unused items matching the context subjects ``subs`` and the most valuable
+		one. With ``with_pairs`` a single subject also matches the pairs that contain it; its
+		single-subject items are then counted twice, like the candidate lists used to.
+		"""
+		index = player.subject_index
+		if with_pairs and len(subs) == 1:
+			count = index.count(subs) + index.count_with_subject(subs[0])
+			return count, index.best_with_subject(subs[0])
+		return index.count(subs), index.best(subs)
 
 	def _get_pref_score(self, item: Item, player: Player) -> float:
 		item_bonuses = [
@@ -8,10 +8,10 @@ from players.player_2.Strategy_1 import Strategy1
 
 
 class CoherentStrategy(BaseStrategy):
-	def __init__(self):
-		super().__init__()
+	def __init__(self, player: Player) -> None:
+		super().__init__(player)
 		self.obs_num = 0
-		self.strategy1 = Strategy1()
+		self.strategy1 = Strategy1(player)
 
 	def propose_item(self, player: Player, history: list[Item]) -> Item | None:
 		turn_nr = len(history) + 1
@@ -23,23 +23,13 @@ class CoherentStrategy(BaseStrategy):
 		if num_p - 1 > c_len // 3:
 			self.obs_num = c_len // 3
 
-		# Remove if proposal was accepted last turn
+		# If our proposal was accepted last turn (the player has removed it already)
 		if turn_nr > 1 and history[-1] is not None and history[-1] == player.last_proposed_item:
 			last_proposed_subjects = tuple(sorted(list(player.last_proposed_item.subjects)))
-			player.sub_to_item[last_proposed_subjects].remove(player.last_proposed_item)
-			if len(player.sub_to_item[last_proposed_subjects]) == 0:
-				del player.sub_to_item[last_proposed_subjects]
 
 			# If we still have items with those subjects, propose the most valuable one
-			if (
-				last_proposed_subjects in player.sub_to_item
-				and len(player.sub_to_item[last_proposed_subjects]) != 0
-			):
-				# print(f"Still have items with subjects {player.sub_to_item[last_proposed_subjects]}")
-				most_valuable_item = max(
-					player.sub_to_item[last_proposed_subjects],
-					key=lambda item: self._get_overall_score(item, player),
-				)
+			if last_proposed_subjects in player.sub_to_item:
+				most_valuable_item = player.subject_index.best(last_proposed_subjects)
 				# print(f"Most valuable item: {most_valuable_item}")
 				player.last_proposed_item = most_valuable_item
 				return most_valuable_item
@@ -59,12 +49,8 @@ class CoherentStrategy(BaseStrategy):
 			return self._freshness(player, history)
 
 		else:
-			context = history[-3:]
-			# Context doesn't extend over pause
-			if None in context:
-				context = context[context.index(None) + 1 :]
-
-			context_subs_sorted = self._get_subjects_counts_sorted(context, player)
+			# Same context as the other strategies, ranked by this strategy's own tie-break
+			context_subs_sorted = self._get_subjects_counts_sorted(player.context, player)
 			# print(f"Sorted: {context_subs_sorted}")
 
 			# Go through all subjects in context, sorted according to frequency in context and then by number of items in own memory bank
@@ -72,29 +58,15 @@ class CoherentStrategy(BaseStrategy):
 			for subs, subs_count in context_subs_sorted:
 				# If a subject already occurred thrice then we don't want to be monotonous
 				if subs_count < 3:
-					items_with_subs = player.sub_to_item.get(subs, []).copy()
 					# If there is only one subject, also get items with two subjects including that subject
-					if len(subs) == 1:
-						# print(f"Also look for items with subject {subs} and another subject")
-						items_with_subs.extend(
-							[
-								item
-								for items_subs, items in player.sub_to_item.items()
-								if subs[0] in items_subs
-								for item in items
-							]
-						)
+					count, most_valuable_item = self._items_with_subjects(subs, player)
 
 					# If the subject only occurred once in the context and we only have one item with this subject, propose it with 50/50 chance
-					if subs_count == 1 and len(items_with_subs) == 1 and random.uniform(0, 1) < 0.7:
+					if subs_count == 1 and count == 1 and random.uniform(0, 1) < 0.7:
 						continue
 
-					# print(f"Items with subjects {subs}: {items_with_subs}")
 					# If we have an item with fitting subjects, propose the most valuable one
-					if items_with_subs:
-						most_valuable_item = max(
-							items_with_subs, key=lambda item: self._get_overall_score(item, player)
-						)
+					if most_valuable_item is not None:
 						player.last_proposed_item = most_valuable_item
 
 						# print(f"Most valuable item: {most_valuable_item}")
@@ -119,7 +91,7 @@ class CoherentStrategy(BaseStrategy):
 			),
 			key=lambda x: (
 				-x[1],
-				-len(player.sub_to_item[x[0]]) if x[0] in player.sub_to_item else 0,
+				-player.subject_index.count(x[0]),
 			),
 		)
 
@@ -169,11 +141,9 @@ class CoherentStrategy(BaseStrategy):
 		return self._greedy(player, history)
 
 	def _greedy(self, player, history) -> Item | None:
-		_, coherent_items = next(iter(player.sub_to_item.items()))
+		key = next(iter(player.sub_to_item))
 
 		# Pick the most valuable item
-		most_valuable_item = max(
-			coherent_items, key=lambda item: self._get_overall_score(item, player)
-		)
+		most_valuable_item = player.subject_index.best(key)
 		player.last_proposed_item = most_valuable_item
 		return most_valuable_item
@@ -21,20 +21,13 @@ class InobservantStrategy(BaseStrategy):
 		if turn_nr > self.trimester * (player.conversation_length + 2) // 3:
 			self.trimester += 1
 
-		# Remove if proposal was accepted last turn
+		# If our proposal was accepted last turn (the player has removed it already)
 		if turn_nr > 1 and history[-1] is not None and history[-1] == player.last_proposed_item:
 			last_proposed_subjects = tuple(sorted(list(player.last_proposed_item.subjects)))
-			self._remove_item_from_dict(player, last_proposed_subjects)
 
 			# If we still have items with those subjects, propose the most valuable one
-			if (
-				last_proposed_subjects in player.sub_to_item
-				and len(player.sub_to_item[last_proposed_subjects]) != 0
-			):
-				most_valuable_item = max(
-					player.sub_to_item[last_proposed_subjects],
-					key=lambda item: self._get_imp_pref_score(item, player),
-				)
+			if last_proposed_subjects in player.sub_to_item:
+				most_valuable_item = player.subject_index.best(last_proposed_subjects)
 				# print(f"Most valuable item: {most_valuable_item}")
 				player.last_proposed_item = most_valuable_item
 				return most_valuable_item
@@ -63,18 +56,6 @@ class InobservantStrategy(BaseStrategy):
 			proposed_item = self._propose_coherently(player, history)
 			return proposed_item
 
-	def _remove_item_from_dict(self, player: Player, subjects: tuple[int, ...]) -> None:
-		player.sub_to_item[subjects].remove(player.last_proposed_item)
-		if len(player.sub_to_item[subjects]) == 0:
-			del player.sub_to_item[subjects]
-
-	def _get_context(self, history: list[Item]) -> list[Item]:
-		context = history[-3:]
-		# Context doesn't extend over pause
-		if None in context:
-			context = context[context.index(None) + 1 :]
-		return context
-
 	# propose freshly - if there is a pause - immediately attempt to take convo back if possible
 	# finds item to maximize freshness
 	# make a copy and sort? Probably a better idea
@@ -98,9 +79,7 @@ class InobservantStrategy(BaseStrategy):
 				if len(filtered_dict[key]) > sub_length:
 					sub_length = len(filtered_dict[key])
 					sub_key = key
-			most_valuable_item = max(
-				filtered_dict[sub_key], key=lambda item: self._get_imp_pref_score(item, player)
-			)
+			most_valuable_item = player.subject_index.best(sub_key)
 			player.last_proposed_item = most_valuable_item
 			return most_valuable_item
 
@@ -110,56 +89,39 @@ class InobservantStrategy(BaseStrategy):
 
 	# always propose item that hopefully can maximize future coherence + with the most importance + preference score
 	def _propose_possible_coherence(self, player) -> Item | None:
-		_, next_items = next(iter(player.sub_to_item.items()))
+		key = next(iter(player.sub_to_item))
 
 		# Pick the most valuable item
-		most_valuable_item = max(
-			next_items, key=lambda item: self._get_imp_pref_score(item, player)
-		)
+		most_valuable_item = player.subject_index.best(key)
 		player.last_proposed_item = most_valuable_item
 		return most_valuable_item
 
 	# proposes an item that is coherent
 	def _propose_coherently(self, player, history) -> Item | None:
-		context = self._get_context(history)
-
-		context_subs_sorted = self._get_subjects_counts_sorted(context, player)
+		context_subs_sorted = player.context_subs_sorted
 		# Go through all subjects in context, sorted according to frequency in context and then by number of items in own memory bank
 		# If there are no items in memory bank that match the subjects in context, then pause
 		for subs, subs_count in context_subs_sorted:
 			# If a subject already occurred thrice then we don't want to be monotonous
 			# if subject was repeated 3 times even if contained in 2 subject item
 			if subs_count < 3:
-				items_with_subs = player.sub_to_item.get(subs, []).copy()
 				# If there is only one subject, also get items with two subjects including that subject
-				if len(subs) == 1:
-					# print(f"Also look for items with subject {subs} and another subject")
-					items_with_subs.extend(
-						[
-							item
-							for items_subs, items in player.sub_to_item.items()
-							if subs[0] in items_subs
-							for item in items
-						]
-					)
+				count, most_valuable_item = self._items_with_subjects(subs, player)
 
 				# If the subject only occurred once in the context and we only have one item with this subject, propose it if it meets the threshold, or we said the last item
 				if (
 					subs_count == 1
-					and len(items_with_subs) == 1
+					and count == 1
 					and (
-						items_with_subs[0].importance > self.min_imp_pref_score
+						most_valuable_item.importance > self.min_imp_pref_score
 						or (history[-1] is not None and history[-1].player_id == player.id)
 					)
 				):
-					player.last_proposed_item = items_with_subs[0]
-					return items_with_subs[0]
+					player.last_proposed_item = most_valuable_item
+					return most_valuable_item
 
 				# If we have an item with fitting subjects, propose the most valuable one
-				if items_with_subs:
-					most_valuable_item = max(
-						items_with_subs, key=lambda item: self._get_imp_pref_score(item, player)
-					)
+				if most_valuable_item is not None:
 					player.last_proposed_item = most_valuable_item
 					return most_valuable_item
 
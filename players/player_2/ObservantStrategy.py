@@ -26,18 +26,13 @@ class ObservantStrategy(BaseStrategy):
 		if turn_nr > self.trimester * (player.conversation_length + 2) // 3:
 			self.trimester += 1
 
-		# Remove if proposal was accepted last turn
+		# If our proposal was accepted last turn (the player has removed it already)
 		if turn_nr > 1 and history[-1] is not None and history[-1] == player.last_proposed_item:
 			last_proposed_subjects = tuple(sorted(list(player.last_proposed_item.subjects)))
-			self._remove_item_from_dict(player, last_proposed_subjects)
 
 			# If we still have items with those subjects, propose the most valuable one
-			if (
-				last_proposed_subjects in player.sub_to_item
-				and len(player.sub_to_item[last_proposed_subjects]) != 0
-			):
-				context = self._get_context(history)
-				context_subs_sorted = dict(self._get_subjects_counts_sorted(context, player))
+			if last_proposed_subjects in player.sub_to_item:
+				context_subs_sorted = dict(player.context_subs_sorted)
 
 				# Don't propose if it would lead to monotonous conversation
 				if (
@@ -51,10 +46,7 @@ class ObservantStrategy(BaseStrategy):
 						return None
 
 				# If not monotonous, propose most valuable item with those subjects
-				most_valuable_item = max(
-					player.sub_to_item[last_proposed_subjects],
-					key=lambda item: self._get_imp_pref_score(item, player),
-				)
+				most_valuable_item = player.subject_index.best(last_proposed_subjects)
 
 				player.last_proposed_item = most_valuable_item
 				return most_valuable_item
@@ -75,7 +67,7 @@ class ObservantStrategy(BaseStrategy):
 			return proposed_item
 
 		# space out usage by saving items for later trimesters, unless 2 pauses occur - then go for it
-		unused_size = sum(len(v) for v in player.sub_to_item.values())
+		unused_size = len(player.subject_index)
 		if (
 			unused_size < player.memory_bank_size * (3 - self.trimester) // 3
 			and history[-1] is not None
@@ -87,22 +79,9 @@ class ObservantStrategy(BaseStrategy):
 			proposed_item = self._propose_coherently(player, history)
 			return proposed_item
 
-	def _remove_item_from_dict(self, player: Player, subjects: tuple[int, ...]) -> None:
-		player.sub_to_item[subjects].remove(player.last_proposed_item)
-		if len(player.sub_to_item[subjects]) == 0:
-			del player.sub_to_item[subjects]
-
-	def _get_context(self, history: list[Item]) -> list[Item]:
-		context = history[-3:]
-		# Context doesn't extend over pause
-		if None in context:
-			context = context[context.index(None) + 1 :]
-		return context
-
 	def _propose_coherently(self, player, history) -> Item | None:
-		context = self._get_context(history)
-
-		context_subs_sorted = self._get_subjects_counts_sorted(context, player)
+		# A copy: the counts below are adjusted, and the other strategies share the original
+		context_subs_sorted = list(player.context_subs_sorted)
 
 		# Go through all subjects in context, sorted according to frequency in context and then by number of items in own memory bank
 		# If there are no items in memory bank that match the subjects in context, then pause
@@ -116,38 +95,27 @@ class ObservantStrategy(BaseStrategy):
 			# If a subject already occurred thrice then we don't want to be monotonous
 			# if subject was repeated 3 times even if contained in 2 subject item
 			if subs_count < 3:
-				items_with_subs = player.sub_to_item.get(subs, []).copy()
 				# If there is only one subject, also get items with two subjects including that subject
-				if (
-					self.memory_size_avg_turns_ratio < self.memory_size_avg_turns_threshold
-					and len(subs) == 1
-				):
-					items_with_subs.extend(
-						[
-							item
-							for items_subs, items in player.sub_to_item.items()
-							if subs[0] in items_subs
-							for item in items
-						]
-					)
+				count, most_valuable_item = self._items_with_subjects(
+					subs,
+					player,
+					with_pairs=self.memory_size_avg_turns_ratio
+					< self.memory_size_avg_turns_threshold,
+				)
 
 				# If the subject only occurred once in the context and we only have one item with this subject, propose it only if it meets a minimum score threshold
 				if (
 					subs_count == 1
-					and len(items_with_subs) == 1
-					and self._get_imp_pref_score(items_with_subs[0], player)
+					and count == 1
+					and self._get_imp_pref_score(most_valuable_item, player)
 					> self.min_imp_pref_score
-					and self._get_pref_score(items_with_subs[0], player) > self.min_pref_score
+					and self._get_pref_score(most_valuable_item, player) > self.min_pref_score
 				):
-					player.last_proposed_item = items_with_subs[0]
-					return items_with_subs[0]
+					player.last_proposed_item = most_valuable_item
+					return most_valuable_item
 
 				# If we have an item with fitting subjects, propose the most valuable one
-				if items_with_subs:
-					most_valuable_item = max(
-						items_with_subs, key=lambda item: self._get_imp_pref_score(item, player)
-					)
-
+				if most_valuable_item is not None:
 					player.last_proposed_item = most_valuable_item
 					return most_valuable_item
 
@@ -172,9 +140,7 @@ class ObservantStrategy(BaseStrategy):
 				if len(filtered_dict[key]) > sub_length:
 					sub_length = len(filtered_dict[key])
 					sub_key = key
-			most_valuable_item = max(
-				filtered_dict[sub_key], key=lambda item: self._get_imp_pref_score(item, player)
-			)
+			most_valuable_item = player.subject_index.best(sub_key)
 			player.last_proposed_item = most_valuable_item
 			return most_valuable_item
 		# otherwise if there were two options - propose "greedily" to prevent a premature conversation end
@@ -183,11 +149,9 @@ class ObservantStrategy(BaseStrategy):
 		return None
 
 	def _propose_possible_coherence(self, player) -> Item | None:
-		_, coherent_items = next(iter(player.sub_to_item.items()))
+		key = next(iter(player.sub_to_item))
 
 		# Pick the most valuable item
-		most_valuable_item = max(
-			coherent_items, key=lambda item: self._get_imp_pref_score(item, player)
-		)
+		most_valuable_item = player.subject_index.best(key)
 		player.last_proposed_item = most_valuable_item
 		return most_valuable_item
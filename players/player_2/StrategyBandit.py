@@ -0,0 +1,55 @@
+import math
+
+
+class StrategyBandit:
+	"""
+	UCB1 choice among Player2's strategies. Every strategy proposes on every turn, so each
+	turn rewards all arms it has a value for, not only the one followed: the followed arm
+	gets what the turn actually scored (holding back and letting a better item be said
+	counts as well as proposing), the others the counterfactual delta of their proposal.
+	Arms without a reward yet are played first, and exploration is scaled to the range of
+	the rewards seen, which is not [0, 1] here.
+	"""
+
+	def __init__(self, arms: list[str], exploration: float = 1.0, default: str | None = None):
+		self.arms = list(arms)
+		self.exploration = exploration
+		self.default = default or self.arms[0]
+		self.turns = 0
+		self.counts = dict.fromkeys(self.arms, 0)
+		self.sums = dict.fromkeys(self.arms, 0.0)
+		self.selected = dict.fromkeys(self.arms, 0)
+		self.low = math.inf
+		self.high = -math.inf
+
+	def mean(self, arm: str) -> float:
+		return self.sums[arm] / self.counts[arm] if self.counts[arm] else 0.0
+
+	def select(self) -> str:
+		untried = [arm for arm in self.arms if not self.counts[arm]]
+		if untried:
+			arm = self.default if self.default in untried else untried[0]
+		else:
+			scale = self.exploration * (self.high - self.low)
+			log_turns = math.log(self.turns)
+			arm = max(
+				self.arms,
+				key=lambda a: self.mean(a) + scale * math.sqrt(2 * log_turns / self.counts[a]),
+			)
+		self.selected[arm] += 1
+		return arm
+
+	def update(self, rewards: dict[str, float]) -> None:
+		"""One turn's rewards, for every arm that has one."""
+		self.turns += 1
+		for arm, reward in rewards.items():
+			self.counts[arm] += 1
+			self.sums[arm] += reward
+			self.low = min(self.low, reward)
+			self.high = max(self.high, reward)
+
+	def summary(self) -> dict[str, dict[str, float]]:
+		return {
+			arm: {'selected': self.selected[arm], 'mean_reward': self.mean(arm)}
+			for arm in self.arms
+		}
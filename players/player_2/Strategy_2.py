@@ -15,13 +15,8 @@ class Strategy2(BaseStrategy):
 		if len(history) == 0:
 			return self._best_option_(player, player.sub_to_item)
 
+		# items said in the previous round are already removed from the subject lists
 		if history[-1] is not None:
-			# we need to remove item from current suject list if it was said in prev room
-			subjects = tuple(sorted(list(history[-1].subjects)))
-			if subjects in player.sub_to_item and history[-1] in player.sub_to_item[subjects]:
-				player.sub_to_item[subjects].pop()
-				if len(player.sub_to_item[subjects]) == 0:
-					del player.sub_to_item[subjects]
 			return None
 
 		# if history's last item was 'None' aka there was a pause -->
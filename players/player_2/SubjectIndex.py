@@ -0,0 +1,80 @@
+import heapq
+from collections import Counter
+from collections.abc import Callable
+from uuid import UUID
+
+from models.item import Item
+
+
+class SubjectIndex:
+	"""
+	Inverted index over the unused items of a memory bank, shared by every strategy.
+
+	Items are indexed under their subject key (the sorted subject tuple, as in
+	``sub_to_item``) and under each of their subjects, so the key ``(s,)`` finds the
+	single-subject items and ``with_subject(s)`` also the pairs containing ``s``. Each entry
+	is a max-heap ordered by the item's overall score; removal is lazy, so used items are
+	only dropped when they reach the top of a heap. The ``sub_to_item`` dict is kept in sync.
+	"""
+
+	def __init__(self, sub_to_item: dict, score: Callable[[Item], float]) -> None:
+		self.sub_to_item = sub_to_item
+		self.keys: dict[UUID, tuple[int, ...]] = {}
+		self.by_key: dict[tuple[int, ...], list] = {}
+		self.by_subject: dict[int, list] = {}
+		self.key_counts: Counter[tuple[int, ...]] = Counter()
+		self.subject_counts: Counter[int] = Counter()
+
+		order = 0
+		for key, items in sub_to_item.items():
+			for item in items:
+				# The order breaks ties like max() over the lists did: first one wins
+				entry = (-score(item), order, item)
+				order += 1
+				self.keys[item.id] = key
+				self.by_key.setdefault(key, []).append(entry)
+				self.key_counts[key] += 1
+				for subject in key:
+					self.by_subject.setdefault(subject, []).append(entry)
+					self.subject_counts[subject] += 1
+
+		for heap in (*self.by_key.values(), *self.by_subject.values()):
+			heapq.heapify(heap)
+
+	def __len__(self) -> int:
+		return len(self.keys)
+
+	def __contains__(self, item: Item | None) -> bool:
+		return item is not None and item.id in self.keys
+
+	def remove(self, item: Item) -> None:
+		"""Marks an accepted item as used (once); its heap entries are dropped lazily."""
+		key = self.keys.pop(item.id, None)
+		if key is None:
+			return
+
+		self.sub_to_item[key].remove(item)
+		if not self.sub_to_item[key]:
+			del self.sub_to_item[key]
+		self.key_counts[key] -= 1
+		for subject in key:
+			self.subject_counts[subject] -= 1
+
+	def _top(self, heap: list | None) -> Item | None:
+		while heap and heap[0][2].id not in self.keys:
+			heapq.heappop(heap)
+		return heap[0][2] if heap else None
+
+	def best(self, key: tuple[int, ...]) -> Item | None:
+		"""Highest scoring unused item with exactly the subjects ``key``."""
+		return self._top(self.by_key.get(key))
+
+	def best_with_subject(self, subject: int) -> Item | None:
+		"""Highest scoring unused item that has ``subject`` among its subjects."""
+		return self._top(self.by_subject.get(subject))
+
+	def count(self, key: tuple[int, ...]) -> int:
+		return self.key_counts[key]
+
+	def count_with_subject(self, subject: int) -> int:
+		return self.subject_counts[subject]
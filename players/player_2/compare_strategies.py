@@ -0,0 +1,122 @@
+"""
+Compares all of Player2's strategies in one batch of games.
+
+Player2 runs with ``online_selection``, so every strategy proposes on every turn and the
+counterfactual delta of each proposal is recorded while the bandit picks whose proposal is
+made. Replaces a separate ``run_simulation.sh`` sweep per strategy.
+
+Usage:
+	python -m players.player_2.compare_strategies --player p2 2 --player pr 4 --length 50 \\
+		--games 20
+"""
+
+import argparse
+import contextlib
+import io
+import random
+from collections import defaultdict
+
+import numpy as np
+
+from core.engine import Engine
+from players.player_2.player import Player2
+from tournament.registry import counts_from_flags, resolve_roster, roster_from_counts
+
+
+class OnlinePlayer2(Player2):
+	online_selection = True
+
+
+def compare(
+	roster: tuple[str, ...],
+	games: int,
+	subjects: int = 20,
+	memory_size: int = 10,
+	length: int = 50,
+	seed: int = 0,
+) -> dict[str, dict[str, float]]:
+	"""Per strategy: proposals per turn, mean counterfactual delta and share of turns followed."""
+	players = [
+		OnlinePlayer2 if code == 'p2' else cls
+		for code, cls in zip(roster, resolve_roster(roster), strict=True)
+	]
+	turns = 0
+	proposals: dict[str, int] = defaultdict(int)
+	deltas: dict[str, float] = defaultdict(float)
+	followed: dict[str, int] = defaultdict(int)
+
+	for game in range(games):
+		random.seed(seed + game)
+		np.random.seed(seed + game)
+		engine = Engine(
+			players=players,
+			player_count=len(roster),
+			subjects=subjects,
+			memory_size=memory_size,
+			conversation_length=length,
+		)
+		with contextlib.redirect_stdout(io.StringIO()):
+			engine.run(engine.players, record=False)
+
+		for player in engine.players:
+			if not isinstance(player, OnlinePlayer2):
+				continue
+			turns += len(player.strategy_deltas)
+			for turn in player.strategy_deltas:
+				for name, delta in turn.items():
+					proposals[name] += 1
+					deltas[name] += delta
+			for name, stats in player.bandit.summary().items():
+				followed[name] += stats['selected']
+
+	return {
+		name: {
+			'proposals': proposals[name] / turns if turns else 0.0,
+			'mean_delta': deltas[name] / proposals[name] if proposals[name] else 0.0,
+			'followed': followed[name] / turns if turns else 0.0,
+		}
+		for name in followed
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compare Player2's strategies in one batch.")
+	parser.add_argument(
+		'--player',
+		action='append',
+		nargs=2,
+		metavar=('TYPE', 'COUNT'),
+		help='Set the count for a specific player type (e.g., --player p2 2)',
+	)
+	parser.add_argument('--subjects', type=int, default=20)
+	parser.add_argument('--memory_size', type=int, default=10)
+	parser.add_argument('--length', type=int, default=50)
+	parser.add_argument('--games', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args()
+
+	try:
+		counts = counts_from_flags(args.player)
+	except ValueError as e:
+		parser.error(str(e))
+	if not counts.get('p2'):
+		parser.error('the roster has no Player2 (--player p2 N)')
+
+	results = compare(
+		roster_from_counts(counts),
+		args.games,
+		subjects=args.subjects,
+		memory_size=args.memory_size,
+		length=args.length,
+		seed=args.seed,
+	)
+	print(f'{"strategy":>20}  {"proposals/turn":>14}  {"mean delta":>10}  {"followed":>8}')
+	for name, row in sorted(results.items(), key=lambda x: -x[1]['mean_delta']):
+		print(
+			f'{name:>20}  {row["proposals"]:>14.3f}  {row["mean_delta"]:>10.4f}  '
+			f'{row["followed"]:>8.3f}'
+		)
+
+
+if __name__ == '__main__':
+	main()
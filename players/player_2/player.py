@@ -1,11 +1,26 @@
 from collections import Counter
 
+from core.scoring import HistoryView, delta_scores
 from models.player import GameContext, Item, Player, PlayerSnapshot
-from players.player_2.BaseStrategy import BaseStrategy
+from players.player_2.BaseStrategy import BaseStrategy, get_context, subjects_counts_sorted
+from players.player_2.CoherentStrategy import CoherentStrategy
+from players.player_2.InobservantStrategy import InobservantStrategy
 from players.player_2.ObservantStrategy import ObservantStrategy
+from players.player_2.Strategy_1 import Strategy1
+from players.player_2.Strategy_2 import Strategy2
+from players.player_2.Strategy_3 import Strategy3
+from players.player_2.Strategy_4 import Strategy4
+from players.player_2.StrategyBandit import StrategyBandit
+from players.player_2.SubjectIndex import SubjectIndex
 
 
 class Player2(Player):
+	# Run every strategy each turn, record what each proposal would score and let a bandit
+	# pick whose proposal to make, instead of following the strategy chosen for the game.
+	# Off by default: within one game it does not beat the static choice yet, but it lets
+	# one batch run compare all strategies (see compare_strategies.py)
+	online_selection: bool = False
+
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:  # noqa: F821
 		super().__init__(snapshot, ctx)
 		self.snapshot = snapshot
@@ -22,20 +37,103 @@ class Player2(Player):
 		self.min_threshold: float = 1.0
 
 		self.sub_to_item: dict = self._init_sub_to_item()
+		self.subject_index = SubjectIndex(self.sub_to_item, self._get_overall_score)
 		self.last_proposed_item: Item = None
+		# This turn's context and its subjects ranked by count, shared by the strategies
+		self.context: list[Item] = []
+		self.context_subs_sorted: list = []
 
 		self._compute_strategy_features()
 		self._choose_strategy()
 
+		self.strategies: dict[str, BaseStrategy] = {}
+		if self.online_selection:
+			self._init_strategies()
+
 	def propose_item(self, history: list[Item]) -> Item | None:
 		self.turn_nr += 1
 		self._get_group_scores_per_turn(history)
 
-		return self.current_strategy.propose_item(self, history)
+		# Our items can only be said by us: remove the last one once, for every strategy
+		if history and history[-1] in self.subject_index:
+			self.subject_index.remove(history[-1])
+
+		self.context = get_context(history)
+		self.context_subs_sorted = subjects_counts_sorted(self.context, self)
+
+		if not self.online_selection:
+			return self.current_strategy.propose_item(self, history)
+		return self._propose_online(history)
 
 	def _choose_strategy(self):
 		self.current_strategy = ObservantStrategy(self, min_threshold=1.5)
 
+	def _init_strategies(self):
+		for strategy in (
+			self.current_strategy,
+			InobservantStrategy(self),
+			CoherentStrategy(self),
+			Strategy1(self),
+			Strategy2(self),
+			Strategy3(self),
+			Strategy4(self),
+		):
+			self.strategies[type(strategy).__name__] = strategy
+		self.bandit = StrategyBandit(
+			list(self.strategies), default=type(self.current_strategy).__name__
+		)
+		self.history_view = HistoryView()
+		self.followed: str | None = None
+		# Per turn: strategy name -> counterfactual score delta of its proposal
+		self.strategy_deltas: list[dict[str, float]] = []
+
+	def _propose_online(self, history: list[Item]) -> Item | None:
+		"""
+		Runs every strategy on this turn, so their state stays current and their proposals
+		can be scored together, records each proposal's counterfactual delta (the change in
+		our score, shared plus individual bonus, had it been said next) and follows the
+		strategy the bandit selects.
+		"""
+		# Nothing left to say (some strategies do not check for it themselves)
+		if not self.subject_index:
+			return None
+
+		# Reward the strategies for last turn: the followed one (and any that held back with
+		# it) with what the turn scored for us, the others with their proposal's delta
+		view = self.history_view
+		if self.followed is not None and view.cursor == len(history) - 1:
+			said = history[-1]
+			reward = 0.0 if said is None else delta_scores(view, [said])[0] + self._bonus(said)
+			rewards = dict(self.strategy_deltas[-1])
+			if self.followed not in rewards:
+				rewards.update((name, reward) for name in self.strategies if name not in rewards)
+			rewards[self.followed] = reward
+			self.bandit.update(rewards)
+
+		last_proposed_item = self.last_proposed_item
+		proposals: dict[str, Item | None] = {}
+		for name, strategy in self.strategies.items():
+			# Each strategy sees the proposal we actually made last turn
+			self.last_proposed_item = last_proposed_item
+			proposals[name] = strategy.propose_item(self, history)
+
+		view.sync(history)
+		candidates = list({item.id: item for item in proposals.values() if item}.values())
+		deltas = {}
+		if candidates:
+			shared = delta_scores(view, candidates)
+			for item, delta in zip(candidates, shared.tolist(), strict=True):
+				deltas[item.id] = delta + self._bonus(item)
+
+		self.strategy_deltas.append(
+			{name: deltas[item.id] for name, item in proposals.items() if item}
+		)
+		self.followed = self.bandit.select()
+		chosen = proposals[self.followed]
+
+		self.last_proposed_item = chosen or last_proposed_item
+		return chosen
+
 	def _init_sub_to_item(self):
 		sub_to_item = {}
 		for item in self.memory_bank:
@@ -47,6 +145,17 @@ class Player2(Player):
 		# Sorted according to number of items in memory bank
 		return dict(sorted(sub_to_item.items(), key=lambda x: len(x[1]), reverse=True))
 
+	def _bonus(self, item: Item) -> float:
+		"""Our individual bonus for ``item`` being said."""
+		item_bonuses = [
+			1 - (self.preferences.index(sub)) / self.subject_num for sub in item.subjects
+		]
+		return sum(item_bonuses) / len(item_bonuses)
+
+	def _get_overall_score(self, item: Item) -> float:
+		"""Importance plus the individual bonus: the order of the subject index heaps."""
+		return item.importance + self._bonus(item)
+
 	# Taken and adapted from engine.py
 	def _calculate_freshness_score(self, i: int, current_item: Item, history) -> float:
 		if i == 0 or history[i - 2] is not None:
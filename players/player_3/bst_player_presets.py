@@ -1,192 +1,255 @@
-import heapq
+import time
+from collections import OrderedDict
 
+import numpy as np
+
+from models.item import union_mask
 from models.player import GameContext, Item, Player, PlayerSnapshot
 
 from .utils import ConversationScorer
 
 DEFAULT_SPEAK_PANELTY = 0
+ROOT = 0
+PAUSE = -1  # item index of pause nodes (and of the root)
+SCORE_WINDOW = 6  # turns before a position that its shared score depends on
 
 
-class BayesianTreeNode:
-	def __init__(self, prior_probability, memory, score, father=None):
-		self.prior_probability = prior_probability
-		self.memory = memory
-		self.score = score
-		self.father = father
-		self.childs = []
-		# self.max_post_expectation = None
-		# self.best_child = None
-
-	def is_leaf(self):
-		return len(self.childs) == 0
+class BayesianTree:
+	"""
+	Search tree stored in preallocated NumPy arrays, one row per node (row 0 is the root).
 
+	Besides its father, item and prior probability, each node carries the probability-
+	weighted score sum and the probability sum over the items of its path from the root, so
+	the normalised expectation of a path is O(1), and the child of the root the path starts
+	with. Pauses add nothing to the sums.
+	"""
 
-class BayesianTree:
-	def __init__(self, decay_rate=0.5, root_probability=1):  ##
+	def __init__(self, capacity, decay_rate=0.5, root_probability=1):  ##
 		self.decay_rate = decay_rate
-		self.size = 0
 		self.root_probability = root_probability
-		self.root = None
-
-	def get_child_probability(self, node: BayesianTreeNode):
-		return node.prior_probability * self.decay_rate
-
-	def add_node(self, father=None, memory=None, score=None):
-		if self.root is None:
-			prior_probability = self.root_probability
-		else:
-			prior_probability = self.get_child_probability(father)
-
-		node = BayesianTreeNode(
-			prior_probability=prior_probability,
-			memory=memory,
-			score=score,
-			# prior_expectation=father.prior_expectation + prior_probability * score,
-			father=father,
-		)
-		if self.root is None:
-			self.root = node
+		self.size = 0
+		self.father = np.empty(capacity, dtype=np.int32)
+		self.item = np.empty(capacity, dtype=np.int32)
+		self.prior_probability = np.empty(capacity)
+		self.weighted_sum = np.empty(capacity)
+		self.probability_sum = np.empty(capacity)
+		self.first = np.empty(capacity, dtype=np.int32)
+
+	def _reserve(self, rows: int) -> None:
+		capacity = len(self.father)
+		if self.size + rows <= capacity:
+			return
+		capacity = max(2 * capacity, self.size + rows)
+		for name in (
+			'father',
+			'item',
+			'prior_probability',
+			'weighted_sum',
+			'probability_sum',
+			'first',
+		):
+			column = getattr(self, name)
+			grown = np.empty(capacity, dtype=column.dtype)
+			grown[: self.size] = column[: self.size]
+			setattr(self, name, grown)
+
+	def add_root(self) -> int:
+		self.father[ROOT] = -1
+		self.item[ROOT] = PAUSE
+		self.prior_probability[ROOT] = self.root_probability
+		self.weighted_sum[ROOT] = self.probability_sum[ROOT] = 0.0
+		self.first[ROOT] = -1
+		self.size = 1
+		return ROOT
+
+	def add_children(self, father: int, scores: np.ndarray) -> np.ndarray:
+		"""
+		Adds one child per searched item (``scores[i]`` for item ``i``) and a pause child
+		after them. Returns their rows.
+		"""
+		self._reserve(len(scores) + 1)
+		start, n = self.size, len(scores)
+		rows = np.arange(start, start + n + 1)
+		items = slice(start, start + n)
+		probability = self.prior_probability[father] * self.decay_rate
+
+		self.father[rows] = father
+		self.item[items] = np.arange(n)
+		self.item[start + n] = PAUSE
+		self.prior_probability[rows] = probability
+		self.weighted_sum[items] = self.weighted_sum[father] + probability * scores
+		self.probability_sum[items] = self.probability_sum[father] + probability
+		self.weighted_sum[start + n] = self.weighted_sum[father]
+		self.probability_sum[start + n] = self.probability_sum[father]
+		self.first[rows] = rows if father == ROOT else self.first[father]
+
+		self.size += n + 1
+		return rows
+
+	def expectation(self, nodes: np.ndarray) -> np.ndarray:
+		"""Probability-weighted mean score of the items on each node's path."""
+		probability_sum = self.probability_sum[nodes]
+		weighted_sum = self.weighted_sum[nodes]
+		safe = np.where(probability_sum == 0.0, 1.0, probability_sum)
+		return np.where(probability_sum == 0.0, 0.0, weighted_sum / safe)
+
+	def branch_items(self, node: int) -> list[int]:
+		"""Items on the path from the root to ``node``, in order."""
+		items = []
+		while node != ROOT:
+			if self.item[node] != PAUSE:
+				items.append(int(self.item[node]))
+			node = self.father[node]
+		return items[::-1]
+
+
+class TranspositionTable:
+	"""
+	Bounded LRU cache of item scores, shared by the searches of one player across turns.
+
+	Besides the item, its score only depends on whether it was said already, the
+	competition rate and a few subjects just before it (see ``window``), so every branch
+	that reaches the same window reuses it.
+	"""
+
+	def __init__(self, maxsize=100_000):
+		self.maxsize = maxsize
+		self.entries: OrderedDict = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	@staticmethod
+	def window(context: list[Item | None]) -> tuple:
+		"""
+		After a pause, the subjects of the turns before it that freshness looks at. Otherwise
+		the subjects of each item back to the last pause, at most three: coherence counts
+		them and, once there are three, monotony checks them.
+		"""
+		if context and context[-1] is None:
+			return (None, union_mask(context[-SCORE_WINDOW:-1]))
+		run = []
+		for x in reversed(context[-3:]):
+			if x is None:
+				break
+			run.append(x.subject_mask)
+		return tuple(sorted(run))
+
+	def get(self, key):
+		score = self.entries.get(key)
+		if score is None:
+			self.misses += 1
 		else:
-			father.childs.append(node)
-
-		return node
+			self.hits += 1
+			self.entries.move_to_end(key)
+		return score
 
-	def remove_node(self, node):
-		# Guard: do not remove root or parentless nodes
-		if node is None or node.father is None:
-			return
-		if node in node.father.childs:
-			node.father.childs.remove(node)
-		node.father = None
-		del node
-
-	def leaf_branch_backward_prunning(self, node):
-		# if not node.is_leaf():
-		if node is None or not node.is_leaf():
-			return None
-		father = node.father
-		self.remove_node(node)
-		# Stop if we've reached the root or lost the parent
-		if father is None:
-			return None
-		self.leaf_branch_backward_prunning(father)
+	def put(self, key, score) -> None:
+		self.entries[key] = score
+		if len(self.entries) > self.maxsize:
+			self.entries.popitem(last=False)
 
 
 class BayesianTreeBeamSearch:
-	def __init__(self, scorer, depth, width=None, breadth=None, initial_context_stack=None):
+	def __init__(
+		self,
+		scorer,
+		depth,
+		width=None,
+		breadth=None,
+		initial_context_stack=None,
+		table: TranspositionTable | None = None,
+		deadline: float | None = None,
+	):
 		self.context_stack = initial_context_stack if initial_context_stack is not None else []
 		self.scorer = scorer
 		self.depth = depth
 		# allow alias breadth for width
 		self.width = breadth if breadth is not None else (width if width is not None else 1)
-		# self.decay_rate = decay_rate
-		# self.search_tree = BayesianTree(decay_rate)
-
-	def _find_top_nodes(self, nodes, start_node):
-		heap = []
-		for node in nodes:
-			score = self._compute_normalized_expectation(node, start_node)
-			# Previously skipped pauses/root (no memory):
-			# if node.memory is None:
-			#     continue
-			heap.append((score, id(node), node))
-		heapq.heapify(heap)
-		top_items = heapq.nlargest(self.width, heap)
-		# top_nodes = [item[1] for item in top_items]
-		top_nodes = [item[2] for item in top_items]
-		return top_nodes
-
-	def _tree_branch_to_list(self, end_node, tail_node):
-		li = []
-		node = end_node
-		# while node.father != tail_node:
-		while node is not None and node != tail_node:
-			li.append(node)
-			node = node.father
-		return list(reversed(li))
-
-	def _compute_normalized_expectation(self, end_node, tail_node):
-		path_nodes = self._tree_branch_to_list(end_node, tail_node)
-		weighted_sum = 0.0
-		prob_sum = 0.0
-		for node in path_nodes:
-			if node.memory is None:
-				continue
-			if node.score is None:
-				continue
-			weighted_sum += node.prior_probability * node.score
-			prob_sum += node.prior_probability
-		if prob_sum == 0.0:
-			return 0.0
-		return weighted_sum / prob_sum
-
-	def forward_construct_search_tree(self, items, tree: BayesianTree, start_node=None):
-		if start_node is None:
-			start_node = tree.root
+		self.table = table
+		# time.perf_counter() after which no further level is started or finished
+		self.deadline = deadline
+		self.completed_depth = 0
+
+	def _score_items(self, items, context_stack, used) -> np.ndarray:
+		if self.table is None:
+			return np.array([self.scorer.evaluate(item, context_stack, used) for item in items])
+
+		window = (self.scorer.competition_rate, TranspositionTable.window(context_stack))
+		scores = np.empty(len(items))
+		for i, item in enumerate(items):
+			key = (window, item.id, item.id in used)
+			score = self.table.get(key)
+			if score is None:
+				score = self.scorer.evaluate(item, context_stack, used)
+				self.table.put(key, score)
+			scores[i] = score
+		return scores
+
+	def _find_top_nodes(self, nodes: np.ndarray, tree: BayesianTree) -> np.ndarray:
+		if len(nodes) <= self.width:
+			return nodes
+		top = np.argpartition(-tree.expectation(nodes), self.width - 1)[: self.width]
+		return nodes[top]
+
+	def _out_of_time(self) -> bool:
+		return self.deadline is not None and time.perf_counter() > self.deadline
+
+	def forward_construct_search_tree(self, items, tree: BayesianTree) -> np.ndarray:
+		"""
+		Expands the beam level by level. Returns the rows of every node kept in a beam.
 
-		leaves = [start_node]
+		Each completed level finishes a search of that depth, as the beam of a shallower
+		search is the same, so deepening continues the tree instead of restarting it. Past
+		the deadline the level under way is dropped; the first level always completes.
+		"""
 		context_stack = self.context_stack
-		depth = 0
+		used = {item.id for item in context_stack if item is not None}
+		leaves = np.array([ROOT])
+		kept = []
 
-		while leaves and depth < self.depth:
+		for level in range(self.depth):
 			next_level_candidates = []
-			for leaf in leaves:
+			for leaf in leaves.tolist():
+				if level and self._out_of_time():
+					return np.concatenate(kept)
 				# Stop expanding once a pause has been chosen, preserving branch length
-				if leaf.memory is None and leaf is not start_node:
-					next_level_candidates.append(leaf)
+				if leaf != ROOT and tree.item[leaf] == PAUSE:
+					next_level_candidates.append(np.array([leaf]))
 					continue
 
-				branch_nodes = self._tree_branch_to_list(leaf, start_node)
-				branch_items = [n.memory for n in branch_nodes if n.memory is not None]
+				branch_items = [items[i] for i in tree.branch_items(leaf)]
 				context_stack.extend(branch_items)
+				branch_used = used | {item.id for item in branch_items}
 
-				for item in items:
-					score = self.scorer.evaluate(item, context_stack)
-					next_level_candidates.append(tree.add_node(leaf, item, score))
-
-				# Insert pause without trimming it in later iterations
-				pause_node = tree.add_node(leaf, None, 0.0)
-				next_level_candidates.append(pause_node)
+				scores = self._score_items(items, context_stack, branch_used)
+				next_level_candidates.append(tree.add_children(leaf, scores))
 
 				if branch_items:
 					del context_stack[-len(branch_items) :]
 
 			# Select top candidates; pause nodes stay if selected here
-			leaves = self._find_top_nodes(next_level_candidates, start_node)
-
-			# Remove dominated branches except explicitly retained pause leaves
-			for node in next_level_candidates:
-				if node not in leaves and node.memory is not None:
-					tree.leaf_branch_backward_prunning(node)
-
-			depth += 1
-
-	def backward_get_best_candidate(self, node: BayesianTreeNode, root_for_score: BayesianTreeNode):
-		# Recursive: pick the best scoring leaf in the subtree
-		if node.is_leaf():
-			score = self._compute_normalized_expectation(node, root_for_score)
-			# return node, score
-			return None, score
-		best_node = None
-		# best_score = float('-inf')
-		best_score = self._compute_normalized_expectation(node, root_for_score)
-		for child in node.childs:
-			_, candidate_score = self.backward_get_best_candidate(child, root_for_score)
-			if candidate_score > best_score:
-				# best_node = candidate_node
-				best_node = child  ## !!!
-				best_score = candidate_score
-		return best_node, best_score
+			leaves = self._find_top_nodes(np.concatenate(next_level_candidates), tree)
+			kept.append(leaves)
+			self.completed_depth = level + 1
+
+		return np.concatenate(kept) if kept else np.array([], dtype=np.int64)
 
 	def search(self, items, decay_rate):
-		search_tree = BayesianTree(decay_rate, root_probability=2)
-		search_tree.add_node()
-		self.forward_construct_search_tree(items, search_tree)
-		best_candidate, score = self.backward_get_best_candidate(search_tree.root, search_tree.root)
-		if best_candidate:
-			return best_candidate.memory, score
-		else:
+		capacity = 1 + min(self.depth, 4) * self.width * (len(items) + 1)
+		search_tree = BayesianTree(capacity, decay_rate, root_probability=2)
+		search_tree.add_root()
+		kept = self.forward_construct_search_tree(items, search_tree)
+		if not len(kept):
+			return None, 0
+
+		# The best path anywhere in the beams; ties go to the first move in item order
+		expectation = search_tree.expectation(kept)
+		score = expectation.max()
+		if score <= 0.0:
 			return None, 0
+		first = search_tree.first[kept[expectation == score]].min()
+		move = search_tree.item[first]
+		return (None if move == PAUSE else items[move]), float(score)
 
 
 class BayesianTreeBeamSearchPlayer(Player):
@@ -200,10 +263,17 @@ class BayesianTreeBeamSearchPlayer(Player):
 		initial_competition_rate: float = 0.5,
 		initial_speak_panelty: float = DEFAULT_SPEAK_PANELTY,  ##
 		static_threhold=None,
+		time_budget: float | None = None,
+		table_size: int = 100_000,
 	) -> None:
 		super().__init__(snapshot, ctx)
 		self.scorer = ConversationScorer(self.preferences, initial_competition_rate)
+		# With a time budget (seconds per turn) the search deepens until it runs out, and
+		# depth only caps it (None: up to the end of the conversation). Decisions then depend
+		# on the machine's speed, so seeded games are no longer reproducible; off by default
 		self.depth = depth
+		self.time_budget = time_budget
+		self.table = TranspositionTable(table_size)
 		self.initial_competition_rate = initial_competition_rate
 		self.initial_speak_panelty = initial_speak_panelty
 		self.static_threhold = static_threhold
@@ -283,11 +353,17 @@ class BayesianTreeBeamSearchPlayer(Player):
 		self.scorer.set_competition_rate(competition_rate)
 
 		# 2, Search best item with highest scores.
+		depth = self.depth or max(1, self.conversation_length - len(history))
+		deadline = None
+		if self.time_budget is not None:
+			deadline = time.perf_counter() + self.time_budget
 		searcher = BayesianTreeBeamSearch(
 			scorer=self.scorer,
-			depth=self.depth,
+			depth=depth,
 			breadth=self.breadth,
 			initial_context_stack=list(history),
+			table=self.table,
+			deadline=deadline,
 		)
 		best_item, score = searcher.search(self.memory_bank, decay_rate=0.5)
 
@@ -8,6 +8,8 @@ GLOBAL_COMPETITION_RATE = 0.5
 class Player3(Player):
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext):
 		super().__init__(snapshot, ctx)
+		# A fixed depth keeps seeded games reproducible; pass time_budget (seconds per turn,
+		# with depth=None) to search as deep as the clock allows instead
 		self.bst_player = BayesianTreeBeamSearchPlayer(snapshot, ctx, depth=3, breadth=16)
 		self.zipper_player = ZipperPlayer(snapshot, ctx)
 		self.mode = 'TEST'
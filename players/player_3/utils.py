@@ -11,9 +11,57 @@ class ConversationScorer:
 		self.competition_rate = competition_rate
 		self.player_preferences = player_preferences
 
+		# Score of every turn of the conversation (None for pauses), see ``sync``
+		self.position_scores: list[float | None] = []
+		self._scored_history: list[Item] | None = None
+		self._scored_history_last: Item | None = None
+		self._said: set = set()
+		# (context_length, base) -> [cursor, scored turns, sum of weights, weighted sum]
+		self._expectations: dict[tuple, list] = {}
+
 	def set_competition_rate(self, rate: float) -> None:
+		if rate != self.competition_rate:
+			self._reset_position_scores(None)
 		self.competition_rate = rate
 
+	def _reset_position_scores(self, history: list[Item] | None) -> None:
+		self.position_scores = []
+		self._scored_history = history
+		self._scored_history_last = None
+		self._said = set()
+		self._expectations = {}
+
+	def sync(self, history: list[Item]) -> None:
+		"""
+		Scores the turns added to ``history`` since the last call. A turn is scored with the
+		past-only context (``evaluate_at_position``), so its score is final once it is said:
+		new turns are appended and nothing else is invalidated. The cache is rebuilt when a
+		different (or shortened, or rewritten) history list is passed.
+		"""
+		n = len(self.position_scores)
+		if (
+			history is not self._scored_history
+			or len(history) < n
+			or (n and history[n - 1] is not self._scored_history_last)
+		):
+			self._reset_position_scores(history)
+			n = 0
+
+		for position in range(n, len(history)):
+			item = history[position]
+			if item is None:
+				self.position_scores.append(None)
+				continue
+			is_repeated = item.id in self._said
+			self._said.add(item.id)
+			individual_score = self.calculate_individual_score(item)
+			shared_score = self._shared_score(item, position, history, is_repeated)
+			self.position_scores.append(
+				self.competition_rate * individual_score
+				+ (1 - self.competition_rate) * shared_score
+			)
+		self._scored_history_last = history[-1] if history else None
+
 	def is_repeated(self, item: Item, history: list[Item]) -> bool:
 		"""Check if item was already used in conversation."""
 		return any(existing_item and existing_item.id == item.id for existing_item in history)
@@ -116,11 +164,16 @@ class ConversationScorer:
 			return sum(bonuses) / len(bonuses)
 		return 0.0
 
-	def calculate_shared_score(self, item, history):
-		"""Calculate total score impact for adding this item (replicating Engine logic)."""
+	def calculate_shared_score(self, item, history, used=None):
+		"""
+		Calculate total score impact for adding this item (replicating Engine logic). ``used``
+		optionally gives the ids said in ``history``, to skip scanning it for repeats.
+		"""
 		position = len(history)
-		is_repeated = self.is_repeated(item, history)
+		is_repeated = item.id in used if used is not None else self.is_repeated(item, history)
+		return self._shared_score(item, position, history, is_repeated)
 
+	def _shared_score(self, item: Item, position: int, history: list[Item], is_repeated) -> float:
 		# Shared score components (align with Engine's _calculate_turn_score_impact)
 		if is_repeated:
 			importance = 0.0
@@ -158,20 +211,7 @@ class ConversationScorer:
 		is_repeated = any(
 			existing_item and existing_item.id == item.id for existing_item in prior_history
 		)
-
-		if is_repeated:
-			importance = 0.0
-			coherence = 0.0
-			freshness = 0.0
-		else:
-			importance = item.importance
-			coherence = self.calculate_coherence_score(item, position, history)
-			freshness = self.calculate_freshness_score(item, position, history)
-
-		nonmonotonousness = self.calculate_nonmonotonousness_score(
-			item, position, history, is_repeated
-		)
-		return importance + coherence + freshness + nonmonotonousness
+		return self._shared_score(item, position, history, is_repeated)
 
 	def calculate_total_score(self, item: Item, history: list[Item]) -> float:
 		# Individual score
@@ -191,9 +231,9 @@ class ConversationScorer:
 		)
 		return weighted_score
 
-	def evaluate(self, item, history: list[Item]):
+	def evaluate(self, item, history: list[Item], used=None):
 		individual_score = self.calculate_individual_score(item)
-		shared_score = self.calculate_shared_score(item, history)
+		shared_score = self.calculate_shared_score(item, history, used)
 		weighted_score = (
 			self.competition_rate * individual_score + (1 - self.competition_rate) * shared_score
 		)
@@ -203,15 +243,12 @@ class ConversationScorer:
 		"""
 		Evaluate the item already present at `position` using only the context
 		available at that turn (i.e., past-only), without treating it as newly added.
+		Scores are cached per position, see ``sync``.
 		"""
 		if position < 0 or position >= len(history):
 			return 0.0
-		item = history[position]
-		if item is None:
-			return 0.0
-		individual_score = self.calculate_individual_score(item)
-		shared_score = self.calculate_shared_score_at_position(history, position)
-		return self.competition_rate * individual_score + (1 - self.competition_rate) * shared_score
+		self.sync(history)
+		return self.position_scores[position] or 0.0
 
 	def calculate_expected_score(
 		self,
@@ -229,8 +266,7 @@ class ConversationScorer:
 		context_length controls how many most-recent turns to consider.
 		"""
 		# default: all turns
-		if not context_length:
-			context_length = len(history)
+		window = context_length or None
 
 		# default: use unweighted average.
 		if not discount_rate:
@@ -241,30 +277,28 @@ class ConversationScorer:
 		if not history:
 			return 0.0
 
-		# Consider the last `context_length` turns
-		start_index = max(0, len(history) - context_length)
-		recent_indices = list(range(start_index, len(history)))
-
-		# Build scores for non-None turns evaluating each item at its fixed position
-		scored: list[tuple[int, float]] = []  # (rank_from_end, score)
-		for j in recent_indices:
-			item = history[j]
-			if item is None:
-				continue
-			score = self.evaluate_at_position(history, j)
-			rank_from_end = (len(history) - 1) - j  # 0 for most recent
-			scored.append((rank_from_end, score))
+		# Discounted average (recent turns weigh more), kept as running sums per setting: each
+		# new turn discounts the sums by ``base``, and the turn leaving the window is taken out
+		self.sync(history)
+		base = max(0.0, min(1.0, 1.0 - discount_rate))
+		sums = self._expectations.setdefault((window, base), [0, 0, 0.0, 0.0])
+		cursor, scored, sum_w, sum_ws = sums
+		for j in range(cursor, len(history)):
+			sum_w *= base
+			sum_ws *= base
+			score = self.position_scores[j]
+			if score is not None:
+				scored += 1
+				sum_w += 1.0
+				sum_ws += score
+			leaving = j - window if window else -1
+			if leaving >= 0 and self.position_scores[leaving] is not None:
+				decay = base**window
+				scored -= 1
+				sum_w -= decay
+				sum_ws -= decay * self.position_scores[leaving]
+		sums[:] = len(history), scored, sum_w, sum_ws
 
 		if not scored:
 			return 0.0
-
-		# Discounted average (recent turns weigh more)
-		sum_w = 0.0
-		sum_ws = 0.0
-		base = max(0.0, min(1.0, 1.0 - discount_rate))
-		for rank, s in scored:
-			w = base**rank
-			sum_w += w
-			sum_ws += w * s
-
 		return sum_ws / sum_w if sum_w > 0 else 0.0
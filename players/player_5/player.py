@@ -3,7 +3,7 @@ import math
 import os.path
 from collections import Counter
 
-from models.player import GameContext, Item, Player, PlayerSnapshot
+from models.player import GameContext, Item, Player, PlayerSnapshot, prepare
 
 
 class ScoreEngine:
@@ -68,6 +68,7 @@ class ScoreEngine:
 class Player5(Player):
 	MIN_CANDIDATES_COUNT = 10
 	CANDIDATE_FRACTION = 0.5
+	param_table: list[dict] | None = None
 
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
 		super().__init__(snapshot, ctx)
@@ -76,8 +77,8 @@ class Player5(Player):
 
 		# sort memory by importance (desc)
 		self.memory_bank.sort(key=lambda x: x.importance, reverse=True)
-		self.params = self.load_best_params(
-			'simulation_results.json',
+		prepare(type(self), ctx)
+		self.params = self.best_params(
 			{
 				'length': ctx.conversation_length,
 				'players': ctx.number_of_players,
@@ -86,7 +87,13 @@ class Player5(Player):
 			},
 		)
 
-	def load_best_params(self, json_file, query):
+	@classmethod
+	def prepare_class(cls, ctx: GameContext) -> None:
+		if cls.param_table is None:
+			cls.param_table = cls.load_param_table('simulation_results.json')
+
+	@staticmethod
+	def load_param_table(json_file) -> list[dict]:
 		script_path_os = os.path.abspath(__file__)
 		script_directory_os = os.path.dirname(script_path_os)
 		json_file = os.path.join(script_directory_os, json_file)
@@ -94,11 +101,16 @@ class Player5(Player):
 			with open(json_file) as f:
 				data = json.load(f)
 		except Exception:
-			return None
+			return []
 
 		# if file stores a single dict, wrap in list
 		if isinstance(data, dict):
 			data = [data]
+		return data
+
+	def best_params(self, query):
+		if not self.param_table:
+			return None
 
 		q = (query['length'], query['players'], query['subjects'], query['memory'])
 
@@ -106,8 +118,7 @@ class Player5(Player):
 			e = (entry['length'], entry['players'], entry['subjects'], entry['memory'])
 			return math.dist(q, e)  # Euclidean distance
 
-		best_entry = min(data, key=dist)
-		print(best_entry)
+		best_entry = min(self.param_table, key=dist)
 		best_params = best_entry['best_params']
 		params_list = [best_params[f'p{i}'] for i in range(len(best_params))]
 		return params_list
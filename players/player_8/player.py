@@ -1,25 +1,37 @@
+import contextlib
 import json
 import math
 import os
 from collections import Counter
 from uuid import UUID
 
-from models.player import GameContext, Item, Player, PlayerSnapshot
+from models.item import handle_mask, union_mask
+from models.player import GameContext, Item, Player, PlayerSnapshot, prepare
 
 with open('players/player_8/weights') as f:
 	V_LOOKUP = json.load(f)
 
 
 class Player8(Player):
+	# ((memory, length, players), v) for every V_LOOKUP entry, parsed by prepare_class
+	v_table: list[tuple[tuple[int, int, int], list[float]]] | None = None
+	v_cache: dict[tuple[int, int, int], list[float]] = {}
+
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:  # noqa: F821
 		super().__init__(snapshot, ctx)
+		prepare(type(self), ctx)
 		self.v = Player8.lookup_v(
 			len(self.memory_bank), ctx.conversation_length, ctx.number_of_players
 		)
 
+	@classmethod
+	def prepare_class(cls, ctx: GameContext) -> None:
+		if Player8.v_table is None:
+			Player8.v_table = [(tuple(map(int, key.split('_'))), v) for key, v in V_LOOKUP.items()]
+
 	@staticmethod
 	def lookup_v(mem: int, conv_len: int, num_players: int) -> list[float]:
-		"""Return v from lookup (nearest neighbor)."""
+		"""Return v from lookup (nearest neighbor). Needs ``prepare_class`` to have run."""
 		if not V_LOOKUP:
 			return json.loads(os.environ.get('PLAYER8_V', '[]')) or [
 				3.509549936829426,
@@ -31,42 +43,53 @@ class Player8(Player):
 			]
 
 		target = (mem, conv_len, num_players)
-		best_key, best_dist = None, float('inf')
-
-		for key, _ in V_LOOKUP.items():
-			m, c, n = map(int, key.split('_'))
-			cand = (m, c, n)
+		if target in Player8.v_cache:
+			return Player8.v_cache[target]
 
+		best_v, best_dist = None, float('inf')
+		for cand, v in Player8.v_table:
 			# Euclidean distance without numpy
 			dist = math.sqrt(
 				(target[0] - cand[0]) ** 2 + (target[1] - cand[1]) ** 2 + (target[2] - cand[2]) ** 2
 			)
 
 			if dist < best_dist:
-				best_dist, best_key = dist, key
+				best_dist, best_v = dist, v
 
-		return V_LOOKUP[best_key]
+		Player8.v_cache[target] = best_v
+		return best_v
 
 	@staticmethod
 	def was_last_round_pause(history: list[Item]) -> bool:
 		"""Check if last round was a pause"""
 		return len(history) >= 1 and history[-1] is None
 
-	@staticmethod
-	def get_last_n_subjects(history: list[Item], n: int) -> set[int]:
-		"""Get the last N subjects"""
-		return set(
-			subject for item in history[-n:] if item is not None for subject in item.subjects
-		)
-
 	@staticmethod
 	def subjects_from_items(items: list[Item]) -> set[int]:
 		"""Get subjects from items"""
 		return [subject for item in items if item is not None for subject in item.subjects]
 
+	@staticmethod
+	def used_items(history: list[Item], candidates: list[Item]) -> int | set[UUID]:
+		"""
+		What ``is_used`` needs to tell which of ``candidates`` were said: the handle bitset of
+		``history``, or the ids said when some item has no handle (built outside an Engine).
+		"""
+		if all(item.handle >= 0 for item in candidates if item is not None):
+			with contextlib.suppress(ValueError):
+				return handle_mask(history)
+		return {item.id for item in history if item is not None}
+
+	@staticmethod
+	def is_used(item: Item, used: int | set[UUID]) -> bool:
+		if isinstance(used, set):
+			return item.id in used
+		return bool(used >> item.handle & 1)
+
 	@staticmethod
 	def filter_unused(items: list[Item], history: list[Item]) -> list[Item]:
-		return [item for item in items if item not in history]
+		used = Player8.used_items(history, items)
+		return [item for item in items if not Player8.is_used(item, used)]
 
 	@staticmethod
 	def play_probability(item: Item, history: list[Item], number_of_players: int, player_id: UUID):
@@ -97,13 +120,23 @@ class Player8(Player):
 
 	@staticmethod
 	def compute_bonuses(
-		item: Item, history: list[Item], monotonic_subjects: list[int], preferences: list[int], v
+		item: Item,
+		history: list[Item],
+		monotonic_subjects: list[int],
+		preferences: list[int],
+		v,
+		used: int | set[UUID] | None = None,
 	) -> list[float]:
+		"""``used`` is ``used_items(history, ...)`` covering ``item``, computed when not given."""
 		if not item:  # pause shortcut
 			return [1, 0, 0, 0, 0, 0]
 
+		if used is None:
+			used = Player8.used_items(history, [item])
+		repeated = Player8.is_used(item, used)
+
 		def repetition_bonus():
-			return -2 if item in history else 0
+			return -2 if repeated else 0
 
 		def preference_bonus():
 			return Player8.preference_score(preferences, item)
@@ -114,11 +147,8 @@ class Player8(Player):
 		def freshness_bonus():
 			if not Player8.was_last_round_pause(history):
 				return 0
-			prev_subjects = Player8.get_last_n_subjects(history, 6)
-			for s in item.subjects:
-				if s not in prev_subjects:
-					return 1
-			return 0
+			prev_subjects = union_mask(history[-6:])
+			return 1 if item.subject_mask & ~prev_subjects else 0
 
 		def coherence_bonus():
 			context_subjects = set(Player8.current_context(history))
@@ -128,7 +158,7 @@ class Player8(Player):
 			if not item:
 				return 0
 			return sum(-1 for s in item.subjects if s in monotonic_subjects) + (
-				-1 if item in history else 0
+				-1 if repeated else 0
 			)
 
 		return [
@@ -207,13 +237,14 @@ class Player8(Player):
 
 	def propose_item(self, history: list[Item]) -> Item | None:
 		monotonic_subjects = self.monotonic_subjects(history)
+		used = self.used_items(history, self.memory_bank)
 
 		evaluated_items = [
 			(
 				item,
 				sum(
 					self.compute_bonuses(
-						item, history, monotonic_subjects, self.preferences, self.v
+						item, history, monotonic_subjects, self.preferences, self.v, used
 					)
 				),
 			)
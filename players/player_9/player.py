@@ -1,4 +1,5 @@
-from collections import Counter
+from collections import Counter, deque
+from uuid import UUID
 
 from models.player import GameContext, Item, Player, PlayerSnapshot
 
@@ -11,6 +12,10 @@ nonmonotonousness_weight = 0
 individual_weight = 0
 importance_weight = 0
 
+# Turns a candidate's score depends on: its freshness looks at the five turns before a
+# pause, and the coherence it adds to the three preceding items looks three turns further
+WINDOW = 6
+
 
 class Player9(Player):
 	def __init__(self, snapshot: PlayerSnapshot, ctx: GameContext) -> None:
@@ -23,6 +28,16 @@ class Player9(Player):
 		self.t4 = 1.5
 		self.t5 = 3
 
+		# The conversation as far as it was synced (see _sync): the last WINDOW turns, the ids
+		# said so far, the own items not said yet (in memory bank order) and how many turns
+		# were own items
+		self.cursor = 0
+		self.window: deque[Item | None] = deque(maxlen=WINDOW)
+		self.said: set[UUID] = set()
+		self.own_ids = {item.id for item in self.memory_bank}
+		self.unused: dict[UUID, Item] = {item.id: item for item in self.memory_bank}
+		self.spoken = 0
+
 	"""the important function where all the abstraction occurs!
 
 	1. Calculates the delta bewteen the current total score and the total score contributed an item is for each item we have in our memory bank
@@ -63,6 +78,19 @@ class Player9(Player):
 				return item_scores[0]
 		return None
 
+	def _sync(self, history: list[Item]) -> None:
+		"""Folds the turns added since the last call into the window and the used items."""
+		for t in range(self.cursor, len(history)):
+			item = history[t]
+			self.window.append(item)
+			if item is None:
+				continue
+			self.said.add(item.id)
+			if item.id in self.own_ids:
+				self.unused.pop(item.id, None)
+				self.spoken += 1
+		self.cursor = len(history)
+
 	def check_one_pause(self, history: list[Item]) -> bool:
 		# print (history)
 		return len(history) >= 1 and history[-1] is None
@@ -82,7 +110,7 @@ class Player9(Player):
 		if self.check_one_pause(history):
 			return 2
 
-		if history == []:
+		if not history:
 			return -1000
 
 		# mem * playernum : conversation length remaining
@@ -108,19 +136,19 @@ class Player9(Player):
 		(total memory length - number of times this player has already spoken).
 		"""
 
-		# count how many items from history belong to this player
-		memory_bank_set = set(self.memory_bank)
-		used = sum(1 for item in history if item in memory_bank_set)
-		return len(self.memory_bank) - used
+		self._sync(history)
+		return len(self.memory_bank) - self.spoken
 
 	"""Calculates the score contribution of a specific turn at a given index in the history
 
-	1. Takes a history and an index
+	1. Takes a history and an index (and whether the item was said before, if known)
 	2. Calculates the score contribution of the item at that specific index
 	3. Returns the score contribution
 	"""
 
-	def calculate_turn_score(self, history: list[Item], index: int) -> float:
+	def calculate_turn_score(
+		self, history: list[Item], index: int, repeated: bool | None = None
+	) -> float:
 		if index >= len(history) or not history[index]:
 			return 0.0
 
@@ -181,7 +209,8 @@ class Player9(Player):
 			return 0.0
 
 		# Check if this item is repeated in the history
-		repeated = any(history[i] and history[i].id == current_item.id for i in range(index))
+		if repeated is None:
+			repeated = any(history[i] and history[i].id == current_item.id for i in range(index))
 
 		# Calculate individual components
 		coherence_score = 0.0
@@ -219,12 +248,16 @@ class Player9(Player):
 	1. Calculates the direct score contribution of the new item
 	2. Calculates how the new item affects the coherence scores of existing items
 	3. Returning the total delta
+
+	``history`` only needs to hold the last WINDOW turns; repeats are looked up in self.said
 	"""
 
 	def calculate_item_score(self, item, history: list[Item]) -> tuple[Item, float]:
 		# Calculate the direct score contribution of adding this item
 		new_history = history + [item]
-		direct_score = self.calculate_turn_score(new_history, len(new_history) - 1)
+		direct_score = self.calculate_turn_score(
+			new_history, len(new_history) - 1, item.id in self.said
+		)
 
 		# Calculate how this new item affects the coherence of existing items
 		# Only items in the last 4 positions can be affected (due to coherence window)
@@ -279,18 +312,18 @@ class Player9(Player):
 
 	"""Calculate the fitness score using the greedy algorithm! Should be changed for optimization
 	
-	1. Takes an entire list of items
-	2. For each item, calculate it's fitness score IF it is picked next
+	1. Takes the items not said yet
+	2. For each item, calculate it's fitness score IF it is picked next (on the last turns only)
 	3. Return the fitness score of the BEST item
 	
 	"""
 
 	def calculate_greedy(self, history: list[Item]) -> tuple[Item, float] | None:
-		if not self.memory_bank:
-			return None
+		self._sync(history)
+		context = list(self.window)
 
 		return max(
-			(self.calculate_item_score(item, history) for item in self.memory_bank),
+			(self.calculate_item_score(item, context) for item in self.unused.values()),
 			key=lambda x: x[1],
 			default=None,
 		)
@@ -0,0 +1,68 @@
+import gc
+import uuid
+
+import pytest
+
+from models.item import Item
+from models.player import _PREPARED, GameContext, PlayerSnapshot, prepare
+from players.player_10.agent import config as player10_config
+from players.player_10.agent.logic.scoring import calculate_canonical_delta
+from players.player_10.agent.player import Player10Agent
+from tournament.hooks import PLAYER8_V, PLAYER10_CONFIG, player10_config_override
+
+
+def make_item(importance: float, subjects: tuple[int, ...]) -> Item:
+	return Item(id=uuid.uuid4(), player_id=uuid.uuid4(), importance=importance, subjects=subjects)
+
+
+# A history after which each weighted component of the next item's score is nonzero
+COMPONENT_HISTORIES = {
+	'IMPORTANCE_WEIGHT': [],
+	'COHERENCE_WEIGHT': [(3,)],
+	'FRESHNESS_WEIGHT': [(3,), None],
+	'MONOTONY_WEIGHT': [(1,), (1,), (1,)],
+}
+
+
+@pytest.mark.parametrize('name', sorted(COMPONENT_HISTORIES))
+def test_player10_weights_change_scores(name):
+	history = [
+		None if subjects is None else make_item(0.5, subjects)
+		for subjects in COMPONENT_HISTORIES[name]
+	]
+	item = make_item(0.5, (1,))
+
+	default = calculate_canonical_delta(item, len(history), history, is_repeated=False)
+	with player10_config_override({name: 0.0}):
+		tuned = calculate_canonical_delta(item, len(history), history, is_repeated=False)
+
+	assert tuned != default
+	assert calculate_canonical_delta(item, len(history), history, is_repeated=False) == default
+
+
+def test_tuned_player10_scopes_its_config(monkeypatch):
+	seen = []
+
+	def propose_item(self, history):
+		seen.append(player10_config.IMPORTANCE_WEIGHT)
+
+	monkeypatch.setattr(Player10Agent, 'propose_item', propose_item)
+	default = player10_config.IMPORTANCE_WEIGHT
+	player = PLAYER10_CONFIG.build({**PLAYER10_CONFIG.defaults, 'IMPORTANCE_WEIGHT': 0.25})
+	snapshot = PlayerSnapshot(
+		id=uuid.uuid4(), preferences=(0, 1), memory_bank=(make_item(0.5, (0,)),)
+	)
+	ctx = GameContext(number_of_players=2, conversation_length=5)
+
+	player(snapshot, ctx).propose_item([])
+	Player10Agent(snapshot, ctx).propose_item([])
+
+	assert seen == [0.25, default]
+	assert default == player10_config.IMPORTANCE_WEIGHT
+
+
+def test_tuned_classes_are_released():
+	ctx = GameContext(number_of_players=2, conversation_length=5)
+	prepare(PLAYER8_V.build(PLAYER8_V.defaults), ctx)
+	gc.collect()
+	assert not any(cls.__name__ == 'TunedPlayer8' for cls in _PREPARED)
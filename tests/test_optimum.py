@@ -0,0 +1,50 @@
+import itertools
+import random
+
+import pytest
+
+from analysis.optimum import PAUSE, Instance, OptimumCache, score_sequence, solve
+
+
+def random_instance(rng: random.Random) -> Instance:
+	subjects = rng.randint(2, 6)
+	items = tuple(
+		(tuple(rng.sample(range(subjects), rng.choice([1, 2]))), round(rng.random(), 2))
+		for _ in range(rng.randint(2, 3))
+	)
+	return Instance(items, length=rng.randint(1, 5))
+
+
+def brute_force(instance: Instance) -> float:
+	actions = [PAUSE, *range(len(instance.items))]
+	best = float('-inf')
+	for sequence in itertools.product(actions, repeat=instance.length):
+		# Three pauses in a row end the game
+		for t in range(2, len(sequence)):
+			if sequence[t - 2 : t + 1] == (PAUSE, PAUSE, PAUSE):
+				sequence = sequence[: t + 1]
+				break
+		best = max(best, score_sequence(instance, list(sequence)))
+	return best
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_solve_matches_brute_force(seed):
+	instance = random_instance(random.Random(seed))
+	solution = solve(instance, budget=30)
+
+	assert solution.exact
+	assert solution.score == pytest.approx(brute_force(instance))
+	assert score_sequence(instance, solution.sequence) == pytest.approx(solution.score)
+
+
+def test_cache_reuses_solutions(tmp_path):
+	instance = random_instance(random.Random(0))
+	cache = OptimumCache(tmp_path / 'optimum.json')
+	solution = cache.solve(instance)
+	cache.save()
+
+	reordered = Instance(tuple(reversed(instance.items)), instance.length)
+	assert OptimumCache(tmp_path / 'optimum.json').solve(reordered, budget=0).score == (
+		solution.score
+	)
@@ -0,0 +1,28 @@
+import random
+
+from core.engine import Engine
+from core.scoring import PAUSE
+from players.oracle_player import OraclePlayer, bind_oracles
+from players.random_player import RandomPlayer
+
+
+def test_search_keeps_statistics_below_the_root():
+	random.seed(0)
+	engine = Engine(
+		players=[OraclePlayer, RandomPlayer],
+		player_count=2,
+		subjects=8,
+		memory_size=4,
+		conversation_length=6,
+	)
+	bind_oracles(engine)
+	oracle = engine.players[0]
+
+	oracle.propose_item([])
+	root = oracle.root
+	token, child = max(root.children.items(), key=lambda x: x[1].visits)
+	assert child.visits > 0 and child.arms
+
+	oracle._sync([None if token == PAUSE else oracle.items[token]])
+	assert oracle.root is child
+	assert sum(visits for visits, _ in oracle.root.arms.values()) == child.visits
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+from core.engine import Engine
+from core.scoring import HistoryBatch, HistoryView, delta_scores, score_histories
+from players.pause_player import PausePlayer
+from players.random_pause_player import RandomPausePlayer
+from players.random_player import RandomPlayer
+
+
+def play(seed: int, players: list, subjects: int, memory_size: int, length: int) -> Engine:
+	random.seed(seed)
+	np.random.seed(seed)
+	engine = Engine(
+		players=players,
+		player_count=len(players),
+		subjects=subjects,
+		memory_size=memory_size,
+		conversation_length=length,
+	)
+	with contextlib.redirect_stdout(io.StringIO()):
+		engine.run(engine.players)
+	return engine
+
+
+@pytest.fixture(scope='module')
+def engines() -> list[Engine]:
+	rosters = [
+		[RandomPlayer] * 3,
+		[RandomPausePlayer] * 4,
+		[RandomPlayer, RandomPausePlayer, PausePlayer],
+		[RandomPausePlayer] * 2 + [RandomPlayer] * 5,
+	]
+	return [
+		play(
+			seed,
+			rosters[seed % len(rosters)],
+			subjects=3 + seed % 8,
+			memory_size=4,
+			length=5 + seed,
+		)
+		for seed in range(80)
+	]
+
+
+def test_score_histories_matches_engine(engines):
+	batch = HistoryBatch.from_histories(
+		[engine.history for engine in engines],
+		[list(engine.snapshots.values()) for engine in engines],
+	)
+	scores = score_histories(batch)
+
+	for k, engine in enumerate(engines):
+		expected = engine.final_scores()
+		breakdown = expected['shared_score_breakdown']
+		assert scores['shared'][k] == breakdown['total']
+		for component in ('importance', 'coherence', 'freshness', 'nonmonotonousness'):
+			assert scores[component][k] == breakdown[component]
+
+		individual = [p['scores']['individual'] for p in expected['player_scores']]
+		assert scores['individual'][k, : len(individual)].tolist() == individual
+
+
+def test_score_histories_handles_empty_batch():
+	scores = score_histories(HistoryBatch.from_histories([[], [None, None, None]]))
+	assert scores['shared'].tolist() == [0.0, 0.0]
+
+
+def shared_score(engine: Engine, history: list) -> float:
+	replayed = Engine.from_history(
+		engine.snapshots,
+		engine.player_names,
+		len(engine.subjects),
+		engine.memory_size,
+		engine.conversation_length,
+		history,
+	)
+	return replayed.final_scores()['shared_score_breakdown']['total']
+
+
+def test_delta_scores_match_engine(engines):
+	for engine in engines[::4]:
+		view = HistoryView()
+		for t in range(len(engine.history) + 1):
+			prefix = engine.history[:t]
+			view.sync(prefix)
+			deltas = delta_scores(view, list(engine.items))
+			base = shared_score(engine, prefix)
+			expected = [shared_score(engine, [*prefix, item]) - base for item in engine.items]
+			assert deltas.tolist() == pytest.approx(expected, abs=1e-9)
+			assert delta_scores(prefix, list(engine.items)).tolist() == deltas.tolist()
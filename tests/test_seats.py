@@ -0,0 +1,42 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from core.engine import Engine
+from players.random_player import RandomPlayer
+from tournament.runner import GameSpec, play_game
+
+
+def deal(seats: tuple[int, ...], seed: int) -> tuple[list, Engine]:
+	random.seed(seed)
+	engine = Engine(
+		players=[RandomPlayer] * len(seats),
+		player_count=4,
+		subjects=8,
+		memory_size=3,
+		conversation_length=5,
+		seats=seats,
+	)
+	banks = [
+		(snapshot.preferences, [(item.importance, item.subjects) for item in snapshot.memory_bank])
+		for snapshot in engine.snapshots.values()
+	]
+	return banks, engine
+
+
+@pytest.mark.parametrize('seats', [(0,), (1, 3), (0, 2, 3)])
+def test_seats_keep_their_deal(seats):
+	full, _ = deal((0, 1, 2, 3), seed=7)
+	banks, engine = deal(seats, seed=7)
+
+	assert banks == [full[seat] for seat in seats]
+	assert [item.handle for item in engine.items] == list(range(len(engine.items)))
+	assert all(player.number_of_players == len(seats) for player in engine.players)
+
+
+def test_all_seats_match_the_plain_game():
+	spec = GameSpec(roster=('pr', 'pr', 'pr'), subjects=8, memory_size=3, length=10, seed=3)
+	seated = replace(spec, seats=(0, 1, 2))
+
+	assert play_game(spec).shared == play_game(seated).shared
@@ -0,0 +1,20 @@
+from players.player_2.StrategyBandit import StrategyBandit
+
+
+def test_every_arm_is_tried_first():
+	bandit = StrategyBandit(['a', 'b', 'c'], default='b')
+	followed = []
+	for _ in range(3):
+		arm = bandit.select()
+		followed.append(arm)
+		bandit.update({arm: 1.0})
+
+	assert followed == ['b', 'a', 'c']
+
+
+def test_all_arms_learn_from_one_turn():
+	bandit = StrategyBandit(['a', 'b'], exploration=0.0)
+	bandit.update({'a': 0.5, 'b': 2.0})
+
+	assert bandit.select() == 'b'
+	assert bandit.summary()['a'] == {'selected': 0, 'mean_reward': 0.5}
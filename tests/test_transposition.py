@@ -0,0 +1,64 @@
+import random
+import uuid
+from collections import defaultdict
+
+import pytest
+
+from models.item import Item
+from players.player_3.bst_player_presets import BayesianTreeBeamSearch, TranspositionTable
+from players.player_3.utils import ConversationScorer
+
+
+def random_items(rng: random.Random, count: int, subjects: int) -> list[Item]:
+	return [
+		Item(
+			id=uuid.uuid4(),
+			player_id=uuid.uuid4(),
+			importance=round(rng.random(), 2),
+			subjects=tuple(rng.sample(range(subjects), rng.choice([1, 2]))),
+		)
+		for _ in range(count)
+	]
+
+
+def random_context(rng: random.Random, items: list[Item]) -> list[Item | None]:
+	return [None if rng.random() < 0.25 else rng.choice(items) for _ in range(rng.randint(0, 9))]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_window_determines_score(seed):
+	"""Contexts with the same window give every item the same score as ``evaluate``."""
+	rng = random.Random(seed)
+	items = random_items(rng, 8, subjects=4)
+	scorer = ConversationScorer(rng.sample(range(4), 4), competition_rate=rng.random())
+
+	scores = defaultdict(list)
+	for _ in range(400):
+		context = random_context(rng, items)
+		used = {x.id for x in context if x is not None}
+		window = TranspositionTable.window(context)
+		for item in items:
+			score = scorer.evaluate(item, context, used)
+			scores[window, item.id, item.id in used].append(round(score, 12))
+
+	assert any(len(group) > 1 for group in scores.values())
+	assert all(len(set(group)) == 1 for group in scores.values())
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_table_does_not_change_search(seed):
+	rng = random.Random(seed)
+	items = random_items(rng, 10, subjects=5)
+	scorer = ConversationScorer(rng.sample(range(5), 5))
+	table = TranspositionTable()
+	for _ in range(10):
+		context = random_context(rng, items)
+		searches = [
+			BayesianTreeBeamSearch(
+				scorer, depth=3, breadth=4, initial_context_stack=list(context), table=t
+			)
+			for t in (None, table)
+		]
+		bank = [x for x in items if x not in context]
+		plain, cached = (search.search(bank, decay_rate=0.5) for search in searches)
+		assert plain == cached
@@ -0,0 +1,13 @@
+from .registry import PLAYER_TYPES, counts_from_flags, resolve_roster, roster_from_counts
+from .runner import GameResult, GameSpec, play_game, run_games
+
+__all__ = [
+	'PLAYER_TYPES',
+	'GameResult',
+	'GameSpec',
+	'counts_from_flags',
+	'play_game',
+	'resolve_roster',
+	'roster_from_counts',
+	'run_games',
+]
@@ -0,0 +1,366 @@
+"""
+Coordinator/worker mode for running tournaments across several processes or machines.
+
+The coordinator owns a job queue served over TCP with ``multiprocessing.managers``. Workers
+lease batches of games, send heartbeats while they play them and push results back. Leases
+held by a worker that stops heartbeating are requeued, failed jobs are retried a bounded
+number of times, and a job's result is only recorded once no matter how many workers end
+up playing it. Completed results are appended to a JSON-lines file, which also lets a
+restarted coordinator skip jobs that already finished.
+
+Usage:
+	# on the coordinator box
+	python -m tournament.distributed coordinator --port 50000 --authkey secret \\
+		--player p1 5 --player pr 5 --length 10 50 100 --games 200 --output results.jsonl
+
+	# on every worker box
+	python -m tournament.distributed worker --host coordinator.lan --port 50000 \\
+		--authkey secret --processes 8
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+
+from tournament.registry import PLAYER_TYPES, roster_from_counts
+from tournament.runner import GameResult, GameSpec, play_game
+
+DEFAULT_PORT = 50000
+HEARTBEAT_INTERVAL = 2.0
+LEASE_TIMEOUT = 15.0
+
+
+def job_id(spec: GameSpec) -> str:
+	return f'{",".join(spec.roster)}|{spec.subjects}|{spec.memory_size}|{spec.length}|{spec.seed}'
+
+
+class JobQueue:
+	"""Coordinator-side job bookkeeping. Every public method is called from server threads."""
+
+	def __init__(
+		self,
+		specs: list[GameSpec],
+		output: str | Path | None = None,
+		max_retries: int = 2,
+		lease_timeout: float = LEASE_TIMEOUT,
+	) -> None:
+		self.output = Path(output) if output else None
+		self.max_retries = max_retries
+		self.lease_timeout = lease_timeout
+		self._lock = threading.Lock()
+
+		self.results: dict[str, GameResult | dict] = self._load_completed()
+		self.specs: dict[str, GameSpec] = {}
+		for spec in specs:
+			self.specs.setdefault(job_id(spec), spec)
+
+		self.pending: deque[str] = deque(jid for jid in self.specs if jid not in self.results)
+		self.leases: dict[str, str] = {}
+		self.attempts: dict[str, int] = {}
+		self.failed: dict[str, str] = {}
+		self.heartbeats: dict[str, float] = {}
+		self.duplicates = 0
+
+	def lease(self, worker_id: str, count: int) -> list[tuple[str, GameSpec]]:
+		with self._lock:
+			self.heartbeats[worker_id] = time.monotonic()
+			batch = []
+			while self.pending and len(batch) < count:
+				jid = self.pending.popleft()
+				self.leases[jid] = worker_id
+				batch.append((jid, self.specs[jid]))
+			return batch
+
+	def heartbeat(self, worker_id: str) -> None:
+		with self._lock:
+			self.heartbeats[worker_id] = time.monotonic()
+
+	def complete(self, worker_id: str, results: list[tuple[str, GameResult]]) -> None:
+		with self._lock:
+			self.heartbeats[worker_id] = time.monotonic()
+			fresh = []
+			for jid, result in results:
+				if jid in self.results or jid not in self.specs:
+					self.duplicates += 1
+					continue
+				self.results[jid] = result
+				self.leases.pop(jid, None)
+				if jid in self.pending:
+					self.pending.remove(jid)
+				fresh.append(result)
+			self._append(fresh)
+
+	def fail(self, worker_id: str, jid: str, error: str) -> None:
+		with self._lock:
+			if self.leases.get(jid) == worker_id:
+				del self.leases[jid]
+				self._retry(jid, error)
+
+	def reap(self) -> list[str]:
+		"""Requeues the leases of workers whose heartbeat lapsed; returns those workers."""
+		with self._lock:
+			now = time.monotonic()
+			lost = {w for w, seen in self.heartbeats.items() if now - seen > self.lease_timeout}
+			for jid, worker_id in list(self.leases.items()):
+				if worker_id in lost:
+					del self.leases[jid]
+					self._retry(jid, f'worker {worker_id} stopped heartbeating')
+			for worker_id in lost:
+				del self.heartbeats[worker_id]
+			return sorted(lost)
+
+	def finished(self) -> bool:
+		with self._lock:
+			return not self.pending and not self.leases
+
+	def status(self) -> dict:
+		with self._lock:
+			return {
+				'total': len(self.specs),
+				'done': sum(1 for jid in self.specs if jid in self.results),
+				'pending': len(self.pending),
+				'leased': len(self.leases),
+				'failed': len(self.failed),
+				'workers': len(self.heartbeats),
+				'duplicates': self.duplicates,
+			}
+
+	def _retry(self, jid: str, error: str) -> None:
+		self.attempts[jid] = self.attempts.get(jid, 0) + 1
+		if self.attempts[jid] > self.max_retries:
+			self.failed[jid] = error
+		else:
+			self.pending.append(jid)
+
+	def _append(self, results: list[GameResult]) -> None:
+		if not self.output or not results:
+			return
+		with self.output.open('a') as f:
+			for result in results:
+				f.write(json.dumps(asdict(result)) + '\n')
+
+	def _load_completed(self) -> dict[str, dict]:
+		if not self.output or not self.output.exists():
+			return {}
+
+		completed = {}
+		with self.output.open() as f:
+			for line in f:
+				if not line.strip():
+					continue
+				record = json.loads(line)
+				spec = GameSpec(**{**record['spec'], 'roster': tuple(record['spec']['roster'])})
+				completed[job_id(spec)] = record
+		return completed
+
+
+class QueueManager(BaseManager):
+	pass
+
+
+def start_coordinator(
+	queue: JobQueue, host: str = '', port: int = DEFAULT_PORT, authkey: bytes = b'conversation'
+):
+	"""Serves ``queue`` in a background thread and returns the bound (host, port)."""
+	QueueManager.register('get_queue', callable=lambda: queue)
+	manager = QueueManager(address=(host, port), authkey=authkey)
+	server = manager.get_server()
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server.address
+
+
+def run_coordinator(queue: JobQueue, poll: float = 1.0, verbose: bool = True) -> None:
+	last = None
+	while not queue.finished():
+		time.sleep(poll)
+		for worker_id in queue.reap():
+			if verbose:
+				print(f'Lost worker {worker_id}; its jobs were requeued')
+		status = queue.status()
+		if verbose and status != last:
+			print(
+				f'{status["done"]}/{status["total"]} done, {status["leased"]} leased, '
+				f'{status["pending"]} pending, {status["failed"]} failed, '
+				f'{status["workers"]} workers'
+			)
+			last = status
+
+
+def connect(host: str, port: int, authkey: bytes, retries: int = 30):
+	QueueManager.register('get_queue')
+	for attempt in range(retries):
+		try:
+			manager = QueueManager(address=(host, port), authkey=authkey)
+			manager.connect()
+			return manager.get_queue()
+		except ConnectionRefusedError:
+			if attempt == retries - 1:
+				raise
+			time.sleep(1.0)
+
+
+def run_worker(
+	host: str,
+	port: int,
+	authkey: bytes,
+	processes: int = 1,
+	batch: int | None = None,
+	idle_poll: float = 0.5,
+) -> int:
+	"""Leases and plays games until the coordinator runs out of work. Returns games played."""
+	queue = connect(host, port, authkey)
+	worker_id = f'{socket.gethostname()}:{os.getpid()}'
+	batch = batch or processes * 4
+	stop = threading.Event()
+
+	def beat():
+		while not stop.wait(HEARTBEAT_INTERVAL):
+			try:
+				queue.heartbeat(worker_id)
+			except (EOFError, ConnectionError):
+				return
+
+	threading.Thread(target=beat, daemon=True).start()
+	executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+	played = 0
+
+	try:
+		while True:
+			try:
+				jobs = queue.lease(worker_id, batch)
+			except (EOFError, ConnectionError):
+				break  # coordinator shut down
+
+			if not jobs:
+				if queue.finished():
+					break
+				time.sleep(idle_poll)
+				continue
+
+			specs = [spec for _, spec in jobs]
+			try:
+				if executor:
+					results = list(executor.map(play_game, specs))
+				else:
+					results = [play_game(spec) for spec in specs]
+			except Exception:
+				error = traceback.format_exc()
+				for jid, _ in jobs:
+					queue.fail(worker_id, jid, error)
+				continue
+
+			queue.complete(worker_id, [(jid, r) for (jid, _), r in zip(jobs, results, strict=True)])
+			played += len(results)
+	finally:
+		stop.set()
+		if executor:
+			executor.shutdown()
+
+	return played
+
+
+def run_local(
+	specs: list[GameSpec], workers: int = 2, authkey: bytes = b'conversation'
+) -> list[GameResult]:
+	"""Runs ``specs`` through a coordinator and ``workers`` worker processes on localhost."""
+	queue = JobQueue(specs)
+	host, port = start_coordinator(queue, host='127.0.0.1', port=0, authkey=authkey)
+
+	processes = [
+		multiprocessing.Process(target=run_worker, args=(host, port, authkey))
+		for _ in range(workers)
+	]
+	for process in processes:
+		process.start()
+
+	run_coordinator(queue, poll=0.1, verbose=False)
+	for process in processes:
+		process.join()
+
+	if queue.failed:
+		raise RuntimeError(f'{len(queue.failed)} jobs failed: {next(iter(queue.failed.values()))}')
+	return [queue.results[job_id(spec)] for spec in specs]
+
+
+def build_specs(args) -> list[GameSpec]:
+	counts: dict[str, int] = {}
+	for code, count in args.player:
+		if code not in PLAYER_TYPES:
+			raise SystemExit(f"Unknown player type '{code}'")
+		counts[code] = counts.get(code, 0) + int(count)
+	# Registry order, as in main.py and the other tools, so equal flags give equal seats
+	roster = roster_from_counts(counts)
+
+	return [
+		GameSpec(roster=roster, subjects=s, memory_size=b, length=length, seed=seed)
+		for s, b, length in itertools.product(args.subjects, args.memory_size, args.length)
+		for seed in range(args.seed, args.seed + args.games)
+	]
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Distributed tournament runner.')
+	subparsers = parser.add_subparsers(dest='role', required=True)
+
+	coordinator = subparsers.add_parser('coordinator', help='Serve the job queue.')
+	coordinator.add_argument('--host', default='', help='Interface to bind (default: all).')
+	coordinator.add_argument('--port', type=int, default=DEFAULT_PORT)
+	coordinator.add_argument('--authkey', default='conversation')
+	coordinator.add_argument(
+		'--player', action='append', nargs=2, metavar=('TYPE', 'COUNT'), required=True
+	)
+	coordinator.add_argument('--subjects', nargs='+', type=int, default=[20])
+	coordinator.add_argument('--memory_size', nargs='+', type=int, default=[10])
+	coordinator.add_argument('--length', nargs='+', type=int, default=[10])
+	coordinator.add_argument('--games', type=int, default=100, help='Seeds per configuration.')
+	coordinator.add_argument('--seed', type=int, default=0, help='First seed.')
+	coordinator.add_argument('--max-retries', type=int, default=2)
+	coordinator.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+	coordinator.add_argument('--output', default='tournament_results.jsonl')
+
+	worker = subparsers.add_parser('worker', help='Play games leased from a coordinator.')
+	worker.add_argument('--host', default='127.0.0.1')
+	worker.add_argument('--port', type=int, default=DEFAULT_PORT)
+	worker.add_argument('--authkey', default='conversation')
+	worker.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+	worker.add_argument('--batch', type=int, help='Games leased at a time.')
+
+	args = parser.parse_args()
+	authkey = args.authkey.encode()
+
+	if args.role == 'coordinator':
+		queue = JobQueue(
+			build_specs(args),
+			output=args.output,
+			max_retries=args.max_retries,
+			lease_timeout=args.lease_timeout,
+		)
+		host, port = start_coordinator(queue, host=args.host, port=args.port, authkey=authkey)
+		print(
+			f'Coordinator listening on {host or "0.0.0.0"}:{port}, {queue.status()["pending"]} jobs'
+		)
+		run_coordinator(queue)
+
+		# Give polling workers a moment to see the queue is finished before exiting
+		time.sleep(HEARTBEAT_INTERVAL)
+		for jid, error in queue.failed.items():
+			print(f'FAILED {jid}:\n{error}')
+		print(f'Results written to {args.output}')
+	else:
+		played = run_worker(args.host, args.port, authkey, args.processes, args.batch)
+		print(f'Worker finished after {played} games')
+
+
+if __name__ == '__main__':
+	main()
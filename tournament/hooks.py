@@ -0,0 +1,107 @@
+"""
+Tunable parameter schemas for ``tournament.optimize``.
+
+Each hook receives a parameter dict and returns a player class. Hooks run inside the
+optimiser's worker processes, so they must live at module level.
+"""
+
+import contextlib
+from collections.abc import Iterator
+
+from players.player_8.player import Player8
+from players.player_10.agent import config as player10_config
+from players.player_10.agent.player import Player10Agent
+from tournament.optimize import Param, Tunable
+
+PLAYER8_V_NAMES = tuple(f'v{i}' for i in range(6))
+
+
+def build_player8(params: dict[str, float]) -> type[Player8]:
+	v = [params[name] for name in PLAYER8_V_NAMES]
+
+	class TunedPlayer8(Player8):
+		def __init__(self, snapshot, ctx) -> None:
+			super().__init__(snapshot, ctx)
+			self.v = v
+
+	return TunedPlayer8
+
+
+PLAYER8_V = Tunable(
+	schema=tuple(Param(name, -5.0, 5.0) for name in PLAYER8_V_NAMES),
+	build=build_player8,
+	defaults=dict(
+		zip(
+			PLAYER8_V_NAMES,
+			(
+				3.509549936829426,
+				3.6661804644288427,
+				2.657774084696876,
+				4.354161981052706,
+				2.4502569274937183,
+				-1.386507441304629,
+			),
+			strict=True,
+		)
+	),
+)
+
+
+@contextlib.contextmanager
+def player10_config_override(params: dict[str, float]) -> Iterator[None]:
+	"""Sets Player10's config constants to ``params`` for the duration of the block."""
+	saved = {name: getattr(player10_config, name) for name in params}
+	for name, value in params.items():
+		setattr(player10_config, name, value)
+	try:
+		yield
+	finally:
+		for name, value in saved.items():
+			setattr(player10_config, name, value)
+
+
+def build_player10(params: dict[str, float]) -> type[Player10Agent]:
+	params = dict(params)
+
+	# Player10's modules read their constants from the config module at call time. The
+	# candidate's values are only in place while this player's own code runs, so other
+	# Player10s in the game, and later games in the process, keep theirs
+	class TunedPlayer10(Player10Agent):
+		def __init__(self, snapshot, ctx) -> None:
+			with player10_config_override(params):
+				super().__init__(snapshot, ctx)
+
+		def propose_item(self, history):
+			with player10_config_override(params):
+				return super().propose_item(history)
+
+	return TunedPlayer10
+
+
+PLAYER10_CONFIG = Tunable(
+	schema=(
+		Param('ALTRUISM_USE_PROB', 0.0, 1.0),
+		Param('TAU_MARGIN', 0.0, 0.5),
+		Param('EPSILON_FRESH', 0.0, 0.2),
+		Param('EPSILON_MONO', 0.0, 0.2),
+		Param('MIN_SAMPLES_PID', 1, 10, integer=True),
+		Param('EWMA_ALPHA', 0.01, 0.5),
+		Param('IMPORTANCE_WEIGHT', 0.0, 2.0),
+		Param('COHERENCE_WEIGHT', 0.0, 2.0),
+		Param('FRESHNESS_WEIGHT', 0.0, 2.0),
+		Param('MONOTONY_WEIGHT', 0.0, 3.0),
+	),
+	build=build_player10,
+	defaults={
+		'ALTRUISM_USE_PROB': 0.2,
+		'TAU_MARGIN': 0.2,
+		'EPSILON_FRESH': 0.05,
+		'EPSILON_MONO': 0.05,
+		'MIN_SAMPLES_PID': 5,
+		'EWMA_ALPHA': 0.05,
+		'IMPORTANCE_WEIGHT': 1.0,
+		'COHERENCE_WEIGHT': 1.05,
+		'FRESHNESS_WEIGHT': 1.0,
+		'MONOTONY_WEIGHT': 2.0,
+	},
+)
@@ -0,0 +1,485 @@
+"""
+In-process hyperparameter optimiser for player parameters.
+
+A *tunable* pairs a parameter schema with a hook that builds a player class from a
+parameter dict (see ``tournament.hooks``). Candidates are proposed in batches by CMA-ES or
+by Gaussian-process Bayesian optimisation, and every candidate in a run is played on the
+same seeds (common random numbers) on one persistent process pool. The optimiser state is
+checkpointed to JSON after every batch, so a run can be stopped and resumed.
+
+Usage:
+	python -m tournament.optimize --target tournament.hooks:PLAYER8_V --method cma \\
+		--opponents pr pr --iterations 20 --checkpoint p8_cma.json
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from models.player import Player
+from tournament.registry import resolve_roster
+from tournament.runner import GameSpec, play_game
+
+
+@dataclass(frozen=True)
+class Param:
+	name: str
+	low: float
+	high: float
+	integer: bool = False
+
+	def decode(self, u: float) -> float | int:
+		"""Maps a unit-interval coordinate onto the parameter's range."""
+		value = self.low + min(max(u, 0.0), 1.0) * (self.high - self.low)
+		return round(value) if self.integer else value
+
+	def encode(self, value: float) -> float:
+		return (value - self.low) / (self.high - self.low)
+
+
+@dataclass(frozen=True)
+class Tunable:
+	schema: tuple[Param, ...]
+	build: Callable[[dict[str, float]], Callable[..., Player]]
+	defaults: dict[str, float] | None = None
+
+	def decode(self, u: np.ndarray) -> dict[str, float]:
+		return {p.name: p.decode(float(x)) for p, x in zip(self.schema, u, strict=True)}
+
+	def encode(self, params: dict[str, float]) -> np.ndarray:
+		return np.array([p.encode(params[p.name]) for p in self.schema])
+
+
+def load_target(path: str) -> Tunable:
+	"""Imports a ``module:attribute`` reference to a ``Tunable``."""
+	module_name, _, attribute = path.partition(':')
+	return getattr(importlib.import_module(module_name), attribute)
+
+
+@dataclass(frozen=True)
+class EvalTask:
+	target: str
+	params: dict[str, float]
+	tuned: int
+	opponents: tuple[str, ...]
+	subjects: int
+	memory_size: int
+	length: int
+	seed: int
+	objective: str
+
+
+def evaluate(task: EvalTask) -> float:
+	"""Plays one game with ``task.tuned`` parameterised slots followed by the opponents."""
+	player = load_target(task.target).build(task.params)
+	players = [player] * task.tuned + resolve_roster(task.opponents)
+	spec = GameSpec(
+		roster=('tuned',) * task.tuned + task.opponents,
+		subjects=task.subjects,
+		memory_size=task.memory_size,
+		length=task.length,
+		seed=task.seed,
+	)
+	result = play_game(spec, players=players)
+
+	if task.objective == 'quality':
+		return result.quality
+	return sum(result.totals[: task.tuned]) / task.tuned
+
+
+class CMAES:
+	"""(mu/mu_w, lambda)-CMA-ES maximising over the unit hypercube."""
+
+	def __init__(
+		self,
+		dim: int,
+		mean: np.ndarray | None = None,
+		sigma: float = 0.3,
+		popsize: int | None = None,
+		seed: int = 0,
+	) -> None:
+		self.dim = dim
+		self.popsize = popsize or 4 + int(3 * math.log(dim))
+		self.mu = self.popsize // 2
+
+		weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+		self.weights = weights / weights.sum()
+		self.mueff = 1.0 / float(np.sum(self.weights**2))
+
+		n = dim
+		self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+		self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+		self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+		self.cmu = min(
+			1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff)
+		)
+		self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+		self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n))
+
+		self.mean = np.full(dim, 0.5) if mean is None else np.asarray(mean, dtype=float)
+		self.sigma = sigma
+		self.C = np.eye(dim)
+		self.ps = np.zeros(dim)
+		self.pc = np.zeros(dim)
+		self.generation = 0
+		self.rng = np.random.default_rng(seed)
+
+	def ask(self) -> np.ndarray:
+		eigenvalues, B = np.linalg.eigh(self.C)
+		D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+		z = self.rng.standard_normal((self.popsize, self.dim))
+		return self.mean + self.sigma * (z * D) @ B.T
+
+	def tell(self, X: np.ndarray, scores: np.ndarray) -> None:
+		# Out-of-box samples are evaluated at their clipped point and penalised by distance
+		fitness = -np.asarray(scores) + np.sum((X - np.clip(X, 0, 1)) ** 2, axis=1)
+		order = np.argsort(fitness)[: self.mu]
+		old_mean = self.mean
+		self.mean = self.weights @ X[order]
+
+		eigenvalues, B = np.linalg.eigh(self.C)
+		inv_sqrt_C = B @ np.diag(1 / np.sqrt(np.maximum(eigenvalues, 1e-20))) @ B.T
+		y_w = (self.mean - old_mean) / self.sigma
+
+		self.ps = (1 - self.cs) * self.ps + math.sqrt(
+			self.cs * (2 - self.cs) * self.mueff
+		) * inv_sqrt_C @ y_w
+		ps_norm = float(np.linalg.norm(self.ps))
+		hsig = ps_norm / math.sqrt(
+			1 - (1 - self.cs) ** (2 * (self.generation + 1))
+		) / self.chi_n < 1.4 + 2 / (self.dim + 1)
+		self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(
+			self.cc * (2 - self.cc) * self.mueff
+		) * y_w
+
+		steps = (X[order] - old_mean) / self.sigma
+		self.C = (
+			(1 - self.c1 - self.cmu) * self.C
+			+ self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+			+ self.cmu * steps.T @ np.diag(self.weights) @ steps
+		)
+		self.C = (self.C + self.C.T) / 2
+		self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+		self.generation += 1
+
+	def state_dict(self) -> dict:
+		return {
+			'mean': self.mean.tolist(),
+			'sigma': self.sigma,
+			'C': self.C.tolist(),
+			'ps': self.ps.tolist(),
+			'pc': self.pc.tolist(),
+			'generation': self.generation,
+			'popsize': self.popsize,
+			'rng': self.rng.bit_generator.state,
+		}
+
+	def load_state_dict(self, state: dict) -> None:
+		self.mean = np.array(state['mean'])
+		self.sigma = state['sigma']
+		self.C = np.array(state['C'])
+		self.ps = np.array(state['ps'])
+		self.pc = np.array(state['pc'])
+		self.generation = state['generation']
+		self.rng.bit_generator.state = state['rng']
+
+
+class BayesianOptimizer:
+	"""
+	Gaussian-process Bayesian optimisation on the unit hypercube. The RBF length scale and
+	noise level are picked from a small grid by marginal likelihood, batches are filled
+	greedily with the kriging-believer heuristic, and expected improvement is maximised
+	over random and near-incumbent candidates.
+	"""
+
+	LENGTH_SCALES = (0.05, 0.1, 0.2, 0.4, 0.8)
+	NOISE_LEVELS = (1e-3, 1e-2, 1e-1)
+
+	def __init__(self, dim: int, batch: int = 8, candidates: int = 2048, seed: int = 0) -> None:
+		self.dim = dim
+		self.popsize = batch
+		self.candidates = candidates
+		self.X = np.empty((0, dim))
+		self.y = np.empty(0)
+		self.rng = np.random.default_rng(seed)
+
+	@staticmethod
+	def _kernel(A: np.ndarray, B: np.ndarray, length_scale: float) -> np.ndarray:
+		sq = np.sum(A**2, 1)[:, None] + np.sum(B**2, 1)[None, :] - 2 * A @ B.T
+		return np.exp(-0.5 * np.maximum(sq, 0) / length_scale**2)
+
+	def _fit(self, X: np.ndarray, y: np.ndarray) -> tuple:
+		best = None
+		for length_scale in self.LENGTH_SCALES:
+			K = self._kernel(X, X, length_scale)
+			for noise in self.NOISE_LEVELS:
+				L = np.linalg.cholesky(K + noise * np.eye(len(X)))
+				alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+				log_likelihood = -0.5 * y @ alpha - np.sum(np.log(np.diag(L)))
+				if best is None or log_likelihood > best[0]:
+					best = (log_likelihood, length_scale, L, alpha)
+		return best[1:]
+
+	def _posterior(self, X: np.ndarray, y: np.ndarray, query: np.ndarray):
+		length_scale, L, alpha = self._fit(X, y)
+		Ks = self._kernel(query, X, length_scale)
+		mean = Ks @ alpha
+		v = np.linalg.solve(L, Ks.T)
+		std = np.sqrt(np.maximum(1.0 - np.sum(v**2, axis=0), 1e-12))
+		return mean, std
+
+	def ask(self) -> np.ndarray:
+		if len(self.y) < max(self.popsize, self.dim + 1):
+			return self.rng.random((self.popsize, self.dim))
+
+		X = self.X.copy()
+		mu, sd = self.y.mean(), self.y.std() or 1.0
+		y = (self.y - mu) / sd
+
+		batch = []
+		for _ in range(self.popsize):
+			incumbent = X[np.argmax(y)]
+			pool = np.vstack(
+				[
+					self.rng.random((self.candidates, self.dim)),
+					np.clip(
+						incumbent
+						+ 0.05 * self.rng.standard_normal((self.candidates // 4, self.dim)),
+						0,
+						1,
+					),
+				]
+			)
+			mean, std = self._posterior(X, y, pool)
+			improvement = mean - y.max() - 0.01
+			z = improvement / std
+			cdf = 0.5 * (1 + np.vectorize(math.erf)(z / math.sqrt(2)))
+			pdf = np.exp(-0.5 * z**2) / math.sqrt(2 * math.pi)
+			choice = pool[np.argmax(improvement * cdf + std * pdf)]
+
+			batch.append(choice)
+			# Kriging believer: pretend the posterior mean was observed at the chosen point
+			believed, _ = self._posterior(X, y, choice[None, :])
+			X = np.vstack([X, choice])
+			y = np.append(y, believed)
+
+		return np.array(batch)
+
+	def tell(self, X: np.ndarray, scores: np.ndarray) -> None:
+		self.X = np.vstack([self.X, X])
+		self.y = np.append(self.y, scores)
+
+	def state_dict(self) -> dict:
+		return {
+			'X': self.X.tolist(),
+			'y': self.y.tolist(),
+			'popsize': self.popsize,
+			'rng': self.rng.bit_generator.state,
+		}
+
+	def load_state_dict(self, state: dict) -> None:
+		self.X = np.array(state['X']).reshape(-1, self.dim)
+		self.y = np.array(state['y'])
+		self.rng.bit_generator.state = state['rng']
+
+
+class Optimizer:
+	def __init__(
+		self,
+		target: str,
+		method: str = 'cma',
+		tuned: int = 1,
+		opponents: tuple[str, ...] = (),
+		subjects: int = 20,
+		memory_size: int = 10,
+		length: int = 50,
+		seeds: tuple[int, ...] = tuple(range(8)),
+		batch: int | None = None,
+		workers: int | None = None,
+		checkpoint: str | Path | None = None,
+		objective: str = 'tuned',
+	) -> None:
+		self.target = target
+		self.tunable = load_target(target)
+		self.method = method
+		self.tuned = tuned
+		self.opponents = tuple(opponents)
+		self.subjects = subjects
+		self.memory_size = memory_size
+		self.length = length
+		self.seeds = tuple(seeds)
+		self.workers = workers or os.cpu_count() or 1
+		self.checkpoint = Path(checkpoint) if checkpoint else None
+		self.objective = objective
+
+		dim = len(self.tunable.schema)
+		if method == 'cma':
+			mean = self.tunable.encode(self.tunable.defaults) if self.tunable.defaults else None
+			self.strategy = CMAES(dim, mean=mean, popsize=batch)
+		elif method == 'bo':
+			self.strategy = BayesianOptimizer(dim, batch=batch or 8)
+		else:
+			raise ValueError(f'Unknown optimisation method: {method}')
+
+		self.history: list[dict] = []
+		self._executor: Executor | None = None
+		self._load_checkpoint()
+
+	def __enter__(self) -> 'Optimizer':
+		self._executor = ProcessPoolExecutor(max_workers=self.workers)
+		return self
+
+	def __exit__(self, *exc) -> None:
+		if self._executor:
+			self._executor.shutdown()
+			self._executor = None
+
+	@property
+	def best(self) -> dict | None:
+		return max(self.history, key=lambda h: h['score'], default=None)
+
+	def evaluate_batch(self, candidates: list[dict[str, float]]) -> list[float]:
+		"""Mean objective of each candidate, every candidate playing the same seeds."""
+		tasks = [
+			EvalTask(
+				target=self.target,
+				params=params,
+				tuned=self.tuned,
+				opponents=self.opponents,
+				subjects=self.subjects,
+				memory_size=self.memory_size,
+				length=self.length,
+				seed=seed,
+				objective=self.objective,
+			)
+			for params in candidates
+			for seed in self.seeds
+		]
+		if self._executor:
+			chunksize = max(1, len(tasks) // (self.workers * 4))
+			values = list(self._executor.map(evaluate, tasks, chunksize=chunksize))
+		else:
+			values = [evaluate(task) for task in tasks]
+
+		n = len(self.seeds)
+		return [sum(values[i * n : (i + 1) * n]) / n for i in range(len(candidates))]
+
+	def step(self) -> list[dict]:
+		U = self.strategy.ask()
+		candidates = [self.tunable.decode(u) for u in U]
+		scores = self.evaluate_batch(candidates)
+		self.strategy.tell(U, np.array(scores))
+
+		entries = [
+			{'iteration': self.iteration, 'params': params, 'score': score}
+			for params, score in zip(candidates, scores, strict=True)
+		]
+		self.history.extend(entries)
+		self._save_checkpoint()
+		return entries
+
+	@property
+	def iteration(self) -> int:
+		return len(self.history) // max(1, self.strategy.popsize)
+
+	def run(self, iterations: int, verbose: bool = True) -> dict | None:
+		for _ in range(iterations):
+			entries = self.step()
+			if verbose:
+				batch_best = max(entries, key=lambda e: e['score'])
+				print(
+					f'Iteration {self.iteration}: batch best {batch_best["score"]:.4f}, '
+					f'overall best {self.best["score"]:.4f}'
+				)
+		return self.best
+
+	def _checkpoint_config(self) -> dict:
+		return {
+			'target': self.target,
+			'method': self.method,
+			'tuned': self.tuned,
+			'opponents': list(self.opponents),
+			'subjects': self.subjects,
+			'memory_size': self.memory_size,
+			'length': self.length,
+			'seeds': list(self.seeds),
+			'objective': self.objective,
+		}
+
+	def _save_checkpoint(self) -> None:
+		if not self.checkpoint:
+			return
+
+		data = {
+			'config': self._checkpoint_config(),
+			'strategy': self.strategy.state_dict(),
+			'history': self.history,
+		}
+		tmp = self.checkpoint.with_suffix(self.checkpoint.suffix + '.tmp')
+		tmp.write_text(json.dumps(data))
+		tmp.replace(self.checkpoint)
+
+	def _load_checkpoint(self) -> None:
+		if not self.checkpoint or not self.checkpoint.exists():
+			return
+
+		data = json.loads(self.checkpoint.read_text())
+		if data['config'] != self._checkpoint_config():
+			raise ValueError(
+				f'Checkpoint {self.checkpoint} was written for a different configuration.'
+			)
+
+		self.strategy.load_state_dict(data['strategy'])
+		self.history = data['history']
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Optimise player parameters.')
+	parser.add_argument('--target', required=True, help='Tunable as module:attribute.')
+	parser.add_argument('--method', choices=['cma', 'bo'], default='cma')
+	parser.add_argument('--iterations', type=int, default=10, help='Batches to evaluate.')
+	parser.add_argument('--batch', type=int, help='Candidates per batch.')
+	parser.add_argument('--tuned', type=int, default=1, help='Slots using the candidate.')
+	parser.add_argument('--opponents', nargs='*', default=[], help='Other player codes.')
+	parser.add_argument('--subjects', type=int, default=20)
+	parser.add_argument('--memory_size', type=int, default=10)
+	parser.add_argument('--length', type=int, default=50)
+	parser.add_argument('--seeds', type=int, default=8, help='Common seeds per candidate.')
+	parser.add_argument('--workers', type=int, help='Worker processes (defaults to CPUs).')
+	parser.add_argument('--objective', choices=['tuned', 'quality'], default='tuned')
+	parser.add_argument('--checkpoint', help='JSON file to resume from and save to.')
+	args = parser.parse_args()
+
+	optimizer = Optimizer(
+		target=args.target,
+		method=args.method,
+		tuned=args.tuned,
+		opponents=tuple(args.opponents),
+		subjects=args.subjects,
+		memory_size=args.memory_size,
+		length=args.length,
+		seeds=tuple(range(args.seeds)),
+		batch=args.batch,
+		workers=args.workers,
+		checkpoint=args.checkpoint,
+		objective=args.objective,
+	)
+
+	with optimizer:
+		best = optimizer.run(args.iterations)
+
+	if best:
+		print(f'\nBest score: {best["score"]:.4f}')
+		print(json.dumps(best['params'], indent=2))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,63 @@
+from models.player import Player
+from players.oracle_player import OraclePlayer
+from players.pause_player import PausePlayer
+from players.player_1.player import Player1
+from players.player_2.player import Player2
+from players.player_3.player import Player3
+from players.player_4.player import Player4
+from players.player_5.player import Player5
+from players.player_6.player import Player6
+from players.player_7.player import Player7
+from players.player_8.player import Player8
+from players.player_9.player import Player9
+from players.player_10 import Player10
+from players.random_pause_player import RandomPausePlayer
+from players.random_player import RandomPlayer
+
+PLAYER_TYPES: dict[str, type[Player]] = {
+	'pr': RandomPlayer,
+	'pp': PausePlayer,
+	'prp': RandomPausePlayer,
+	'p1': Player1,
+	'p2': Player2,
+	'p3': Player3,
+	'p4': Player4,
+	'p5': Player5,
+	'p6': Player6,
+	'p7': Player7,
+	'p8': Player8,
+	'p9': Player9,
+	'p10': Player10,
+	'po': OraclePlayer,
+}
+
+
+def resolve_roster(codes: tuple[str, ...] | list[str]) -> list[type[Player]]:
+	"""
+	Maps CLI player codes (e.g. ``('p1', 'p1', 'pr')``) to player classes.
+	"""
+	unknown = [code for code in codes if code not in PLAYER_TYPES]
+	if unknown:
+		raise ValueError(f'Unknown player type(s): {", ".join(sorted(set(unknown)))}')
+
+	return [PLAYER_TYPES[code] for code in codes]
+
+
+def roster_from_counts(counts: dict[str, int]) -> tuple[str, ...]:
+	"""
+	Expands a ``{code: count}`` mapping into a roster in registry order, matching main.py.
+	"""
+	return tuple(code for code in PLAYER_TYPES for _ in range(counts.get(code, 0)))
+
+
+def counts_from_flags(flags: list[list[str]] | None) -> dict[str, int]:
+	"""
+	Sums repeated ``--player TYPE COUNT`` flags into a ``{code: count}`` mapping. Raises
+	ValueError for an unknown player type.
+	"""
+	counts: dict[str, int] = {}
+	for code, count in flags or []:
+		if code not in PLAYER_TYPES:
+			raise ValueError(f"Unknown player type '{code}'")
+		counts[code] = counts.get(code, 0) + int(count)
+	return counts
@@ -0,0 +1,447 @@
+"""
+Compact binary replay format for archived games.
+
+A game record stores its seed, parameters, roster and generated instance (preferences and
+memory banks) once, followed by one fixed-size record per turn: speaker index, item index
+within the speaker's memory bank and a bitmap of the players that proposed. Item UUIDs are
+regenerated deterministically on load unless the record was written with ``keep_ids``.
+
+Records are appended to an archive file behind a small magic header, each prefixed by its
+byte length so a reader can index an archive without decoding every game.
+
+Layout of one record (little-endian):
+	header      seed:q  players:H  subjects:H  memory_size:H  length:I  turns:I  flags:B
+	roster      players × (name_len:B, name:utf8)
+	preferences players × subjects × (uint8 if subjects <= 256 else uint16)
+	items       players × memory_size × (importance_centi:u1, n_subjects:u1, s0:u2, s1:u2)
+	ids         (flags & KEEP_IDS) players × 16 bytes, then players × memory_size × 16 bytes
+	turns       turns × (speaker:u2, item:u2, proposers:ceil(players / 8) bytes)
+
+Usage:
+	python -m tournament.replay record --player p1 5 --player pr 5 --games 1000 --output games.cvr
+	python -m tournament.replay show games.cvr --game 3 --turn 25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import struct
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from core.engine import Engine
+from core.scoring import NO_SUBJECT as NO_SCORED_SUBJECT
+from core.scoring import HistoryBatch
+from core.utils import CustomEncoder
+from models.item import Item
+from models.player import PlayerSnapshot
+from players.oracle_player import bind_oracles
+from tournament.registry import counts_from_flags, resolve_roster, roster_from_counts
+from tournament.runner import GameSpec
+
+MAGIC = b'CVR1'
+KEEP_IDS = 0x01
+PAUSE = 0xFFFF
+NO_SUBJECT = 0xFFFF
+
+_HEADER = struct.Struct('<qHHHIIB')
+_LENGTH = struct.Struct('<I')
+_ITEM_DTYPE = np.dtype([('importance', '<u1'), ('n', '<u1'), ('s0', '<u2'), ('s1', '<u2')])
+
+
+def _turn_dtype(players: int) -> np.dtype:
+	return np.dtype(
+		[('speaker', '<u2'), ('item', '<u2'), ('proposers', 'u1', ((players + 7) // 8,))]
+	)
+
+
+def _synthetic_id(player: int, slot: int) -> uuid.UUID:
+	"""Stable stand-in UUID: slot 0 is the player itself, slot i + 1 its i-th item."""
+	return uuid.UUID(int=((player + 1) << 64) | slot)
+
+
+def _pref_dtype(subjects: int) -> str:
+	return '<u1' if subjects <= 256 else '<u2'
+
+
+@dataclass
+class Replay:
+	seed: int
+	subjects: int
+	memory_size: int
+	length: int
+	roster: tuple[str, ...]
+	preferences: np.ndarray  # (players, subjects)
+	items: np.ndarray  # (players, memory_size) of _ITEM_DTYPE
+	turns: np.ndarray  # (turns,) of _turn_dtype(players)
+	player_ids: tuple[uuid.UUID, ...] | None = None
+	item_ids: tuple[tuple[uuid.UUID, ...], ...] | None = None
+
+	@property
+	def players(self) -> int:
+		return len(self.roster)
+
+	@cached_property
+	def snapshots(self) -> dict[uuid.UUID, PlayerSnapshot]:
+		"""Player snapshots, rebuilt once per replay."""
+		snapshots = {}
+		handle = 0
+		for p in range(self.players):
+			pid = self.player_ids[p] if self.player_ids else _synthetic_id(p, 0)
+			bank = []
+			for i, record in enumerate(self.items[p]):
+				subjects = (int(record['s0']), int(record['s1']))[: int(record['n'])]
+				bank.append(
+					Item(
+						id=self.item_ids[p][i] if self.item_ids else _synthetic_id(p, i + 1),
+						player_id=pid,
+						importance=int(record['importance']) / 100,
+						subjects=subjects,
+						handle=handle,
+					)
+				)
+				handle += 1
+			snapshots[pid] = PlayerSnapshot(
+				id=pid,
+				preferences=tuple(int(s) for s in self.preferences[p]),
+				memory_bank=tuple(bank),
+			)
+		return snapshots
+
+	@cached_property
+	def history(self) -> list[Item | None]:
+		banks = [snapshot.memory_bank for snapshot in self.snapshots.values()]
+		return [
+			None if speaker == PAUSE else banks[speaker][item]
+			for speaker, item in zip(
+				self.turns['speaker'].tolist(), self.turns['item'].tolist(), strict=True
+			)
+		]
+
+	def proposers(self, turn: int) -> list[int]:
+		"""Indices of the players that proposed an item on ``turn`` (0-based)."""
+		bits = np.unpackbits(self.turns['proposers'][turn], bitorder='little')[: self.players]
+		return np.flatnonzero(bits).tolist()
+
+	def engine_at(self, turn: int | None = None) -> Engine:
+		"""The engine state after ``turn`` turns (the whole game by default)."""
+		turn = len(self.turns) if turn is None else turn
+		names = dict(zip(self.snapshots, self.roster, strict=True))
+		return Engine.from_history(
+			snapshots=self.snapshots,
+			player_names=names,
+			subjects=self.subjects,
+			memory_size=self.memory_size,
+			conversation_length=self.length,
+			history=self.history[:turn],
+		)
+
+	def scores_at(self, turn: int | None = None) -> dict:
+		return self.engine_at(turn).final_scores()
+
+	def to_bytes(self) -> bytes:
+		keep_ids = self.player_ids is not None and self.item_ids is not None
+		parts = [
+			_HEADER.pack(
+				self.seed,
+				self.players,
+				self.subjects,
+				self.memory_size,
+				self.length,
+				len(self.turns),
+				KEEP_IDS if keep_ids else 0,
+			)
+		]
+		for name in self.roster:
+			encoded = name.encode()
+			parts.append(bytes([len(encoded)]) + encoded)
+
+		parts.append(self.preferences.astype(_pref_dtype(self.subjects)).tobytes())
+		parts.append(self.items.astype(_ITEM_DTYPE).tobytes())
+		if keep_ids:
+			parts.extend(pid.bytes for pid in self.player_ids)
+			parts.extend(iid.bytes for bank in self.item_ids for iid in bank)
+		parts.append(self.turns.astype(_turn_dtype(self.players)).tobytes())
+		return b''.join(parts)
+
+	@classmethod
+	def from_bytes(cls, data: bytes | memoryview) -> 'Replay':
+		seed, players, subjects, memory_size, length, n_turns, flags = _HEADER.unpack_from(data)
+		offset = _HEADER.size
+
+		roster = []
+		for _ in range(players):
+			size = data[offset]
+			roster.append(bytes(data[offset + 1 : offset + 1 + size]).decode())
+			offset += 1 + size
+
+		def take(dtype, count):
+			nonlocal offset
+			dtype = np.dtype(dtype)
+			array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+			offset += dtype.itemsize * count
+			return array
+
+		preferences = take(_pref_dtype(subjects), players * subjects).reshape(players, subjects)
+		items = take(_ITEM_DTYPE, players * memory_size).reshape(players, memory_size)
+
+		player_ids = item_ids = None
+		if flags & KEEP_IDS:
+			raw = take('u1', 16 * players * (memory_size + 1)).tobytes()
+			ids = [uuid.UUID(bytes=raw[i : i + 16]) for i in range(0, len(raw), 16)]
+			player_ids = tuple(ids[:players])
+			item_ids = tuple(
+				tuple(ids[players + p * memory_size : players + (p + 1) * memory_size])
+				for p in range(players)
+			)
+
+		turns = take(_turn_dtype(players), n_turns)
+		return cls(
+			seed=seed,
+			subjects=subjects,
+			memory_size=memory_size,
+			length=length,
+			roster=tuple(roster),
+			preferences=preferences,
+			items=items,
+			turns=turns,
+			player_ids=player_ids,
+			item_ids=item_ids,
+		)
+
+
+class _TurnRecorder:
+	"""Collects what ``from_engine`` needs without the engine's per-turn score dicts."""
+
+	def __init__(self) -> None:
+		self.turns: list[dict] = []
+
+	def on_proposals(self, engine, turn, proposals, speaker_id, item) -> None:
+		self.turns.append({'speaker_id': speaker_id, 'item': item, 'proposals': proposals})
+
+
+def record_game(spec: GameSpec, keep_ids: bool = False) -> Replay:
+	"""Plays ``spec`` (seeded like ``tournament.runner.play_game``) and captures its replay."""
+	random.seed(spec.seed)
+	np.random.seed(spec.seed)
+
+	engine = Engine(
+		players=resolve_roster(spec.roster),
+		player_count=len(spec.roster),
+		subjects=spec.subjects,
+		memory_size=spec.memory_size,
+		conversation_length=spec.length,
+	)
+	bind_oracles(engine)
+	recorder = _TurnRecorder()
+	engine.subscribe(recorder)
+	with contextlib.redirect_stdout(io.StringIO()):
+		engine.play()
+
+	return from_engine(engine, recorder.turns, spec.seed, spec.roster, keep_ids)
+
+
+def from_engine(
+	engine: Engine,
+	turn_log: list[dict],
+	seed: int,
+	roster: tuple[str, ...],
+	keep_ids: bool = False,
+) -> Replay:
+	"""
+	Encodes a finished engine and its turns: dicts with ``speaker_id``, ``item`` and
+	``proposals``, like those returned by ``Engine.run``.
+	"""
+	snapshots = list(engine.snapshots.values())
+	player_index = {snapshot.id: p for p, snapshot in enumerate(snapshots)}
+	item_index = {
+		item.id: i for snapshot in snapshots for i, item in enumerate(snapshot.memory_bank)
+	}
+	players, subjects = len(snapshots), len(engine.subjects)
+
+	preferences = np.array([s.preferences for s in snapshots], dtype=_pref_dtype(subjects))
+	preferences = preferences.reshape(players, subjects)
+
+	items = np.zeros((players, engine.memory_size), dtype=_ITEM_DTYPE)
+	for p, snapshot in enumerate(snapshots):
+		for i, item in enumerate(snapshot.memory_bank):
+			items[p, i] = (
+				round(item.importance * 100),
+				len(item.subjects),
+				item.subjects[0],
+				item.subjects[1] if len(item.subjects) > 1 else NO_SUBJECT,
+			)
+
+	turns = np.zeros(len(turn_log), dtype=_turn_dtype(players))
+	for t, entry in enumerate(turn_log):
+		item = entry['item']
+		if item is None:
+			turns[t]['speaker'] = PAUSE
+			turns[t]['item'] = PAUSE
+		else:
+			turns[t]['speaker'] = player_index[entry['speaker_id']]
+			turns[t]['item'] = item_index[item.id]
+		bits = np.zeros(players, dtype=np.uint8)
+		bits[[player_index[uid] for uid in entry['proposals']]] = 1
+		turns[t]['proposers'] = np.packbits(bits, bitorder='little')
+
+	return Replay(
+		seed=seed,
+		subjects=subjects,
+		memory_size=engine.memory_size,
+		length=engine.conversation_length,
+		roster=tuple(roster),
+		preferences=preferences,
+		items=items,
+		turns=turns,
+		player_ids=tuple(s.id for s in snapshots) if keep_ids else None,
+		item_ids=tuple(tuple(i.id for i in s.memory_bank) for s in snapshots) if keep_ids else None,
+	)
+
+
+def to_batch(replays: list[Replay]) -> HistoryBatch:
+	"""Stacks replays into a ``HistoryBatch`` for ``core.scoring.score_histories``."""
+	K = len(replays)
+	T = max((len(r.turns) for r in replays), default=0)
+	P = max((r.players for r in replays), default=0)
+	B = max((r.memory_size for r in replays), default=0)
+	S = max((r.subjects for r in replays), default=0)
+
+	speaker = np.full((K, T), -1, dtype=np.int64)
+	item = np.full((K, T), -1, dtype=np.int64)
+	bank_subjects = np.full((K, P, B, 2), NO_SCORED_SUBJECT, dtype=np.int64)
+	bank_importance = np.zeros((K, P, B))
+	ranks = np.zeros((K, P, S), dtype=np.int64)
+	subject_count = np.array([r.subjects for r in replays], dtype=np.int64)
+
+	for k, replay in enumerate(replays):
+		n, p, b, s = len(replay.turns), replay.players, replay.memory_size, replay.subjects
+		turn_speaker = replay.turns['speaker'].astype(np.int64)
+		paused = turn_speaker == PAUSE
+		speaker[k, :n] = np.where(paused, -1, turn_speaker)
+		item[k, :n] = np.where(paused, -1, replay.turns['item'].astype(np.int64))
+
+		bank_subjects[k, :p, :b, 0] = replay.items['s0']
+		bank_subjects[k, :p, :b, 1] = np.where(
+			replay.items['n'] > 1, replay.items['s1'].astype(np.int64), NO_SCORED_SUBJECT
+		)
+		bank_importance[k, :p, :b] = replay.items['importance'] / 100
+		np.put_along_axis(
+			ranks[k, :p, :s],
+			replay.preferences.astype(np.int64),
+			np.broadcast_to(np.arange(s), (p, s)),
+			axis=1,
+		)
+
+	return HistoryBatch.from_arrays(
+		speaker, item, bank_subjects, bank_importance, ranks, subject_count
+	)
+
+
+class ReplayWriter:
+	def __init__(self, path: str | Path) -> None:
+		self.path = Path(path)
+		is_new = not self.path.exists() or self.path.stat().st_size == 0
+		self._file = self.path.open('ab')
+		if is_new:
+			self._file.write(MAGIC)
+
+	def write(self, replay: Replay) -> None:
+		blob = replay.to_bytes()
+		self._file.write(_LENGTH.pack(len(blob)) + blob)
+
+	def close(self) -> None:
+		self._file.close()
+
+	def __enter__(self) -> 'ReplayWriter':
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+class ReplayReader:
+	"""Memory-maps an archive and decodes individual games on demand."""
+
+	def __init__(self, path: str | Path) -> None:
+		self._data = memoryview(np.memmap(path, dtype=np.uint8, mode='r'))
+		if bytes(self._data[: len(MAGIC)]) != MAGIC:
+			raise ValueError(f'{path} is not a replay archive')
+
+		self._offsets = []
+		offset = len(MAGIC)
+		while offset < len(self._data):
+			(size,) = _LENGTH.unpack_from(self._data, offset)
+			self._offsets.append((offset + _LENGTH.size, size))
+			offset += _LENGTH.size + size
+
+	def __len__(self) -> int:
+		return len(self._offsets)
+
+	def __getitem__(self, index: int) -> Replay:
+		start, size = self._offsets[index]
+		return Replay.from_bytes(self._data[start : start + size])
+
+	def __iter__(self) -> Iterator[Replay]:
+		for index in range(len(self)):
+			yield self[index]
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Record and inspect binary game replays.')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	record = subparsers.add_parser('record', help='Play games and append them to an archive.')
+	record.add_argument(
+		'--player', action='append', nargs=2, metavar=('TYPE', 'COUNT'), required=True
+	)
+	record.add_argument('--subjects', type=int, default=20)
+	record.add_argument('--memory_size', type=int, default=10)
+	record.add_argument('--length', type=int, default=10)
+	record.add_argument('--games', type=int, default=10)
+	record.add_argument('--seed', type=int, default=0, help='First seed.')
+	record.add_argument('--keep-ids', action='store_true', help='Store the original UUIDs.')
+	record.add_argument('--output', required=True)
+
+	show = subparsers.add_parser('show', help='Print a stored game or its scores at a turn.')
+	show.add_argument('archive')
+	show.add_argument('--game', type=int, default=0)
+	show.add_argument('--turn', type=int, help='Score the game after this many turns.')
+
+	args = parser.parse_args()
+
+	if args.command == 'record':
+		try:
+			roster = roster_from_counts(counts_from_flags(args.player))
+		except ValueError as e:
+			record.error(str(e))
+		with ReplayWriter(args.output) as writer:
+			for seed in range(args.seed, args.seed + args.games):
+				spec = GameSpec(roster, args.subjects, args.memory_size, args.length, seed)
+				writer.write(record_game(spec, keep_ids=args.keep_ids))
+		size = Path(args.output).stat().st_size
+		print(f'Archive {args.output}: {size} bytes')
+	else:
+		replay = ReplayReader(args.archive)[args.game]
+		print(f'Seed {replay.seed}, roster {", ".join(replay.roster)}, {len(replay.turns)} turns')
+		if args.turn is None:
+			for t, item in enumerate(replay.history):
+				speaker = (
+					'pause' if item is None else replay.roster[int(replay.turns['speaker'][t])]
+				)
+				subjects = '' if item is None else f'{item.subjects} imp={item.importance:.2f}'
+				print(f'{t + 1:>5} {speaker:<6} {subjects:<24} proposers={replay.proposers(t)}')
+		else:
+			scores = replay.scores_at(args.turn)
+			print(json.dumps(scores['shared_score_breakdown'], indent=2, cls=CustomEncoder))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,141 @@
+import contextlib
+import io
+import os
+import random
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.engine import Engine
+from models.player import GameContext, Player, PlayerSnapshot, prepare
+from players.oracle_player import bind_oracles
+from tournament.registry import resolve_roster
+
+
+@dataclass(frozen=True)
+class GameSpec:
+	roster: tuple[str, ...]
+	subjects: int = 20
+	memory_size: int = 10
+	length: int = 10
+	seed: int = 91
+	# Seats of ``roster`` that play (ascending); the others are dealt but sit out
+	seats: tuple[int, ...] | None = None
+
+
+@dataclass(frozen=True)
+class GameResult:
+	spec: GameSpec
+	shared: float
+	importance: float
+	coherence: float
+	freshness: float
+	nonmonotonousness: float
+	individual: tuple[float, ...]
+	totals: tuple[float, ...]
+	turns: int
+	pauses: int
+
+	@property
+	def quality(self) -> float:
+		"""Shared score normalised by the conversation length."""
+		return self.shared / self.spec.length if self.spec.length > 0 else 0.0
+
+
+class PlayerPool:
+	"""
+	Player instances kept between the games played in this process. Games built through
+	``builder`` reuse an idle instance with ``reset`` instead of constructing a new one.
+	"""
+
+	def __init__(self) -> None:
+		self.idle: dict[type[Player], list[Player]] = {}
+
+	def builder(self, player_class: type[Player]) -> Callable[..., Player]:
+		def build(snapshot: PlayerSnapshot, ctx: GameContext) -> Player:
+			prepare(player_class, ctx)
+			idle = self.idle.get(player_class)
+			if not idle:
+				return player_class(snapshot=snapshot, ctx=ctx)
+			player = idle.pop()
+			player.reset(snapshot, ctx)
+			return player
+
+		return build
+
+	def release(self, players: Iterable[Player]) -> None:
+		for player in players:
+			self.idle.setdefault(type(player), []).append(player)
+
+
+_POOL = PlayerPool()
+
+
+def play_game(
+	spec: GameSpec,
+	quiet: bool = True,
+	players: list[Callable[..., Player]] | None = None,
+) -> GameResult:
+	"""
+	Plays one game headlessly. Both RNGs are seeded from ``spec.seed`` so games that share
+	a seed also share their random stream (common random numbers): players are generated
+	in roster order, so two rosters with a common prefix get identical snapshots for it,
+	and a seat keeps its snapshot in any ``spec.seats`` subset of the same roster.
+
+	``players`` overrides the classes resolved from ``spec.roster`` (e.g. parameterised
+	subclasses), one per playing seat; the roster entries are then only used as labels. Registered players are
+	reused between games of the same process (see ``PlayerPool``); overrides are not.
+	"""
+	random.seed(spec.seed)
+	np.random.seed(spec.seed)
+
+	seated = spec.roster if spec.seats is None else tuple(spec.roster[s] for s in spec.seats)
+	engine = Engine(
+		players=players or [_POOL.builder(cls) for cls in resolve_roster(seated)],
+		player_count=len(spec.roster),
+		subjects=spec.subjects,
+		memory_size=spec.memory_size,
+		conversation_length=spec.length,
+		seats=spec.seats,
+	)
+	bind_oracles(engine)
+
+	output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+	with output:
+		scores = engine.run(engine.players, record=False)['scores']
+	if not players:
+		_POOL.release(engine.players)
+
+	breakdown = scores['shared_score_breakdown']
+	player_scores = scores['player_scores']
+
+	return GameResult(
+		spec=spec,
+		shared=breakdown['total'],
+		importance=breakdown['importance'],
+		coherence=breakdown['coherence'],
+		freshness=breakdown['freshness'],
+		nonmonotonousness=breakdown['nonmonotonousness'],
+		individual=tuple(p['scores']['individual'] for p in player_scores),
+		totals=tuple(p['scores']['total'] for p in player_scores),
+		turns=scores['conversation_length'],
+		pauses=scores['pauses'],
+	)
+
+
+def run_games(specs: Iterable[GameSpec], workers: int | None = None) -> list[GameResult]:
+	"""
+	Plays every spec and returns results in input order. ``workers=1`` runs in-process;
+	otherwise games are spread over a process pool (defaults to the CPU count).
+	"""
+	specs = list(specs)
+	workers = workers or os.cpu_count() or 1
+
+	if workers == 1 or len(specs) <= 1:
+		return [play_game(spec) for spec in specs]
+
+	chunksize = max(1, len(specs) // (workers * 4))
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(play_game, specs, chunksize=chunksize))